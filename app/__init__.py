@@ -1 +1,15 @@
-from .main import create_web_app, main
+import importlib
+
+
+def __getattr__(name: str):
+    # Приложение импортируется лениво: процессы ProcessPool и обучения
+    # запускаются через spawn и импортируют свои функции из app.*, а
+    # app.main тянет контейнер со всеми моделями (TensorFlow, MarianMT,
+    # spaCy, загрузку данных NLTK)
+    if name in ("create_web_app", "main"):
+        module = importlib.import_module("app.main")
+        globals().update(
+            create_web_app=module.create_web_app, main=module.main
+        )
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
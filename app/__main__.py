@@ -1,4 +1,4 @@
-import app
+from app.main import main
 
 if __name__ == "__main__":
-    app.main()
+    main()
@@ -27,13 +27,180 @@ def setup_config(config: providers.Configuration):
         default="mongodb://localhost:27017/test_mongo",
     )
 
-    # MongoDB
+    # OpenAI
     # ------------------------------------------------------------------------
     wrapper.set_str(
         path="open_ai.token",
         env="OPEN_AI_TOKEN",
     )
 
+    # Logical search
+    # ------------------------------------------------------------------------
+    wrapper.set_int(
+        path="logical_search.plan_cache_size",
+        env="LOGICAL_SEARCH_PLAN_CACHE_SIZE",
+        default=1024,
+    )
+    wrapper.set_str(
+        path="logical_search.index_storage",
+        env="LOGICAL_SEARCH_INDEX_STORAGE",
+        default="memory",
+    )
+    wrapper.set_str(
+        path="logical_search.index_path",
+        env="LOGICAL_SEARCH_INDEX_PATH",
+        default="search-index",
+    )
+    wrapper.set_int(
+        path="logical_search.index_merge_factor",
+        env="LOGICAL_SEARCH_INDEX_MERGE_FACTOR",
+        default=10,
+    )
+    wrapper.set_int(
+        path="logical_search.index_batch_size",
+        env="LOGICAL_SEARCH_INDEX_BATCH_SIZE",
+        default=500,
+    )
+    wrapper.set_int(
+        path="logical_search.fetch_batch_size",
+        env="LOGICAL_SEARCH_FETCH_BATCH_SIZE",
+        default=100,
+    )
+    wrapper.set_int(
+        path="logical_search.translation_cache_size",
+        env="LOGICAL_SEARCH_TRANSLATION_CACHE_SIZE",
+        default=10000,
+    )
+    wrapper.set_int(
+        path="logical_search.translation_cache_ttl",
+        env="LOGICAL_SEARCH_TRANSLATION_CACHE_TTL",
+        default=86400,
+    )
+    wrapper.set_bool(
+        path="logical_search.translation_cache_persistent",
+        env="LOGICAL_SEARCH_TRANSLATION_CACHE_PERSISTENT",
+        default=False,
+    )
+
+    # Weight coefficient
+    # ------------------------------------------------------------------------
+    wrapper.set_int(
+        path="weight_coefficient.batch_size",
+        env="WEIGHT_COEFFICIENT_BATCH_SIZE",
+        default=500,
+    )
+
+    # Similar documents
+    # ------------------------------------------------------------------------
+    wrapper.set_int(
+        path="similar_documents.dimension",
+        env="SIMILAR_DOCUMENTS_DIMENSION",
+        default=2**20,
+    )
+    wrapper.set_int(
+        path="similar_documents.tables",
+        env="SIMILAR_DOCUMENTS_TABLES",
+        default=32,
+    )
+    wrapper.set_int(
+        path="similar_documents.bits",
+        env="SIMILAR_DOCUMENTS_BITS",
+        default=10,
+    )
+
+    # Alphabet method
+    # ------------------------------------------------------------------------
+    wrapper.set_int(
+        path="alphabet_method.batch_size",
+        env="ALPHABET_METHOD_BATCH_SIZE",
+        default=500,
+    )
+    wrapper.set_int(
+        path="alphabet_method.reload_interval",
+        env="ALPHABET_METHOD_RELOAD_INTERVAL",
+        default=30,
+    )
+
+    # N-gram profile method
+    # ------------------------------------------------------------------------
+    wrapper.set_int(
+        path="ngramm_profile_method.profile_size",
+        env="NGRAMM_PROFILE_METHOD_PROFILE_SIZE",
+        default=300,
+    )
+    wrapper.set_int(
+        path="ngramm_profile_method.batch_size",
+        env="NGRAMM_PROFILE_METHOD_BATCH_SIZE",
+        default=500,
+    )
+    wrapper.set_int(
+        path="ngramm_profile_method.reload_interval",
+        env="NGRAMM_PROFILE_METHOD_RELOAD_INTERVAL",
+        default=30,
+    )
+
+    # Language detection
+    # ------------------------------------------------------------------------
+    wrapper.set_int(
+        path="language_detection.early_exit_chunk_size",
+        env="LANGUAGE_DETECTION_EARLY_EXIT_CHUNK_SIZE",
+        default=4096,
+    )
+    wrapper.set_float(
+        path="language_detection.early_exit_margin",
+        env="LANGUAGE_DETECTION_EARLY_EXIT_MARGIN",
+        default=0.8,
+    )
+    wrapper.set_int(
+        path="language_detection.batch_max_size",
+        env="LANGUAGE_DETECTION_BATCH_MAX_SIZE",
+        default=32,
+    )
+    wrapper.set_float(
+        path="language_detection.batch_max_latency_ms",
+        env="LANGUAGE_DETECTION_BATCH_MAX_LATENCY_MS",
+        default=5,
+    )
+
+    # Training
+    # ------------------------------------------------------------------------
+    wrapper.set_int(
+        path="training.streaming_batch_size",
+        env="TRAINING_STREAMING_BATCH_SIZE",
+        default=500,
+    )
+    wrapper.set_int(
+        path="training.hashing_features",
+        env="TRAINING_HASHING_FEATURES",
+        default=2**18,
+    )
+    wrapper.set_int(
+        path="training.shuffle_buffer_size",
+        env="TRAINING_SHUFFLE_BUFFER_SIZE",
+        default=10000,
+    )
+
+    # Batch upload
+    # ------------------------------------------------------------------------
+    wrapper.set_int(
+        path="batch_upload.max_archive_members",
+        env="BATCH_UPLOAD_MAX_ARCHIVE_MEMBERS",
+        default=1000,
+    )
+    wrapper.set_int(
+        path="batch_upload.max_archive_size",
+        env="BATCH_UPLOAD_MAX_ARCHIVE_SIZE",
+        default=100 * 1024 * 1024,
+    )
+
+    # Process pool
+    # ------------------------------------------------------------------------
+    wrapper.set_int(
+        path="process_pool.workers",
+        env="PROCESS_POOL_WORKERS",
+        default=2,
+    )
+
     # S3
     # ------------------------------------------------------------------------
     wrapper.set_str(
@@ -1,5 +1,5 @@
 import operator
-from typing import Callable
+from typing import Callable, Union
 
 import aioboto3
 from beanie import init_beanie
@@ -7,25 +7,51 @@ from dependency_injector import containers, providers
 from dependency_injector.wiring import Provide
 from fastapi import Depends, FastAPI
 
+from app.service.alphabet_method.dto import AlphabetProfile
 from app.service.alphabet_method.service import AlphabetMethodService
+from app.service.calculate_weight_coefficient.dto import (
+    CorpusVersion,
+    TfidfDocumentWeights,
+    TfidfMaterialization,
+)
+from app.service.calculate_weight_coefficient.repository import (
+    WeightCoefficientRepository,
+)
 from app.service.calculate_weight_coefficient.service import (
     WeightCoefficientService,
 )
+from app.service.calculate_weight_coefficient.statistics import (
+    CorpusStatistics,
+)
+from app.service.calculate_weight_coefficient.version import (
+    CorpusVersionTracker,
+)
 from app.service.html_processing.service import HtmlProcessingService
+from app.service.language_profile import LanguageProfileRepository
+from app.service.logical_search.dto import QueryTranslation
+from app.service.logical_search.index import InvertedIndex
+from app.service.logical_search.repository import QueryTranslationRepository
+from app.service.logical_search.segmented_index import SegmentedIndex
 from app.service.logical_search.service import LogicalSearchService
+from app.service.logical_search.translation_cache import QueryTranslationCache
 from app.service.machine_translator.service import MachineTranslatorService
 from app.service.neural_and_ngramm_method.service import (
     NgrammAndNeuralMethodService,
 )
+from app.service.ngramm_profile_method.dto import NgramProfile
+from app.service.ngramm_profile_method.service import NgramProfileMethodService
 from app.service.open_ai_service.service import OpenAIService
 from app.service.report_generation.service import ReportGenerationService
 from app.service.s3_service import S3Service
+from app.service.similar_documents.index import LSHIndex
+from app.service.similar_documents.service import SimilarDocumentsService
 from app.service.text_document import (
     TextDocument,
     TextDocumentRepository,
     TextDocumentService,
 )
 from app.util.enums import Mode
+from app.util.process_pool import ProcessPool, init_process_pool
 
 APP_TITLE = "Logical Search Application"
 
@@ -38,7 +64,15 @@ class ApplicationContainer(containers.DeclarativeContainer):
     beanie_initialization = providers.Resource(
         init_beanie,
         connection_string=config.mongo.url,
-        document_models=[TextDocument],
+        document_models=[
+            TextDocument,
+            QueryTranslation,
+            CorpusVersion,
+            TfidfMaterialization,
+            TfidfDocumentWeights,
+            AlphabetProfile,
+            NgramProfile,
+        ],
         allow_index_dropping=False,
     )
 
@@ -64,15 +98,74 @@ class ApplicationContainer(containers.DeclarativeContainer):
         )
     )
 
+    search_index: Provider[Union[InvertedIndex, SegmentedIndex]] = (
+        providers.Selector(
+            config.logical_search.index_storage,
+            memory=providers.Singleton(InvertedIndex),
+            mmap=providers.Singleton(
+                SegmentedIndex,
+                path=config.logical_search.index_path,
+                merge_factor=config.logical_search.index_merge_factor,
+            ),
+        )
+    )
+
+    process_pool: Provider[ProcessPool] = providers.Resource(
+        init_process_pool,
+        workers=config.process_pool.workers,
+    )
+
+    corpus_statistics: Provider[CorpusStatistics] = providers.Singleton(
+        CorpusStatistics
+    )
+
+    weight_coefficient_repository: Provider[WeightCoefficientRepository] = (
+        providers.Singleton(WeightCoefficientRepository)
+    )
+
+    corpus_version_tracker: Provider[CorpusVersionTracker] = (
+        providers.Singleton(
+            CorpusVersionTracker,
+            weight_coefficient_repository=weight_coefficient_repository,
+        )
+    )
+
+    similarity_index: Provider[LSHIndex] = providers.Singleton(
+        LSHIndex,
+        corpus_statistics=corpus_statistics,
+        dimension=config.similar_documents.dimension,
+        tables=config.similar_documents.tables,
+        bits=config.similar_documents.bits,
+    )
+
     text_document_service: Provider[TextDocumentService] = providers.Singleton(
         TextDocumentService,
         text_document_repository=text_document_repository,
+        listeners=providers.List(
+            search_index,
+            corpus_statistics,
+            similarity_index,
+            corpus_version_tracker,
+        ),
     )
 
     weight_coefficient_service: Provider[WeightCoefficientService] = (
         providers.Singleton(
             WeightCoefficientService,
             text_document_service=text_document_service,
+            corpus_statistics=corpus_statistics,
+            process_pool=process_pool,
+            weight_coefficient_repository=weight_coefficient_repository,
+            batch_size=config.weight_coefficient.batch_size,
+        )
+    )
+
+    similar_documents_service: Provider[SimilarDocumentsService] = (
+        providers.Singleton(
+            SimilarDocumentsService,
+            text_document_service=text_document_service,
+            weight_coefficient_service=weight_coefficient_service,
+            similarity_index=similarity_index,
         )
     )
 
@@ -81,16 +174,40 @@ class ApplicationContainer(containers.DeclarativeContainer):
         open_ai_token=config.open_ai.token,
     )
 
+    query_translation_repository: Provider[QueryTranslationRepository] = (
+        providers.Singleton(QueryTranslationRepository)
+    )
+
+    query_translation_cache: Provider[QueryTranslationCache] = (
+        providers.Singleton(
+            QueryTranslationCache,
+            query_translation_repository=query_translation_repository,
+            maxsize=config.logical_search.translation_cache_size,
+            ttl=config.logical_search.translation_cache_ttl,
+            persistent=config.logical_search.translation_cache_persistent,
+        )
+    )
+
     logical_search_service: Provider[LogicalSearchService] = (
         providers.Singleton(
             LogicalSearchService,
             text_document_service=text_document_service,
             open_ai_service=open_ai_service,
+            search_index=search_index,
+            translation_cache=query_translation_cache,
+            plan_cache_size=config.logical_search.plan_cache_size,
+            index_batch_size=config.logical_search.index_batch_size,
+            fetch_batch_size=config.logical_search.fetch_batch_size,
         )
     )
 
     html_processing_service: Provider[HtmlProcessingService] = (
-        providers.Resource(HtmlProcessingService)
+        providers.Resource(
+            HtmlProcessingService,
+            process_pool=process_pool,
+            max_archive_members=config.batch_upload.max_archive_members,
+            max_archive_size=config.batch_upload.max_archive_size,
+        )
     )
 
     s3_service: Provider[S3Service] = providers.Resource(
@@ -115,6 +232,18 @@ class ApplicationContainer(containers.DeclarativeContainer):
             text_document_service=text_document_service,
             s3_service=s3_service,
             report_generation_service=report_generation_service,
+            process_pool=process_pool,
+            early_exit_chunk_size=(
+                config.language_detection.early_exit_chunk_size
+            ),
+            early_exit_margin=config.language_detection.early_exit_margin,
+            batch_max_size=config.language_detection.batch_max_size,
+            batch_max_latency_ms=(
+                config.language_detection.batch_max_latency_ms
+            ),
+            streaming_batch_size=config.training.streaming_batch_size,
+            hashing_features=config.training.hashing_features,
+            shuffle_buffer_size=config.training.shuffle_buffer_size,
         )
     )
 
@@ -126,9 +255,44 @@ class ApplicationContainer(containers.DeclarativeContainer):
             text_document_service=text_document_service,
             s3_service=s3_service,
             report_generation_service=report_generation_service,
+            process_pool=process_pool,
+            early_exit_chunk_size=(
+                config.language_detection.early_exit_chunk_size
+            ),
+            early_exit_margin=config.language_detection.early_exit_margin,
+            batch_max_size=config.language_detection.batch_max_size,
+            batch_max_latency_ms=(
+                config.language_detection.batch_max_latency_ms
+            ),
+            streaming_batch_size=config.training.streaming_batch_size,
+            hashing_features=config.training.hashing_features,
+            shuffle_buffer_size=config.training.shuffle_buffer_size,
         )
     )
 
+    ngram_profile_repository: Provider[
+        LanguageProfileRepository[NgramProfile]
+    ] = providers.Singleton(LanguageProfileRepository, model=NgramProfile)
+
+    ngramm_profile_method_service: Provider[NgramProfileMethodService] = (
+        providers.Singleton(
+            NgramProfileMethodService,
+            html_processing_service=html_processing_service,
+            text_document_service=text_document_service,
+            s3_service=s3_service,
+            report_generation_service=report_generation_service,
+            process_pool=process_pool,
+            ngram_profile_repository=ngram_profile_repository,
+            profile_size=config.ngramm_profile_method.profile_size,
+            batch_size=config.ngramm_profile_method.batch_size,
+            reload_interval=config.ngramm_profile_method.reload_interval,
+        )
+    )
+
+    alphabet_profile_repository: Provider[
+        LanguageProfileRepository[AlphabetProfile]
+    ] = providers.Singleton(LanguageProfileRepository, model=AlphabetProfile)
+
     alphabet_method_service: Provider[AlphabetMethodService] = (
         providers.Singleton(
             AlphabetMethodService,
@@ -136,6 +300,14 @@ class ApplicationContainer(containers.DeclarativeContainer):
             text_document_service=text_document_service,
             s3_service=s3_service,
             report_generation_service=report_generation_service,
+            process_pool=process_pool,
+            alphabet_profile_repository=alphabet_profile_repository,
+            batch_size=config.alphabet_method.batch_size,
+            reload_interval=config.alphabet_method.reload_interval,
+            early_exit_chunk_size=(
+                config.language_detection.early_exit_chunk_size
+            ),
+            early_exit_margin=config.language_detection.early_exit_margin,
         )
     )
 
@@ -0,0 +1,8 @@
+from app.service.language_profile import LanguageProfile
+
+
+class AlphabetProfile(LanguageProfile):
+    frequencies: dict[str, float]
+
+    class Settings:
+        name = "alphabet-profile"
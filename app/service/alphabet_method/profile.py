@@ -0,0 +1,197 @@
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+# Буквы с меньшей частотой в корпусе языка не входят в его профиль
+MIN_LETTER_FREQUENCY = 0.0001
+
+
+@dataclass
+class LetterStatistics:
+    """
+    Частичная статистика букв одного языка, собранная по шарду корпуса.
+    """
+
+    letter_counts: Counter = field(default_factory=Counter)
+    # Суммарная длина текстов: частоты нормируются на нее так же, как
+    # при оценке текста
+    text_length: int = 0
+    document_count: int = 0
+
+    def update(self, other: "LetterStatistics") -> None:
+        self.letter_counts.update(other.letter_counts)
+        self.text_length += other.text_length
+        self.document_count += other.document_count
+
+    def frequencies(self) -> dict[str, float]:
+        length = max(self.text_length, 1)
+        return {
+            letter: count / length
+            for letter, count in sorted(self.letter_counts.items())
+            if count / length >= MIN_LETTER_FREQUENCY
+        }
+
+
+def count_letters(
+    samples: list[tuple[Optional[str], str]],
+) -> list[dict[str, LetterStatistics]]:
+    """
+    Собирает статистику букв по языкам для шарда корпуса. Выполняется в
+    процессах ProcessPool, поэтому объявлена на уровне модуля.
+    :param samples: [(язык, текст)]
+    :return: список из одного словаря {язык: статистика}.
+    """
+    statistics = {}
+    for language, text in samples:
+        if not language:
+            continue
+        text = text.lower()
+        language_statistics = statistics.setdefault(
+            language, LetterStatistics()
+        )
+        # Counter по строке считается в C, буквы отбираем уже по ключам
+        language_statistics.letter_counts.update(
+            {
+                character: count
+                for character, count in Counter(text).items()
+                if character.isalpha()
+            }
+        )
+        language_statistics.text_length += len(text)
+        language_statistics.document_count += 1
+    return [statistics]
+
+
+@dataclass
+class AlphabetProfiles:
+    """
+    Частотные профили букв, скомпилированные в матрицу языки x буквы
+    над общим алфавитом всех языков. Гистограмма текста считается
+    целиком в NumPy, а расстояние до всех профилей - одним векторным
+    выражением. Работа на символ текста (поиск в таблице кодовых точек)
+    не зависит от числа языков: языки добавляют только строки матрицы,
+    которая умножается один раз на текст.
+    """
+
+    frequencies: dict[str, dict[str, float]]
+    languages: list[str] = field(init=False)
+    alphabet: list[str] = field(init=False)
+
+    def __post_init__(self):
+        self.languages = list(self.frequencies)
+        self.alphabet = sorted(
+            {
+                letter
+                for profile in self.frequencies.values()
+                for letter in profile
+            }
+        )
+        columns = {letter: i for i, letter in enumerate(self.alphabet)}
+
+        self._profiles = np.zeros(
+            (len(self.languages), len(self.alphabet)), dtype=np.float64
+        )
+        # Ошибка языка считается только по буквам его профиля
+        self._mask = np.zeros_like(self._profiles)
+        for row, language in enumerate(self.languages):
+            for letter, frequency in self.frequencies[language].items():
+                self._profiles[row, columns[letter]] = frequency
+                self._mask[row, columns[letter]] = 1
+
+        # Ошибка раскрывается как sum(mask * f^2) - 2 * sum(mask * p * f) +
+        # sum(mask * p^2): оценка всех языков сводится к двум умножениям
+        # матриц
+        self._weighted_profiles = self._mask * self._profiles
+        self._profile_offsets = (self._weighted_profiles * self._profiles).sum(
+            axis=1
+        )
+
+        # Кодовая точка -> номер буквы + 1; 0 - символ не из алфавита.
+        # Последний элемент ловит все кодовые точки за пределами таблицы
+        codepoints = [ord(letter) for letter in self.alphabet]
+        self._lookup = np.zeros(max(codepoints, default=0) + 2, dtype=np.intp)
+        self._lookup[codepoints] = np.arange(1, len(self.alphabet) + 1)
+
+    def letter_counts(self, texts: list[str]) -> np.ndarray:
+        """
+        Гистограммы букв алфавита для нескольких текстов за один проход
+        по их общему буферу.
+        :param texts: тексты в нижнем регистре.
+        :return: матрица тексты x буквы self.alphabet.
+        """
+        width = len(self.alphabet) + 1
+        codepoints = np.frombuffer(
+            "".join(texts).encode("utf-32-le"), dtype=np.uint32
+        )
+        letters = self._lookup[np.minimum(codepoints, len(self._lookup) - 1)]
+        rows = np.repeat(np.arange(len(texts)), [len(text) for text in texts])
+        counts = np.bincount(
+            rows * width + letters, minlength=len(texts) * width
+        )
+        return counts.reshape(len(texts), width)[:, 1:]
+
+    def errors(self, texts: list[str]) -> np.ndarray:
+        """
+        Сумма квадратов отклонений частот букв каждого текста от профиля
+        каждого языка. Частоты нормируются на полную длину текста.
+        :param texts: тексты в нижнем регистре.
+        :return: матрица тексты x языки.
+        """
+        return self.errors_from_counts(
+            self.letter_counts(texts), [len(text) for text in texts]
+        )
+
+    def errors_from_counts(
+        self, counts: np.ndarray, lengths: list[int]
+    ) -> np.ndarray:
+        """
+        То же, что errors, по уже посчитанным гистограммам букв.
+        :param counts: матрица тексты x буквы self.alphabet.
+        :param lengths: длины текстов.
+        :return: матрица тексты x языки.
+        """
+        lengths = np.maximum(lengths, 1)
+        frequencies = counts / lengths[:, None]
+        return (
+            (frequencies**2) @ self._mask.T
+            - 2 * frequencies @ self._weighted_profiles.T
+            + self._profile_offsets
+        )
+
+    def scores(self, text: str) -> dict[str, float]:
+        """
+        :param text: текст в нижнем регистре.
+        :return: {язык: ошибка}
+        """
+        return dict(zip(self.languages, self.errors([text])[0].tolist()))
+
+    def rank(self, counts: np.ndarray, length: int) -> tuple[str, float]:
+        """
+        Лучший язык по гистограмме букв и его относительный отрыв от
+        второго: (e2 - e1) / e2, где e1 и e2 - две наименьшие ошибки.
+        :param counts: гистограмма букв self.alphabet.
+        :param length: длина текста.
+        :return: (язык, отрыв от 0 до 1)
+        """
+        errors = self.errors_from_counts(counts[None, :], [length])[0]
+        best = int(errors.argmin())
+        if len(errors) < 2:
+            return self.languages[best], 1.0
+        first, second = np.partition(errors, 1)[:2]
+        # Ошибки неотрицательны, но после раскрытия квадрата могут уйти
+        # в минус на ошибку округления
+        first = max(first, 0.0)
+        margin = (second - first) / second if second > 0 else 0.0
+        return self.languages[best], float(margin)
+
+    def predict(self, texts: list[str]) -> list[str]:
+        """
+        :param texts: тексты в нижнем регистре.
+        :return: язык с наименьшей ошибкой для каждого текста.
+        """
+        if not texts:
+            return []
+        best = self.errors(texts).argmin(axis=1)
+        return [self.languages[i] for i in best.tolist()]
@@ -1,13 +1,31 @@
+import asyncio
 import copy
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
-from fastapi import File
+import numpy as np
+from fastapi import File, UploadFile
 
-from app.service.html_processing import HtmlProcessingService
+from app.service.alphabet_method.dto import AlphabetProfile
+from app.service.alphabet_method.profile import (
+    AlphabetProfiles,
+    LetterStatistics,
+    count_letters,
+)
+from app.service.html_processing import HtmlProcessingService, align_results
+from app.service.language_profile import (
+    LanguageProfileRepository,
+    ProfileReloader,
+)
 from app.service.report_generation.service import ReportGenerationService
 from app.service.s3_service import S3Service
-from app.service.text_document import TextDocument, TextDocumentService
+from app.service.text_document import (
+    TextDocument,
+    TextDocumentSample,
+    TextDocumentService,
+)
 from app.service.text_document.enums import Language
+from app.util.early_exit import EarlyExitResult, detect_early_exit
+from app.util.process_pool import ProcessPool
 
 
 @dataclass
@@ -21,7 +39,18 @@ class AlphabetMethodService:
     html_processing_service: HtmlProcessingService
     report_generation_service: ReportGenerationService
     s3_service: S3Service
+    process_pool: ProcessPool
+    alphabet_profile_repository: LanguageProfileRepository[AlphabetProfile]
+    batch_size: int = 500
+    # Как часто (в секундах) проверять, не обновились ли профили в базе
+    reload_interval: float = 30
+    # Потоковое определение: размер куска в символах и порог отрыва
+    early_exit_chunk_size: int = 4096
+    early_exit_margin: float = 0.8
     alphabet_frequencies: dict = None
+    _profiles: ProfileReloader[AlphabetProfile, AlphabetProfiles] = field(
+        init=False
+    )
 
     def __post_init__(self):
         # Определяем частотные характеристики
@@ -94,40 +123,146 @@ class AlphabetMethodService:
                 "ü": 0.0100,
             },
         }
+        # Встроенные профили используются, пока в базе нет обученных
+        self._profiles = ProfileReloader(
+            repository=self.alphabet_profile_repository,
+            compile_profiles=self._compile_profiles,
+            reload_interval=self.reload_interval,
+            profiles=AlphabetProfiles(self.alphabet_frequencies),
+        )
+
+    async def train_profiles(self) -> dict[str, int]:
+        """
+        Строит профили букв по всем документам корпуса с известным
+        языком за один проход курсором, сохраняет их и сразу загружает.
+        Профиль обученного языка заменяет встроенный, новые языки
+        добавляются к встроенным, а профили языков, которых больше нет
+        в корпусе, удаляются.
+        :return: {язык: число документов в профиле}
+        """
+        statistics = {}
+        async for batch in self.text_document_service.iterate_document_batches(
+            batch_size=self.batch_size, projection=TextDocumentSample
+        ):
+            shards = await self.process_pool.map_shards(
+                count_letters,
+                [(document.language, document.text) for document in batch],
+            )
+            for shard in shards:
+                for language, language_statistics in shard.items():
+                    statistics.setdefault(language, LetterStatistics()).update(
+                        language_statistics
+                    )
+
+        await self.alphabet_profile_repository.replace_all(
+            [
+                AlphabetProfile(
+                    language=language,
+                    frequencies=language_statistics.frequencies(),
+                    document_count=language_statistics.document_count,
+                )
+                for language, language_statistics in statistics.items()
+            ]
+        )
+        await self._profiles.get(force=True)
+        return {
+            language: language_statistics.document_count
+            for language, language_statistics in statistics.items()
+        }
+
+    def _compile_profiles(
+        self, trained: list[AlphabetProfile]
+    ) -> AlphabetProfiles:
+        return AlphabetProfiles(
+            {
+                **self.alphabet_frequencies,
+                **{
+                    profile.language: profile.frequencies
+                    for profile in trained
+                    if profile.frequencies
+                },
+            }
+        )
+
+    def _detect_early_exit(
+        self, profiles: AlphabetProfiles, text: str
+    ) -> EarlyExitResult:
+        """
+        Определяет язык по префиксу текста: гистограмма букв копится по
+        кускам, пока отрыв лучшего языка не достигнет порога.
+        """
+        counts = np.zeros(len(profiles.alphabet), dtype=np.int64)
+        length = 0
+
+        def update(chunk: str) -> tuple[str, float]:
+            nonlocal counts, length
+            counts = counts + profiles.letter_counts([chunk])[0]
+            length += len(chunk)
+            return profiles.rank(counts, length)
 
-    async def predict(self, file: File):
+        return detect_early_exit(
+            text,
+            update,
+            chunk_size=self.early_exit_chunk_size,
+            margin=self.early_exit_margin,
+        )
+
+    async def predict(self, file: File, early_exit: bool = False):
         """Predicts the language of the given
         text based on alphabet frequency."""
         file_url = await self.s3_service.upload_file(copy.deepcopy(file))
         text = await self.html_processing_service.process_file(file)
         text = text.lower()  # Приводим текст к нижнему регистру
-        text_length = len(text)
-
-        # Подсчитываем частоту букв
-        letter_counts = {}
-        for letter in text:
-            if letter.isalpha():  # Проверяем, что это буква
-                letter_counts[letter] = letter_counts.get(letter, 0) + 1
-
-        # Вычисляем относительные частоты
-        frequencies = {}
-        for letter, count in letter_counts.items():
-            frequencies[letter] = count / text_length
-
-        # Сравниваем с частотами для каждого языка
-        scores = {Language.RUSSIAN: 0, Language.GERMAN: 0}
-
-        for lang, freq_dict in self.alphabet_frequencies.items():
-            for letter, expected_freq in freq_dict.items():
-                scores[lang] += (
-                    frequencies.get(letter, 0) - expected_freq
-                ) ** 2
-
-        # Определяем язык с наименьшей ошибкой
-        predicted_language = min(scores, key=scores.get)
+
+        # Определяем язык с наименьшей ошибкой по частотам букв
+        profiles = await self._profiles.get()
+        if early_exit:
+            result = await asyncio.to_thread(
+                self._detect_early_exit, profiles, text
+            )
+            await self.text_document_service.create_document(
+                TextDocument(text=text, language=result.language)
+            )
+            return await self.report_generation_service.generate_csv_report(
+                file_url,
+                result.language,
+                bytes_examined=result.bytes_examined,
+                bytes_total=result.bytes_total,
+            )
+
+        predicted_language = (
+            await asyncio.to_thread(profiles.predict, [text])
+        )[0]
         await self.text_document_service.create_document(
             TextDocument(text=text, language=predicted_language)
         )
         return await self.report_generation_service.generate_csv_report(
             file_url, predicted_language
         )
+
+    async def predict_batch(self, files: list[UploadFile]):
+        """Predicts the language of every uploaded file or zip archive
+        entry and returns a single report."""
+        uploads, batch = await self.html_processing_service.read_batch(files)
+        file_urls = await self.s3_service.upload_files(
+            [(file.filename, content) for file, content in zip(files, uploads)]
+        )
+        texts = await self.html_processing_service.process_batch(batch)
+        texts = [None if text is None else text.lower() for text in texts]
+        parsed = [text for text in texts if text is not None]
+
+        # Одна векторная оценка для всех текстов пакета, вне цикла событий
+        profiles = await self._profiles.get()
+        predicted_languages = await asyncio.to_thread(profiles.predict, parsed)
+        await self.text_document_service.create_documents(
+            [
+                TextDocument(text=text, language=language)
+                for text, language in zip(parsed, predicted_languages)
+            ]
+        )
+        return await self.report_generation_service.generate_batch_csv_report(
+            file_urls=[file_urls[file.source] for file in batch],
+            file_names=[file.name for file in batch],
+            results=align_results(texts, predicted_languages),
+            errors=[file.error for file in batch],
+        )
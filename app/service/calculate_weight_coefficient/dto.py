@@ -0,0 +1,39 @@
+from datetime import datetime
+from typing import Optional
+
+from beanie import Document, Indexed
+from pydantic import Field
+from pymongo import ASCENDING, IndexModel
+
+
+class CorpusVersion(Document):
+    corpus: Indexed(str, unique=True)
+    version: int = 0
+
+    class Settings:
+        name = "corpus-version"
+
+
+class TfidfMaterialization(Document):
+    # Уникальность не дает двум воркерам отметить одну версию дважды
+    version: Indexed(int, unique=True)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "tfidf-materialization"
+
+
+class TfidfDocumentWeights(Document):
+    version: Indexed(int)
+    document_name: Optional[str]
+    # Пары (терм, вес) по убыванию веса, чтобы top_n читался срезом
+    terms: list[tuple[str, float]]
+
+    class Settings:
+        name = "tfidf-document-weights"
+        indexes = [
+            IndexModel(
+                [("version", ASCENDING), ("document_name", ASCENDING)],
+                unique=True,
+            ),
+        ]
@@ -0,0 +1,106 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from beanie import PydanticObjectId
+from scipy.sparse import csr_matrix
+
+from app.service.calculate_weight_coefficient.statistics import (
+    CorpusStatistics,
+)
+
+
+@dataclass
+class TfidfMatrix:
+    """
+    Матрица TF-IDF в формате CSR: строки - документы, столбцы - термы
+    словаря. Строится один раз на версию CorpusStatistics, IDF
+    применяется векторно ко всем ненулевым элементам сразу.
+    """
+
+    document_ids: list[PydanticObjectId]
+    document_names: list[Optional[str]]
+    vocabulary: np.ndarray
+    matrix: csr_matrix
+
+    @classmethod
+    def from_statistics(cls, statistics: CorpusStatistics) -> "TfidfMatrix":
+        vocabulary = list(statistics.document_frequency)
+        columns = {term: i for i, term in enumerate(vocabulary)}
+
+        document_ids = list(statistics.term_counts)
+        indptr = np.zeros(len(document_ids) + 1, dtype=np.int64)
+        indices, data = [], []
+        for row, document_id in enumerate(document_ids):
+            term_counts = statistics.term_counts[document_id]
+            indices.extend(columns[term] for term in term_counts)
+            data.extend(term_counts.values())
+            indptr[row + 1] = len(indices)
+
+        term_frequency = csr_matrix(
+            (
+                np.asarray(data, dtype=np.float64),
+                np.asarray(indices, dtype=np.int64),
+                indptr,
+            ),
+            shape=(len(document_ids), len(vocabulary)),
+        )
+        # Документная частота - число ненулевых элементов в столбце
+        document_frequency = np.bincount(
+            term_frequency.indices, minlength=len(vocabulary)
+        )
+        idf = np.log(len(document_ids) / np.maximum(document_frequency, 1))
+        term_frequency.data *= idf[term_frequency.indices]
+
+        return cls(
+            document_ids=document_ids,
+            document_names=[
+                statistics.document_names[document_id]
+                for document_id in document_ids
+            ],
+            vocabulary=np.asarray(vocabulary, dtype=object),
+            matrix=term_frequency,
+        )
+
+    def to_dict(
+        self,
+        top_n: Optional[int] = None,
+        min_score: Optional[float] = None,
+        document: Optional[str] = None,
+    ) -> dict[str, dict[str, float]]:
+        """
+        :param top_n: сколько термов с наибольшим весом вернуть на документ.
+        :param min_score: минимальный вес терма.
+        :param document: имя документа, для которого нужен результат.
+        :return: словарь {document_name: {term: tf-idf_value}}
+        """
+        return {
+            name: self.row_terms(row, top_n, min_score)
+            for row, name in enumerate(self.document_names)
+            if document is None or name == document
+        }
+
+    def row_terms(
+        self,
+        row: int,
+        top_n: Optional[int] = None,
+        min_score: Optional[float] = None,
+    ) -> dict[str, float]:
+        start, end = self.matrix.indptr[row], self.matrix.indptr[row + 1]
+        scores = self.matrix.data[start:end]
+        columns = self.matrix.indices[start:end]
+        if min_score is not None:
+            mask = scores >= min_score
+            scores, columns = scores[mask], columns[mask]
+        if top_n is not None and len(scores) > top_n:
+            # argpartition отбирает top_n за линейное время, сортируются
+            # только они
+            selected = np.argpartition(-scores, top_n - 1)[:top_n]
+            scores, columns = scores[selected], columns[selected]
+        order = np.argsort(-scores, kind="stable")
+        return dict(
+            zip(
+                self.vocabulary[columns[order]].tolist(),
+                scores[order].tolist(),
+            )
+        )
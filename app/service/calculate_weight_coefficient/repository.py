@@ -0,0 +1,102 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from beanie.operators import Inc
+from pymongo import ReplaceOne
+from pymongo.errors import DuplicateKeyError
+
+from app.service.calculate_weight_coefficient.dto import (
+    CorpusVersion,
+    TfidfDocumentWeights,
+    TfidfMaterialization,
+)
+
+CORPUS = "text-document"
+
+
+@dataclass
+class WeightCoefficientRepository:
+
+    @staticmethod
+    async def get_corpus_version() -> int:
+        corpus_version = await CorpusVersion.find_one(
+            CorpusVersion.corpus == CORPUS
+        )
+        return 0 if corpus_version is None else corpus_version.version
+
+    @staticmethod
+    async def increment_corpus_version() -> None:
+        await CorpusVersion.find_one(CorpusVersion.corpus == CORPUS).update(
+            Inc({CorpusVersion.version: 1}), upsert=True
+        )
+
+    @staticmethod
+    async def get_materialized_version() -> Optional[int]:
+        materialization = (
+            await TfidfMaterialization.find_all()
+            .sort(-TfidfMaterialization.version)
+            .first_or_none()
+        )
+        return None if materialization is None else materialization.version
+
+    @staticmethod
+    async def find_weights(
+        version: int, document_name: Optional[str] = None
+    ) -> list[TfidfDocumentWeights]:
+        query = TfidfDocumentWeights.find(
+            TfidfDocumentWeights.version == version
+        )
+        if document_name is not None:
+            query = query.find(
+                TfidfDocumentWeights.document_name == document_name
+            )
+        documents = await query.sort(+TfidfDocumentWeights.id).to_list()
+        return documents
+
+    @staticmethod
+    async def save_materialization(
+        version: int, weights: list[TfidfDocumentWeights]
+    ) -> None:
+        """
+        Записывает веса новой версии, затем отмечает ее готовой и
+        удаляет все версии, кроме двух последних: читатели, узнавшие
+        номер предыдущей версии, еще могут дочитывать ее строки.
+        Строки весов заменяются по (версия, документ), поэтому если ту
+        же версию одновременно материализуют несколько воркеров,
+        дубликатов не появляется.
+        """
+        if weights:
+            await TfidfDocumentWeights.get_motor_collection().bulk_write(
+                [
+                    ReplaceOne(
+                        {
+                            "version": document_weights.version,
+                            "document_name": document_weights.document_name,
+                        },
+                        document_weights.dict(exclude={"id"}),
+                        upsert=True,
+                    )
+                    for document_weights in weights
+                ],
+                ordered=False,
+            )
+        try:
+            await TfidfMaterialization(version=version).insert()
+        except DuplicateKeyError:
+            # Версию уже отметил другой воркер
+            pass
+        previous_version = (
+            await TfidfMaterialization.find(
+                TfidfMaterialization.version < version
+            )
+            .sort(-TfidfMaterialization.version)
+            .first_or_none()
+        )
+        if previous_version is None:
+            return
+        await TfidfDocumentWeights.find(
+            TfidfDocumentWeights.version < previous_version.version
+        ).delete()
+        await TfidfMaterialization.find(
+            TfidfMaterialization.version < previous_version.version
+        ).delete()
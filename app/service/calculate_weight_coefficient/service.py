@@ -1,44 +1,167 @@
+import asyncio
 import math
-import re
-from collections import Counter
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from itertools import takewhile
+from typing import Optional
 
+from app.service.calculate_weight_coefficient.dto import TfidfDocumentWeights
+from app.service.calculate_weight_coefficient.engine import TfidfMatrix
+from app.service.calculate_weight_coefficient.repository import (
+    WeightCoefficientRepository,
+)
+from app.service.calculate_weight_coefficient.statistics import (
+    CorpusStatistics,
+)
+from app.service.calculate_weight_coefficient.tokenizer import tokenize
 from app.service.text_document import TextDocumentService
+from app.util.etag import make_etag
+from app.util.process_pool import ProcessPool
 
 
 @dataclass
 class WeightCoefficientService:
     text_document_service: TextDocumentService
+    corpus_statistics: CorpusStatistics
+    process_pool: ProcessPool
+    weight_coefficient_repository: WeightCoefficientRepository
+    batch_size: int = 500
+    _statistics_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    _materialization: Optional[asyncio.Task] = field(default=None, init=False)
 
-    async def calculate_tfidf(self) -> dict[str, dict[str, float]]:
+    async def get_materialized_version(self) -> int:
         """
-        Рассчитывает TF-IDF для всех документов.
+        Версия материализованного TF-IDF, из которой нужно отвечать.
+        Если материализации еще нет, она строится сразу. Если корпус
+        изменился, пересчет запускается в фоне, а до его окончания
+        отдается предыдущая версия.
+        :return: номер версии корпуса, по которой посчитаны веса.
+        """
+        repository = self.weight_coefficient_repository
+        corpus_version = await repository.get_corpus_version()
+        materialized_version = await repository.get_materialized_version()
+        if materialized_version is None:
+            return await asyncio.shield(self._schedule_materialization())
+        if materialized_version < corpus_version:
+            self._schedule_materialization()
+        return materialized_version
+
+    async def read_materialized_tfidf(
+        self,
+        version: int,
+        top_n: Optional[int] = None,
+        min_score: Optional[float] = None,
+        document: Optional[str] = None,
+    ) -> dict[str, dict[str, float]]:
+        """
+        Читает материализованные веса. Термы хранятся по убыванию веса,
+        поэтому top_n и min_score сводятся к префиксу списка.
+        :param version: версия из get_materialized_version.
+        :param top_n: сколько термов с наибольшим весом вернуть на документ.
+        :param min_score: минимальный вес терма.
+        :param document: имя документа, для которого нужен результат.
         :return: словарь {document_name: {term: tf-idf_value}}
         """
-        documents = await self.text_document_service.get_all_documents()
-        total_docs_count = len(documents)
+        weights = await self.weight_coefficient_repository.find_weights(
+            version=version, document_name=document
+        )
+        tfidf_scores = {}
+        for document_weights in weights:
+            terms = document_weights.terms
+            if min_score is not None:
+                terms = list(
+                    takewhile(lambda term: term[1] >= min_score, terms)
+                )
+            if top_n is not None:
+                terms = terms[:top_n]
+            tfidf_scores[document_weights.document_name] = dict(terms)
+        return tfidf_scores
 
-        term_doc_count = Counter()
+    @staticmethod
+    def tfidf_etag(
+        version: int,
+        top_n: Optional[int] = None,
+        min_score: Optional[float] = None,
+        document: Optional[str] = None,
+    ) -> str:
+        return make_etag("tfidf", version, top_n, min_score, document)
 
-        doc_term_frequencies = {}
+    def _schedule_materialization(self) -> asyncio.Task:
+        if self._materialization is None or self._materialization.done():
+            self._materialization = asyncio.create_task(self._materialize())
+        return self._materialization
 
-        for document in documents:
-            words = self.tokenize(document.text)
-            doc_term_frequencies[document.name] = Counter(words)
-            unique_terms = set(words)
-            for term in unique_terms:
-                term_doc_count[term] += 1
+    async def _materialize(self) -> int:
+        """
+        Пересчитывает TF-IDF и сохраняет его с номером версии корпуса,
+        прочитанным до пересчета. Инкрементальные счетчики
+        corpus_statistics здесь не используются: они не знают об
+        изменениях, сделанных другими воркерами. Счетчики собираются
+        заново из MongoDB: версия увеличивается уже после записи
+        документа, и прочитанная после нее коллекция содержит все
+        изменения этой версии.
+        """
+        repository = self.weight_coefficient_repository
+        corpus_version = await repository.get_corpus_version()
+        materialized_version = await repository.get_materialized_version()
+        if (
+            materialized_version is not None
+            and materialized_version >= corpus_version
+        ):
+            return materialized_version
+        statistics = CorpusStatistics()
+        await statistics.build_from_batches(
+            self.text_document_service.iterate_document_batches(
+                batch_size=self.batch_size
+            ),
+            process_pool=self.process_pool,
+        )
+        matrix = await asyncio.to_thread(
+            TfidfMatrix.from_statistics, statistics
+        )
+        weights = await asyncio.to_thread(
+            self._build_weights, matrix, corpus_version
+        )
+        await repository.save_materialization(corpus_version, weights)
+        return corpus_version
 
-        tfidf_scores = {}
+    @staticmethod
+    def _build_weights(
+        matrix: TfidfMatrix, version: int
+    ) -> list[TfidfDocumentWeights]:
+        return [
+            TfidfDocumentWeights(
+                version=version,
+                document_name=name,
+                terms=list(terms.items()),
+            )
+            for name, terms in matrix.to_dict().items()
+        ]
 
-        for document in documents:
-            tfidf_scores[document.name] = {}
-            word_counts = doc_term_frequencies[document.name]
-            for term, count in word_counts.items():
-                tf = count
-                idf = math.log(total_docs_count / (term_doc_count[term]))
-                tfidf_scores[document.name][term] = tf * idf
-        return tfidf_scores
+    async def ensure_statistics(self) -> None:
+        """
+        Заполняет счетчики при первом обращении, читая коллекцию
+        пачками, дальше они обновляются событиями TextDocumentService.
+        """
+        if self.corpus_statistics.is_built:
+            return
+        async with self._statistics_lock:
+            if not self.corpus_statistics.is_built:
+                await self.corpus_statistics.build_from_batches(
+                    self.text_document_service.iterate_document_batches(
+                        batch_size=self.batch_size
+                    ),
+                    process_pool=self.process_pool,
+                )
+
+    @staticmethod
+    def idf(total_docs_count: int, document_frequency: int) -> float:
+        """
+        Обратная документная частота терма.
+        :param total_docs_count: число документов в коллекции.
+        :param document_frequency: число документов, содержащих терм.
+        :return: значение IDF.
+        """
+        return math.log(total_docs_count / document_frequency)
 
     @staticmethod
     def tokenize(text) -> list[str]:
@@ -47,4 +170,4 @@ class WeightCoefficientService:
         :param text: строка текста.
         :return: список термов.
         """
-        return re.findall(r"\w+", text.lower())
+        return tokenize(text)
@@ -0,0 +1,107 @@
+import asyncio
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Optional, Union
+
+from beanie import PydanticObjectId
+
+from app.service.calculate_weight_coefficient.tokenizer import (
+    count_terms,
+    tokenize,
+)
+from app.service.text_document import TextDocument, TextDocumentContent
+from app.util.process_pool import ProcessPool
+
+
+@dataclass
+class CorpusStatistics:
+    """
+    Счетчики, из которых считается TF-IDF: число вхождений термов в
+    каждый документ и число документов с каждым термом. Обновляются
+    инкрементально через события TextDocumentService, поэтому
+    коллекцию не нужно перечитывать и заново токенизировать на каждый
+    запрос.
+    """
+
+    document_names: dict[PydanticObjectId, Optional[str]] = field(
+        default_factory=dict
+    )
+    term_counts: dict[PydanticObjectId, Counter] = field(default_factory=dict)
+    document_frequency: Counter = field(default_factory=Counter)
+    is_built: bool = False
+    # Увеличивается при каждом изменении, по нему кэшируются
+    # производные структуры (см. engine.TfidfMatrix)
+    version: int = 0
+    # Захватывается на время чтения счетчиков вне цикла событий
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    async def build_from_batches(
+        self,
+        batches: AsyncIterator[list[TextDocumentContent]],
+        process_pool: ProcessPool,
+    ) -> None:
+        """
+        Заполняет счетчики, читая коллекцию пачками. Каждая пачка
+        токенизируется шардами в пуле процессов, частичные счетчики
+        сливаются здесь. Текст пачки отбрасывается сразу после
+        подсчета, поэтому память зависит от размера словаря, а не от
+        объема корпуса.
+        :param batches: пачки документов с именем и текстом.
+        :param process_pool: пул для токенизации.
+        """
+        async for documents in batches:
+            counts = await process_pool.map_shards(
+                count_terms, [document.text for document in documents]
+            )
+            async with self.lock:
+                for document, term_counts in zip(documents, counts):
+                    self.add_counts(document, term_counts)
+        self.is_built = True
+        self.version += 1
+
+    def add_document(
+        self, document: Union[TextDocument, TextDocumentContent]
+    ) -> None:
+        self.add_counts(document, Counter(tokenize(document.text)))
+
+    def add_counts(
+        self,
+        document: Union[TextDocument, TextDocumentContent],
+        term_counts: Counter,
+    ) -> None:
+        if document.id in self.term_counts:
+            self.remove_document(document.id)
+        self.document_names[document.id] = document.name
+        self.term_counts[document.id] = term_counts
+        self.document_frequency.update(term_counts.keys())
+        self.version += 1
+
+    def remove_document(self, document_id: PydanticObjectId) -> None:
+        term_counts = self.term_counts.pop(document_id, None)
+        self.document_names.pop(document_id, None)
+        if term_counts is None:
+            return
+        self.version += 1
+        self.document_frequency.subtract(term_counts.keys())
+        for term in term_counts:
+            if self.document_frequency[term] <= 0:
+                del self.document_frequency[term]
+
+    @property
+    def document_count(self) -> int:
+        return len(self.term_counts)
+
+    async def on_document_created(self, document: TextDocument) -> None:
+        async with self.lock:
+            self.add_document(document)
+
+    async def on_documents_created(
+        self, documents: list[TextDocument]
+    ) -> None:
+        async with self.lock:
+            for document in documents:
+                self.add_document(document)
+
+    async def on_document_deleted(self, document: TextDocument) -> None:
+        async with self.lock:
+            self.remove_document(document.id)
@@ -0,0 +1,21 @@
+import re
+from collections import Counter
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Преобразует текст в список слов (термов), удаляя знаки препинания.
+    :param text: строка текста.
+    :return: список термов.
+    """
+    return re.findall(r"\w+", text.lower())
+
+
+def count_terms(texts: list[str]) -> list[Counter]:
+    """
+    Считает вхождения термов в каждом тексте. Выполняется в процессах
+    ProcessPool, поэтому объявлена на уровне модуля.
+    :param texts: тексты шарда.
+    :return: счетчики термов в порядке texts.
+    """
+    return [Counter(tokenize(text)) for text in texts]
@@ -0,0 +1,30 @@
+from dataclasses import dataclass
+
+from app.service.calculate_weight_coefficient.repository import (
+    WeightCoefficientRepository,
+)
+from app.service.text_document import TextDocument
+
+
+@dataclass
+class CorpusVersionTracker:
+    """
+    Увеличивает версию корпуса в MongoDB при каждом добавлении и
+    удалении документа. По ней материализованный TF-IDF определяет, что
+    устарел. Подписчики вызываются после записи документа в MongoDB,
+    поэтому материализация, прочитавшая новую версию, видит это
+    изменение в коллекции.
+    """
+
+    weight_coefficient_repository: WeightCoefficientRepository
+
+    async def on_document_created(self, document: TextDocument) -> None:
+        await self.weight_coefficient_repository.increment_corpus_version()
+
+    async def on_documents_created(
+        self, documents: list[TextDocument]
+    ) -> None:
+        await self.weight_coefficient_repository.increment_corpus_version()
+
+    async def on_document_deleted(self, document: TextDocument) -> None:
+        await self.weight_coefficient_repository.increment_corpus_version()
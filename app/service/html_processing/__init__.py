@@ -1 +1,4 @@
-from app.service.html_processing.service import HtmlProcessingService
+from app.service.html_processing.service import (
+    HtmlProcessingService,
+    align_results,
+)
@@ -1,11 +1,135 @@
+import asyncio
+import io
+import zipfile
+import zlib
 from dataclasses import dataclass
+from typing import Optional, TypeVar
 
 from bs4 import BeautifulSoup
-from fastapi import File, HTTPException
+from fastapi import File, HTTPException, UploadFile
+
+from app.util.process_pool import ProcessPool
+
+R = TypeVar("R")
+
+
+class ArchiveLimitExceeded(ValueError):
+    pass
+
+
+class UnreadableArchive(ValueError):
+    pass
+
+
+@dataclass
+class BatchFile:
+    """
+    Файл пакетной загрузки: отдельный файл запроса или элемент
+    zip-архива.
+    """
+
+    name: str
+    content: bytes
+    # Номер загруженного файла (или архива), из которого взят файл
+    source: int
+    # Причина, по которой из файла не удалось извлечь текст
+    error: Optional[str] = None
+
+
+def parse_html_documents(
+    contents: list[bytes],
+) -> list[tuple[Optional[str], Optional[str]]]:
+    """
+    Извлекает текст из HTML-документов. Ошибка одного файла не
+    прерывает разбор остальных. Выполняется в процессах ProcessPool,
+    поэтому объявлена на уровне модуля.
+    :param contents: содержимое файлов в UTF-8.
+    :return: [(текст, None) или (None, ошибка)] в порядке contents.
+    """
+    results = []
+    for content in contents:
+        try:
+            text = HtmlProcessingService._parse_html(content.decode("utf-8"))
+        except Exception as e:
+            results.append((None, str(e)))
+        else:
+            results.append((text, None))
+    return results
+
+
+def unpack_batch(
+    uploads: list[tuple[str, bytes]],
+    max_archive_members: int,
+    max_archive_size: int,
+) -> list[BatchFile]:
+    """
+    Разворачивает zip-архивы в отдельные файлы, остальные файлы
+    оставляет как есть. Размеры элементов проверяются по заголовкам
+    архива до распаковки: zipfile не распаковывает больше, чем указано
+    в заголовке.
+    :param uploads: [(имя, содержимое)] загруженных файлов.
+    :param max_archive_members: наибольшее число файлов в архиве.
+    :param max_archive_size: наибольший суммарный размер распакованных
+            файлов архива в байтах.
+    :return: файлы пакета.
+    """
+    batch = []
+    for source, (name, content) in enumerate(uploads):
+        if not zipfile.is_zipfile(io.BytesIO(content)):
+            batch.append(BatchFile(name=name, content=content, source=source))
+            continue
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            members = [
+                info
+                for info in archive.infolist()
+                if not info.is_dir()
+                and not info.filename.startswith("__MACOSX/")
+            ]
+            if len(members) > max_archive_members:
+                raise ArchiveLimitExceeded(
+                    f"{name} contains more than "
+                    f"{max_archive_members} files"
+                )
+            if sum(info.file_size for info in members) > max_archive_size:
+                raise ArchiveLimitExceeded(
+                    f"{name} unpacks to more than {max_archive_size} bytes"
+                )
+            for info in members:
+                try:
+                    content = archive.read(info)
+                except (RuntimeError, NotImplementedError, zlib.error) as e:
+                    # Зашифрованный файл, неподдерживаемое сжатие или
+                    # поврежденные данные
+                    raise UnreadableArchive(
+                        f"Cannot read {info.filename} from {name}: {e}"
+                    )
+                batch.append(
+                    BatchFile(
+                        name=info.filename, content=content, source=source
+                    )
+                )
+    return batch
+
+
+def align_results(
+    texts: list[Optional[str]], results: list[R]
+) -> list[Optional[R]]:
+    """
+    Расставляет результаты, посчитанные только для разобранных файлов,
+    по местам файлов пакета.
+    :param texts: тексты файлов пакета, None для файлов с ошибкой.
+    :param results: результаты для текстов, отличных от None.
+    :return: результаты в порядке texts, None для файлов с ошибкой.
+    """
+    results = iter(results)
+    return [None if text is None else next(results, None) for text in texts]
 
 
 @dataclass
 class HtmlProcessingService:
+    process_pool: ProcessPool
+    max_archive_members: int = 1000
+    max_archive_size: int = 100 * 1024 * 1024
 
     async def process_file(self, file: File) -> str:
         try:
@@ -17,6 +141,57 @@ class HtmlProcessingService:
             )
         return result
 
+    async def read_batch(
+        self, files: list[UploadFile]
+    ) -> tuple[list[bytes], list[BatchFile]]:
+        """
+        Читает файлы пакетного запроса и разворачивает zip-архивы.
+        :param files: загруженные файлы.
+        :return: содержимое загруженных файлов и файлы пакета.
+        """
+        uploads = await asyncio.gather(*(file.read() for file in files))
+        try:
+            batch = await asyncio.to_thread(
+                unpack_batch,
+                [
+                    (file.filename, content)
+                    for file, content in zip(files, uploads)
+                ],
+                max_archive_members=self.max_archive_members,
+                max_archive_size=self.max_archive_size,
+            )
+        except (zipfile.BadZipFile, UnreadableArchive) as e:
+            raise HTTPException(
+                status_code=400, detail=f"Error reading archive: {str(e)}"
+            )
+        except ArchiveLimitExceeded as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        return list(uploads), batch
+
+    async def process_batch(
+        self, batch: list[BatchFile]
+    ) -> list[Optional[str]]:
+        """
+        Извлекает текст из файлов пакета параллельно в пуле процессов.
+        Файл, который не удалось разобрать, не прерывает пакет: его
+        текст - None, а причина записывается в BatchFile.error.
+        :param batch: файлы пакета.
+        :return: тексты в порядке batch.
+        """
+        try:
+            results = await self.process_pool.map_shards(
+                parse_html_documents, [file.content for file in batch]
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=500, detail=f"Error processing file: {str(e)}"
+            )
+        texts = []
+        for file, (text, error) in zip(batch, results):
+            file.error = error
+            texts.append(text)
+        return texts
+
     @staticmethod
     def _parse_html(html_content: str) -> str:
         """
@@ -0,0 +1,3 @@
+from app.service.language_profile.dto import LanguageProfile
+from app.service.language_profile.reloader import ProfileReloader
+from app.service.language_profile.repository import LanguageProfileRepository
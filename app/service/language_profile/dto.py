@@ -0,0 +1,16 @@
+from datetime import datetime
+
+from beanie import Document, Indexed
+from pydantic import Field
+
+
+class LanguageProfile(Document):
+    """
+    Общие поля обученных профилей языков. Каждый способ определения
+    языка наследует модель, добавляя свое содержимое профиля, и хранит
+    профили в своей коллекции.
+    """
+
+    language: Indexed(str, unique=True)
+    document_count: int
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
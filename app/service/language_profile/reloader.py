@@ -0,0 +1,52 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Generic, Optional, TypeVar
+
+from app.service.language_profile.repository import (
+    LanguageProfileRepository,
+    P,
+)
+
+C = TypeVar("C")
+
+
+@dataclass
+class ProfileReloader(Generic[P, C]):
+    """
+    Держит в памяти профили языков, скомпилированные функцией compile_profiles,
+    и подгружает их заново, если они изменились в базе. База
+    опрашивается не чаще раза в reload_interval секунд; новые профили
+    компилируются в потоке и подменяют старые одним присваиванием.
+    """
+
+    repository: LanguageProfileRepository[P]
+    compile_profiles: Callable[[list[P]], C]
+    reload_interval: float = 30
+    # Профили до первой загрузки из базы
+    profiles: Optional[C] = None
+    _updated_at: Optional[datetime] = field(default=None, init=False)
+    _checked_at: float = field(default=float("-inf"), init=False)
+    _lock: asyncio.Lock = field(default_factory=asyncio.Lock, init=False)
+
+    async def get(self, force: bool = False) -> Optional[C]:
+        """
+        :param force: проверить базу, не дожидаясь reload_interval.
+        :return: актуальные профили.
+        """
+        now = time.monotonic()
+        if force or now - self._checked_at >= self.reload_interval:
+            async with self._lock:
+                if force or now - self._checked_at >= self.reload_interval:
+                    self._checked_at = now
+                    await self._reload()
+        return self.profiles
+
+    async def _reload(self) -> None:
+        updated_at = await self.repository.get_updated_at()
+        if updated_at == self._updated_at:
+            return
+        trained = await self.repository.get_all()
+        self.profiles = await asyncio.to_thread(self.compile_profiles, trained)
+        self._updated_at = updated_at
@@ -0,0 +1,48 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Generic, Optional, Type, TypeVar
+
+from beanie.operators import NotIn
+
+from app.service.language_profile.dto import LanguageProfile
+
+P = TypeVar("P", bound=LanguageProfile)
+
+
+@dataclass
+class LanguageProfileRepository(Generic[P]):
+    model: Type[P]
+
+    async def get_all(self) -> list[P]:
+        profiles = await self.model.find_all().to_list()
+        return profiles
+
+    async def get_updated_at(self) -> Optional[datetime]:
+        profile = (
+            await self.model.find_all()
+            .sort(-self.model.updated_at)
+            .first_or_none()
+        )
+        return None if profile is None else profile.updated_at
+
+    async def replace_all(self, profiles: list[P]) -> None:
+        """
+        Сохраняет профили вместо прежних и удаляет профили языков,
+        которых больше нет среди profiles. Удаление идет первым: тогда
+        последнее изменение updated_at происходит после всех остальных,
+        и читатель, увидевший его, видит и итоговый набор профилей.
+        :param profiles: новые профили, по одному на язык.
+        """
+        await self.model.find(
+            NotIn(
+                self.model.language,
+                [profile.language for profile in profiles],
+            )
+        ).delete()
+        for profile in profiles:
+            existing = await self.model.find_one(
+                self.model.language == profile.language
+            )
+            if existing is not None:
+                profile.id = existing.id
+            await profile.save()
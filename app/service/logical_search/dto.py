@@ -0,0 +1,13 @@
+from datetime import datetime
+
+from beanie import Document, Indexed
+from pydantic import Field
+
+
+class QueryTranslation(Document):
+    query: Indexed(str, unique=True)
+    expression: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "query-translation"
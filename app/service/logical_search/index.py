@@ -0,0 +1,156 @@
+import asyncio
+import bisect
+from dataclasses import dataclass, field
+from typing import AbstractSet, AsyncIterator, Iterator, Optional
+
+from beanie import PydanticObjectId
+
+from app.service.calculate_weight_coefficient.service import (
+    WeightCoefficientService,
+)
+from app.service.text_document import TextDocument, TextDocumentContent
+
+
+def term_positions(text: str) -> dict[str, list[int]]:
+    """
+    Токенизирует текст и собирает позиции каждого терма.
+    :param text: строка текста.
+    :return: словарь {term: [номера токенов]}
+    """
+    positions = {}
+    for position, term in enumerate(WeightCoefficientService.tokenize(text)):
+        positions.setdefault(term, []).append(position)
+    return positions
+
+
+@dataclass
+class InvertedIndex:
+    """
+    Позиционный инвертированный индекс документов:
+    терм -> {id документа: позиции терма в документе}.
+
+    Термы получаются той же токенизацией, что и в
+    WeightCoefficientService.tokenize. Индекс обновляется инкрементально
+    через события TextDocumentService, поэтому полный проход по
+    коллекции нужен только один раз - при первом построении.
+    """
+
+    postings: dict[str, dict[PydanticObjectId, list[int]]] = field(
+        default_factory=dict
+    )
+    document_terms: dict[PydanticObjectId, set[str]] = field(
+        default_factory=dict
+    )
+    is_built: bool = False
+    _sorted_terms: Optional[list[str]] = field(default=None, init=False)
+    # id документов, удаленных во время построения: пачка, прочитанная
+    # курсором до удаления, не должна вернуть их в индекс
+    _deleted_during_build: Optional[set[PydanticObjectId]] = field(
+        default=None, init=False
+    )
+
+    async def build(
+        self, batches: AsyncIterator[list[TextDocumentContent]]
+    ) -> None:
+        """
+        Заполняет индекс документами коллекции по пачкам. Токенизация
+        пачки выполняется в отдельном потоке, а в цикле событий в индекс
+        вставляются уже готовые позиции термов.
+        :param batches: пачки документов коллекции.
+        """
+        self._deleted_during_build = set()
+        try:
+            async for documents in batches:
+                positions = await asyncio.to_thread(
+                    lambda: [
+                        term_positions(document.text) for document in documents
+                    ]
+                )
+                for document, document_positions in zip(documents, positions):
+                    if document.id not in self._deleted_during_build:
+                        self._add_positions(document.id, document_positions)
+            self.is_built = True
+        finally:
+            self._deleted_during_build = None
+
+    def refresh(self) -> None:
+        """
+        Индекс живет только в памяти процесса, подтягивать нечего.
+        """
+
+    def add_document(self, document: TextDocument) -> None:
+        self._add_positions(document.id, term_positions(document.text))
+
+    def _add_positions(
+        self, document_id: PydanticObjectId, positions: dict[str, list[int]]
+    ) -> None:
+        if document_id in self.document_terms:
+            self.remove_document(document_id)
+        self.document_terms[document_id] = set(positions)
+        for term, offsets in positions.items():
+            if term not in self.postings:
+                self.postings[term] = {}
+                self._sorted_terms = None
+            self.postings[term][document_id] = offsets
+
+    def remove_document(self, document_id: PydanticObjectId) -> None:
+        if self._deleted_during_build is not None:
+            self._deleted_during_build.add(document_id)
+        terms = self.document_terms.pop(document_id, set())
+        for term in terms:
+            document_ids = self.postings.get(term)
+            if document_ids is None:
+                continue
+            document_ids.pop(document_id, None)
+            if not document_ids:
+                del self.postings[term]
+                self._sorted_terms = None
+
+    def lookup(self, term: str) -> AbstractSet[PydanticObjectId]:
+        """
+        Возвращает множество id документов, содержащих терм.
+        :param term: терм в нижнем регистре.
+        :return: множество id документов.
+        """
+        return self.postings.get(term, {}).keys()
+
+    def positions(self, term: str, document_id: PydanticObjectId) -> list[int]:
+        return self.postings.get(term, {}).get(document_id, [])
+
+    def term_frequency(self, term: str, document_id: PydanticObjectId) -> int:
+        return len(self.positions(term, document_id))
+
+    def terms_with_prefix(self, prefix: str) -> Iterator[str]:
+        """
+        Перебирает термы словаря, начинающиеся с prefix, бинарным
+        поиском по отсортированному списку термов. Список пересобирается
+        только после появления или исчезновения термов.
+        """
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self.postings)
+        start = bisect.bisect_left(self._sorted_terms, prefix)
+        for term in self._sorted_terms[start:]:
+            if not term.startswith(prefix):
+                break
+            yield term
+
+    def document_frequency(self, term: str) -> int:
+        return len(self.postings.get(term, ()))
+
+    def all_documents(self) -> set[PydanticObjectId]:
+        return set(self.document_terms)
+
+    def document_count(self) -> int:
+        return len(self.document_terms)
+
+    async def on_document_created(self, document: TextDocument) -> None:
+        self.add_document(document)
+
+    async def on_documents_created(
+        self, documents: list[TextDocument]
+    ) -> None:
+        for document in documents:
+            self.add_document(document)
+
+    async def on_document_deleted(self, document: TextDocument) -> None:
+        self.remove_document(document.id)
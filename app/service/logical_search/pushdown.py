@@ -0,0 +1,100 @@
+import re
+from typing import Optional
+
+from app.service.logical_search.query import (
+    And,
+    Near,
+    Not,
+    Or,
+    Phrase,
+    QueryNode,
+    Term,
+    Wildcard,
+)
+
+# Граница слова, совместимая с токенизацией \w+ в Python: \w в регулярных
+# выражениях MongoDB без флага UCP совпадает только с ASCII-символами
+WORD_CHAR = r"[\p{L}\p{M}\p{N}_]"
+NON_WORD_CHAR = r"[^\p{L}\p{M}\p{N}_]"
+
+
+def to_mongo_filter(node: QueryNode) -> tuple[Optional[dict], bool]:
+    """
+    Переводит план запроса в фильтр MongoDB по полю text.
+
+    Если какой-то узел не выражается фильтром, возвращается более
+    широкий фильтр (или None - без фильтра), а признак exact
+    становится False: тогда найденные документы нужно дополнительно
+    проверить планом в памяти.
+    :param node: Корневой узел плана
+    :return: (фильтр или None, фильтр точно соответствует запросу)
+    """
+    if isinstance(node, Term):
+        return _regex_filter(re.escape(node.term)), True
+
+    if isinstance(node, Wildcard):
+        if not node.pattern.strip("*"):
+            # Одни звездочки - любое непустое слово
+            return _regex_filter(f"{WORD_CHAR}+"), True
+        pattern = f"{WORD_CHAR}*".join(map(re.escape, node.pattern.split("*")))
+        return _regex_filter(pattern), True
+
+    if isinstance(node, Phrase):
+        # Соседние токены разделены только не-словесными символами
+        pattern = f"{NON_WORD_CHAR}+".join(map(re.escape, node.terms))
+        return _regex_filter(pattern), True
+
+    if isinstance(node, Near):
+        # Расстояние между словами регулярным выражением не выразить:
+        # ищем документы с обоими операндами и проверяем план в памяти
+        left, _ = to_mongo_filter(node.left)
+        right, _ = to_mongo_filter(node.right)
+        return {"$and": [left, right]}, False
+
+    if isinstance(node, Not):
+        condition, exact = to_mongo_filter(node.operand)
+        if not exact:
+            return None, False
+        return {"$nor": [condition]}, True
+
+    if isinstance(node, Or):
+        conditions = []
+        is_exact = True
+        for operand in node.operands:
+            condition, exact = to_mongo_filter(operand)
+            if condition is None:
+                return None, False
+            conditions.append(condition)
+            is_exact = is_exact and exact
+        return {"$or": conditions}, is_exact
+
+    if isinstance(node, And):
+        conditions = []
+        is_exact = True
+        for operand in node.operands:
+            condition, exact = to_mongo_filter(operand)
+            if condition is not None:
+                conditions.append(condition)
+            is_exact = is_exact and exact
+        excluded = []
+        for operand in node.excluded:
+            condition, exact = to_mongo_filter(operand)
+            if exact:
+                excluded.append(condition)
+            is_exact = is_exact and exact
+        if excluded:
+            conditions.append({"$nor": excluded})
+        if not conditions:
+            return None, False
+        return {"$and": conditions}, is_exact
+
+    return None, False
+
+
+def _regex_filter(pattern: str) -> dict:
+    return {
+        "text": {
+            "$regex": f"(^|{NON_WORD_CHAR}){pattern}({NON_WORD_CHAR}|$)",
+            "$options": "i",
+        }
+    }
@@ -0,0 +1,507 @@
+import re
+from dataclasses import dataclass
+from functools import cached_property
+from typing import (
+    AbstractSet,
+    Callable,
+    Iterable,
+    Mapping,
+    Protocol,
+    Sequence,
+    Union,
+)
+
+from beanie import PydanticObjectId
+
+DocumentIds = set[PydanticObjectId]
+
+# Позиции термов одного документа: терм -> номера токенов
+TermPositions = Mapping[str, Sequence[int]]
+
+# Вхождения терма или фразы: (номер первого токена, номер последнего)
+Spans = list[tuple[int, int]]
+
+OPERATORS = ("and", "or", "not")
+
+NEAR_OPERATOR = re.compile(r"near/(\d+)")
+
+
+class QuerySyntaxError(ValueError):
+    pass
+
+
+class SearchIndex(Protocol):
+    def lookup(self, term: str) -> AbstractSet[PydanticObjectId]: ...
+
+    def positions(
+        self, term: str, document_id: PydanticObjectId
+    ) -> Sequence[int]: ...
+
+    def document_frequency(self, term: str) -> int: ...
+
+    def terms_with_prefix(self, prefix: str) -> Iterable[str]: ...
+
+    def all_documents(self) -> DocumentIds: ...
+
+    def document_count(self) -> int: ...
+
+
+@dataclass(frozen=True)
+class Term:
+    term: str
+
+    def cost(self, index: SearchIndex) -> int:
+        return index.document_frequency(self.term)
+
+    def evaluate(self, index: SearchIndex) -> AbstractSet[PydanticObjectId]:
+        return index.lookup(self.term)
+
+    def candidates(self, index: SearchIndex) -> DocumentIds:
+        return set(index.lookup(self.term))
+
+    def spans(self, positions: Callable[[str], Sequence[int]]) -> Spans:
+        return [(position, position) for position in positions(self.term)]
+
+    def matches(self, positions: TermPositions) -> bool:
+        return self.term in positions
+
+
+@dataclass(frozen=True)
+class Wildcard:
+    """
+    Шаблон терма со звездочками: `футбол*` - все термы с префиксом
+    `футбол`, `ф*бол` - любые символы слова на месте звездочки.
+    Шаблон раскрывается по отсортированному словарю индекса, постинги
+    найденных термов объединяются.
+    """
+
+    pattern: str
+
+    @property
+    def prefix(self) -> str:
+        return self.pattern.split("*", 1)[0]
+
+    @cached_property
+    def regex(self) -> re.Pattern:
+        return re.compile(r"\w*".join(map(re.escape, self.pattern.split("*"))))
+
+    def expand(self, index: SearchIndex) -> list[str]:
+        return [
+            term
+            for term in index.terms_with_prefix(self.prefix)
+            if self.regex.fullmatch(term)
+        ]
+
+    def cost(self, index: SearchIndex) -> int:
+        return sum(
+            index.document_frequency(term) for term in self.expand(index)
+        )
+
+    def evaluate(self, index: SearchIndex) -> DocumentIds:
+        result = set()
+        for term in self.expand(index):
+            result |= index.lookup(term)
+        return result
+
+    def matches(self, positions: TermPositions) -> bool:
+        return any(self.regex.fullmatch(term) for term in positions)
+
+
+@dataclass(frozen=True)
+class Phrase:
+    """
+    Термы, идущие в документе подряд. Совпадения ищутся слиянием
+    позиционных списков, текст документа не просматривается.
+    """
+
+    terms: tuple[str, ...]
+
+    def cost(self, index: SearchIndex) -> int:
+        return min(index.document_frequency(term) for term in self.terms)
+
+    def evaluate(self, index: SearchIndex) -> DocumentIds:
+        return {
+            document_id
+            for document_id in self.candidates(index)
+            if self.spans(lambda term: index.positions(term, document_id))
+        }
+
+    def candidates(self, index: SearchIndex) -> DocumentIds:
+        # Документы, содержащие все термы фразы, начиная с самого редкого
+        terms = sorted(self.terms, key=index.document_frequency)
+        result = set(index.lookup(terms[0]))
+        for term in terms[1:]:
+            if not result:
+                break
+            result &= index.lookup(term)
+        return result
+
+    def spans(self, positions: Callable[[str], Sequence[int]]) -> Spans:
+        starts = set(positions(self.terms[0]))
+        for offset, term in enumerate(self.terms[1:], start=1):
+            if not starts:
+                break
+            starts &= {position - offset for position in positions(term)}
+        length = len(self.terms) - 1
+        return [(start, start + length) for start in sorted(starts)]
+
+    def matches(self, positions: TermPositions) -> bool:
+        return bool(self.spans(lambda term: positions.get(term, ())))
+
+
+@dataclass(frozen=True)
+class Near:
+    """
+    Два терма или фразы, между которыми не больше distance токенов
+    (distance=1 - соседние токены), в любом порядке.
+    """
+
+    left: Union[Term, Phrase]
+    right: Union[Term, Phrase]
+    distance: int
+
+    def cost(self, index: SearchIndex) -> int:
+        return min(self.left.cost(index), self.right.cost(index))
+
+    def evaluate(self, index: SearchIndex) -> DocumentIds:
+        candidates = self.left.candidates(index)
+        if candidates:
+            candidates &= self.right.candidates(index)
+        return {
+            document_id
+            for document_id in candidates
+            if self._is_near(lambda term: index.positions(term, document_id))
+        }
+
+    def matches(self, positions: TermPositions) -> bool:
+        return self._is_near(lambda term: positions.get(term, ()))
+
+    def _is_near(self, positions: Callable[[str], Sequence[int]]) -> bool:
+        left, right = self.left.spans(positions), self.right.spans(positions)
+        i = j = 0
+        while i < len(left) and j < len(right):
+            (left_start, left_end), (right_start, right_end) = (
+                left[i],
+                right[j],
+            )
+            if left_end < right_start:
+                gap = right_start - left_end
+            elif right_end < left_start:
+                gap = left_start - right_end
+            else:
+                gap = 0
+            if gap <= self.distance:
+                return True
+            # Сдвигаем то вхождение, которое заканчивается раньше:
+            # следующие вхождения другого списка от него только дальше
+            if left_end < right_end:
+                i += 1
+            else:
+                j += 1
+        return False
+
+
+@dataclass(frozen=True)
+class Not:
+    operand: "QueryNode"
+
+    def cost(self, index: SearchIndex) -> int:
+        return index.document_count()
+
+    def evaluate(self, index: SearchIndex) -> DocumentIds:
+        return index.all_documents() - self.operand.evaluate(index)
+
+    def matches(self, positions: TermPositions) -> bool:
+        return not self.operand.matches(positions)
+
+
+@dataclass(frozen=True)
+class And:
+    """
+    Пересечение n операндов. Отрицания вынесены в отдельный список и
+    применяются разностью к уже отобранным документам, поэтому
+    дополнение ко всей коллекции не строится.
+    """
+
+    operands: tuple["QueryNode", ...]
+    excluded: tuple["QueryNode", ...] = ()
+
+    def cost(self, index: SearchIndex) -> int:
+        if not self.operands:
+            return index.document_count()
+        return min(operand.cost(index) for operand in self.operands)
+
+    def evaluate(self, index: SearchIndex) -> DocumentIds:
+        # Самые селективные операнды первыми: промежуточное
+        # пересечение сразу получается маленьким
+        operands = sorted(self.operands, key=lambda node: node.cost(index))
+        if operands:
+            result = set(operands[0].evaluate(index))
+        else:
+            result = index.all_documents()
+        for operand in operands[1:]:
+            if not result:
+                return result
+            result &= operand.evaluate(index)
+        for operand in self.excluded:
+            if not result:
+                return result
+            result -= operand.evaluate(index)
+        return result
+
+    def matches(self, positions: TermPositions) -> bool:
+        return all(
+            operand.matches(positions) for operand in self.operands
+        ) and not any(operand.matches(positions) for operand in self.excluded)
+
+
+@dataclass(frozen=True)
+class Or:
+    operands: tuple["QueryNode", ...]
+
+    def cost(self, index: SearchIndex) -> int:
+        return sum(operand.cost(index) for operand in self.operands)
+
+    def evaluate(self, index: SearchIndex) -> DocumentIds:
+        # Самые широкие операнды первыми: если они уже покрывают всю
+        # коллекцию, остальные можно не вычислять
+        operands = sorted(
+            self.operands, key=lambda node: node.cost(index), reverse=True
+        )
+        total = index.document_count()
+        result = set()
+        for operand in operands:
+            result |= operand.evaluate(index)
+            if len(result) == total:
+                break
+        return result
+
+    def matches(self, positions: TermPositions) -> bool:
+        return any(operand.matches(positions) for operand in self.operands)
+
+
+QueryNode = Union[Term, Wildcard, Phrase, Near, Not, And, Or]
+
+
+def positive_terms(
+    node: QueryNode, index: SearchIndex, negated: bool = False
+) -> set[str]:
+    """
+    Собирает термы, которые должны присутствовать в найденных
+    документах, то есть не стоят под отрицанием. Шаблоны раскрываются
+    по словарю индекса.
+    """
+    if negated and isinstance(node, (Term, Wildcard, Phrase)):
+        return set()
+    if isinstance(node, Term):
+        return {node.term}
+    if isinstance(node, Wildcard):
+        return set(node.expand(index))
+    if isinstance(node, Phrase):
+        return set(node.terms)
+    if isinstance(node, Near):
+        return positive_terms(node.left, index, negated) | positive_terms(
+            node.right, index, negated
+        )
+    if isinstance(node, Not):
+        return positive_terms(node.operand, index, not negated)
+    terms = set()
+    for operand in node.operands:
+        terms |= positive_terms(operand, index, negated)
+    if isinstance(node, And):
+        for operand in node.excluded:
+            terms |= positive_terms(operand, index, not negated)
+    return terms
+
+
+def normalize_query(query: str) -> str:
+    """
+    Приводит запрос к каноническому виду, используемому как ключ
+    кэша планов: нижний регистр и одиночные пробелы.
+    """
+    return " ".join(query.lower().split())
+
+
+def tokenize(query: str) -> list[str]:
+    """
+    Разбивает строку с логическими AND, OR, NOT на токены. Фразы в
+    двойных кавычках, операторы NEAR/k и шаблоны со звездочками
+    остаются одним токеном.
+    :param query: строка с логическими AND, OR, NOT
+    :return: список токенов
+    """
+    return re.findall(r'"[^"]*"|\(|\)|near/\d+|[\w*]+', query.lower())
+
+
+def parse(tokens: list[str], strict: bool = False) -> Union[str, tuple]:
+    """
+    Разбирает список токенов и создает дерево выражений
+    с логическими операторами `AND`, `OR`, `NOT` и `NEAR/k`.
+    NEAR связывает сильнее AND и OR, его операндами могут быть только
+    слова и фразы. Слово со звездочками (`футбол*`) - шаблон терма.
+
+    Пример:
+        tokens =
+        ['not','football','and','(','basketball','or','volleyball',')']
+
+        Результат:
+        ('and', ('not', 'football'), ('or', 'basketball', 'volleyball'))
+
+        tokens = ['"real madrid"', 'near/3', 'final']
+
+        Результат:
+        ('near', ('phrase', ('real', 'madrid')), 'final', 3)
+    :param tokens: Список токенов, содержащий логическое
+            выражение в виде строк.
+    :param strict: Если True, выражение должно быть разобрано целиком:
+            незакрытые скобки, пропущенные операторы и лишние токены
+            приводят к QuerySyntaxError.
+    :return: Дерево логического выражения, где каждый оператор
+     и операнд представлен как строка или вложенный кортеж.
+    """
+    position = 0
+
+    def expect(token: str) -> None:
+        nonlocal position
+        if position < len(tokens) and tokens[position] == token:
+            position += 1
+        elif strict:
+            raise QuerySyntaxError(f"Expected {token!r} at {position}")
+
+    def parse_primary():
+        nonlocal position
+        if position >= len(tokens):
+            raise QuerySyntaxError("Unexpected end of query")
+        token = tokens[position]
+        position += 1
+        if token == "(":
+            # Разбираем подвыражение в скобках
+            expr = parse_and_or()
+            expect(")")
+            return expr
+        elif token == "not":
+            # NOT - унарный оператор, который
+            # применяется к следующему выражению
+            return "not", parse_primary()
+        elif token.startswith('"'):
+            # Фраза в кавычках
+            words = tuple(re.findall(r"\w+", token))
+            if not words:
+                raise QuerySyntaxError(f"Empty phrase at {position - 1}")
+            return words[0] if len(words) == 1 else ("phrase", words)
+        elif strict and (
+            token == ")"
+            or token in OPERATORS
+            or NEAR_OPERATOR.fullmatch(token)
+        ):
+            raise QuerySyntaxError(f"Unexpected {token!r} at {position - 1}")
+        else:
+            # Обычное слово
+            return token
+
+    def parse_near():
+        nonlocal position
+        left = parse_primary()
+        while position < len(tokens) and (
+            near := NEAR_OPERATOR.fullmatch(tokens[position])
+        ):
+            position += 1
+            right = parse_primary()
+            if not _is_near_operand(left) or not _is_near_operand(right):
+                raise QuerySyntaxError(
+                    "NEAR operands must be words or phrases"
+                )
+            left = ("near", left, right, int(near.group(1)))
+        return left
+
+    def parse_and_or():
+        nonlocal position
+        left = parse_near()
+        while position < len(tokens) and tokens[position] in ("and", "or"):
+            operator = tokens[position]
+            position += 1
+            right = parse_near()
+            left = (operator, left, right)
+        return left
+
+    expr = parse_and_or()
+    if strict and position < len(tokens):
+        raise QuerySyntaxError(f"Unexpected {tokens[position]!r}")
+    return expr
+
+
+def _is_near_operand(expr: Union[str, tuple]) -> bool:
+    if isinstance(expr, str):
+        return "*" not in expr
+    return expr[0] == "phrase"
+
+
+def is_boolean_query(query: str) -> bool:
+    """
+    Проверяет, является ли строка корректным логическим выражением,
+    которое можно выполнить без перевода с естественного языка.
+    """
+    try:
+        parse(tokenize(query), strict=True)
+    except QuerySyntaxError:
+        return False
+    return True
+
+
+def compile_expression(expr: Union[str, tuple]) -> QueryNode:
+    """
+    Превращает дерево разбора в план вычисления: цепочки одинаковых
+    бинарных AND/OR схлопываются в один n-арный узел, двойные
+    отрицания и повторяющиеся операнды убираются, а отрицания внутри
+    AND становятся разностью множеств.
+    :param expr: Дерево логического выражения, результат parse
+    :return: Корневой узел плана
+    """
+    if isinstance(expr, str):
+        return Wildcard(expr) if "*" in expr else Term(expr)
+
+    operator = expr[0]
+    if operator == "phrase":
+        return Phrase(expr[1])
+    if operator == "near":
+        return Near(
+            left=compile_expression(expr[1]),
+            right=compile_expression(expr[2]),
+            distance=expr[3],
+        )
+    if operator == "not":
+        operand = compile_expression(expr[1])
+        if isinstance(operand, Not):
+            return operand.operand
+        return Not(operand)
+
+    operands = []
+    for child in _flatten(expr, operator):
+        node = compile_expression(child)
+        if node not in operands:
+            operands.append(node)
+    if len(operands) == 1:
+        return operands[0]
+    if operator == "or":
+        return Or(tuple(operands))
+    return And(
+        operands=tuple(node for node in operands if not isinstance(node, Not)),
+        excluded=tuple(
+            node.operand for node in operands if isinstance(node, Not)
+        ),
+    )
+
+
+def _flatten(expr: tuple, operator: str) -> list[Union[str, tuple]]:
+    if isinstance(expr, tuple) and expr[0] == operator:
+        return _flatten(expr[1], operator) + _flatten(expr[2], operator)
+    return [expr]
+
+
+def compile_query(query: str) -> QueryNode:
+    """
+    Токенизирует, разбирает и компилирует строку запроса в план.
+    :param query: строка с логическими AND, OR, NOT
+    :return: Корневой узел плана
+    """
+    return compile_expression(parse(tokenize(query)))
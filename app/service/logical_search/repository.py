@@ -0,0 +1,28 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from app.service.logical_search.dto import QueryTranslation
+
+
+@dataclass
+class QueryTranslationRepository:
+
+    @staticmethod
+    async def find_by_query(query: str) -> Optional[QueryTranslation]:
+        translation = await QueryTranslation.find_one(
+            QueryTranslation.query == query
+        )
+        return translation
+
+    @staticmethod
+    async def save(query: str, expression: str) -> None:
+        translation = await QueryTranslation.find_one(
+            QueryTranslation.query == query
+        )
+        if translation is None:
+            translation = QueryTranslation(query=query, expression=expression)
+        else:
+            translation.expression = expression
+            translation.created_at = datetime.utcnow()
+        await translation.save()
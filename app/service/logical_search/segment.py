@@ -0,0 +1,286 @@
+import bisect
+import mmap
+import os
+import struct
+from typing import Iterable, Iterator, Mapping, Optional, Sequence
+
+from beanie import PydanticObjectId
+
+from app.util.cache import LRUCache
+
+Postings = Mapping[str, Mapping[PydanticObjectId, Sequence[int]]]
+
+MAGIC = b"LSEG"
+VERSION = 1
+
+# magic, версия, число документов, число термов, смещения таблицы
+# документов, таблицы смещений термов, таблицы смещений постингов,
+# блока термов и блока постингов
+HEADER = struct.Struct("<4sIIIQQQQQ")
+OFFSET = struct.Struct("<Q")
+OBJECT_ID_SIZE = 12
+
+
+def encode_varint(value: int, out: bytearray) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varint(buffer, offset: int) -> tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = buffer[offset]
+        offset += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, offset
+        shift += 7
+
+
+def write_segment(
+    path: str, document_ids: Iterable[PydanticObjectId], postings: Postings
+) -> None:
+    """
+    Записывает неизменяемый сегмент индекса.
+
+    Формат: заголовок, отсортированная таблица id документов (по 12
+    байт), таблица смещений термов, таблица смещений постингов,
+    отсортированные термы в UTF-8 и постинги. Постинг терма - это
+    varint-последовательность: число документов, затем для каждого
+    документа дельта номера документа, число позиций и дельты позиций.
+    :param path: путь к файлу сегмента.
+    :param document_ids: id всех документов сегмента, в том числе
+            документов без термов.
+    :param postings: {term: {document_id: [позиции]}}
+    """
+    document_ids = sorted(set(document_ids))
+    numbers = {document_id: i for i, document_id in enumerate(document_ids)}
+    # Порядок байт UTF-8 совпадает с порядком кодовых точек, поэтому
+    # бинарный поиск можно вести прямо по байтам
+    terms = sorted(term.encode("utf-8") for term in postings)
+
+    term_offsets, postings_offsets = bytearray(), bytearray()
+    terms_blob, postings_blob = bytearray(), bytearray()
+    for term in terms:
+        term_offsets += OFFSET.pack(len(terms_blob))
+        postings_offsets += OFFSET.pack(len(postings_blob))
+        terms_blob += term
+
+        documents = sorted(
+            (numbers[document_id], positions)
+            for document_id, positions in postings[
+                term.decode("utf-8")
+            ].items()
+        )
+        encode_varint(len(documents), postings_blob)
+        previous_number = 0
+        for number, positions in documents:
+            encode_varint(number - previous_number, postings_blob)
+            encode_varint(len(positions), postings_blob)
+            previous_number = number
+            previous_position = 0
+            for position in positions:
+                encode_varint(position - previous_position, postings_blob)
+                previous_position = position
+    term_offsets += OFFSET.pack(len(terms_blob))
+    postings_offsets += OFFSET.pack(len(postings_blob))
+
+    document_table = b"".join(
+        document_id.binary for document_id in document_ids
+    )
+    sections = [document_table, term_offsets, postings_offsets, terms_blob]
+    offsets = []
+    position = HEADER.size
+    for section in sections:
+        offsets.append(position)
+        position += len(section)
+    offsets.append(position)
+
+    header = HEADER.pack(
+        MAGIC, VERSION, len(document_ids), len(terms), *offsets
+    )
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(header)
+        for section in sections:
+            file.write(section)
+        file.write(postings_blob)
+    os.replace(temporary_path, path)
+
+
+class Segment:
+    """
+    Сегмент индекса, отображенный в память через mmap. Страницы файла
+    разделяются всеми процессами, открывшими сегмент. Удаленные
+    документы отмечаются в битовой карте в отдельном файле `.del`.
+    """
+
+    def __init__(self, path: str, cache_size: int = 4096):
+        self.path = path
+        self.name = os.path.basename(path)
+        with open(path, "rb") as file:
+            self._buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic,
+            version,
+            self.document_count,
+            self.term_count,
+            self._document_table,
+            self._term_offsets,
+            self._postings_offsets,
+            self._terms,
+            self._postings,
+        ) = HEADER.unpack_from(self._buffer)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a search index segment")
+        self._cache: LRUCache[str, dict] = LRUCache(maxsize=cache_size)
+        self.load_deletions()
+
+    @property
+    def deletions_path(self) -> str:
+        return self.path + ".del"
+
+    def load_deletions(self) -> None:
+        size = (self.document_count + 7) // 8
+        try:
+            with open(self.deletions_path, "rb") as file:
+                self._deleted = bytearray(file.read().ljust(size, b"\0"))
+        except FileNotFoundError:
+            self._deleted = bytearray(size)
+        self.live_count = self.document_count - sum(
+            bin(byte).count("1") for byte in self._deleted
+        )
+        self._cache.clear()
+
+    def is_deleted(self, number: int) -> bool:
+        return bool(self._deleted[number >> 3] & (1 << (number & 7)))
+
+    def mark_deleted(self, number: int) -> None:
+        """
+        Отмечает документ удаленным и сохраняет битовую карту на диск.
+        Вызывается только под блокировкой индекса.
+        """
+        if self.is_deleted(number):
+            return
+        self._deleted[number >> 3] |= 1 << (number & 7)
+        self.live_count -= 1
+        self._cache.clear()
+        temporary_path = self.deletions_path + ".tmp"
+        with open(temporary_path, "wb") as file:
+            file.write(self._deleted)
+        os.replace(temporary_path, self.deletions_path)
+
+    def document_id(self, number: int) -> PydanticObjectId:
+        return PydanticObjectId(self._document_bytes(number))
+
+    def document_number(self, document_id: PydanticObjectId) -> Optional[int]:
+        target = document_id.binary
+        low, high = 0, self.document_count
+        while low < high:
+            middle = (low + high) // 2
+            value = self._document_bytes(middle)
+            if value < target:
+                low = middle + 1
+            elif value > target:
+                high = middle
+            else:
+                return middle
+        return None
+
+    def document_ids(self) -> Iterator[PydanticObjectId]:
+        for number in range(self.document_count):
+            if not self.is_deleted(number):
+                yield self.document_id(number)
+
+    def term(self, i: int) -> str:
+        return self._term_bytes(i).decode("utf-8")
+
+    def find_term(self, term: str) -> Optional[int]:
+        i = self.term_position(term)
+        if i < self.term_count and self._term_bytes(i) == term.encode("utf-8"):
+            return i
+        return None
+
+    def terms_with_prefix(self, prefix: str) -> Iterator[str]:
+        encoded = prefix.encode("utf-8")
+        for i in range(self.term_position(prefix), self.term_count):
+            term = self._term_bytes(i)
+            if not term.startswith(encoded):
+                break
+            yield term.decode("utf-8")
+
+    def term_position(self, term: str) -> int:
+        """
+        Позиция, на которой терм стоял бы в отсортированной таблице.
+        """
+        return bisect.bisect_left(
+            _TermTable(self), term.encode("utf-8"), 0, self.term_count
+        )
+
+    def postings(self, term: str) -> dict[PydanticObjectId, list[int]]:
+        """
+        Декодирует постинг терма без удаленных документов.
+        :param term: терм в нижнем регистре.
+        :return: {document_id: [позиции]}
+        """
+        cached = self._cache.get(term)
+        if cached is not None:
+            return cached
+        i = self.find_term(term)
+        result = {} if i is None else self._decode_postings(i)
+        self._cache.set(term, result)
+        return result
+
+    def _decode_postings(self, i: int) -> dict[PydanticObjectId, list[int]]:
+        buffer = self._buffer
+        offset = self._postings + self._offset(self._postings_offsets, i)
+        count, offset = decode_varint(buffer, offset)
+        result = {}
+        number = 0
+        for _ in range(count):
+            delta, offset = decode_varint(buffer, offset)
+            frequency, offset = decode_varint(buffer, offset)
+            number += delta
+            positions = []
+            position = 0
+            for _ in range(frequency):
+                delta, offset = decode_varint(buffer, offset)
+                position += delta
+                positions.append(position)
+            if not self.is_deleted(number):
+                result[self.document_id(number)] = positions
+        return result
+
+    def _document_bytes(self, number: int) -> bytes:
+        start = self._document_table + number * OBJECT_ID_SIZE
+        end = start + OBJECT_ID_SIZE
+        return self._buffer[start:end]
+
+    def _term_bytes(self, i: int) -> bytes:
+        start = self._terms + self._offset(self._term_offsets, i)
+        end = self._terms + self._offset(self._term_offsets, i + 1)
+        return self._buffer[start:end]
+
+    def _offset(self, table: int, i: int) -> int:
+        return OFFSET.unpack_from(self._buffer, table + i * OFFSET.size)[0]
+
+    def close(self) -> None:
+        self._buffer.close()
+
+
+class _TermTable:
+    """
+    Представление таблицы термов сегмента как последовательности байтовых
+    строк для bisect.
+    """
+
+    def __init__(self, segment: Segment):
+        self._segment = segment
+
+    def __getitem__(self, i: int) -> bytes:
+        return self._segment._term_bytes(i)
+
+    def __len__(self) -> int:
+        return self._segment.term_count
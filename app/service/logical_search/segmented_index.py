@@ -0,0 +1,421 @@
+import asyncio
+import copy
+import fcntl
+import json
+import os
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Iterator, Optional, TypeVar, Union
+
+from beanie import PydanticObjectId
+
+from app.service.logical_search.index import term_positions
+from app.service.logical_search.segment import Postings, Segment, write_segment
+from app.service.text_document import TextDocument, TextDocumentContent
+
+MANIFEST = "manifest.json"
+LOCK = "lock"
+# Сколько раз refresh() перечитывает manifest, если сегмент из него
+# успели удалить слиянием
+REFRESH_ATTEMPTS = 3
+
+T = TypeVar("T")
+
+
+@dataclass
+class SegmentedIndex:
+    """
+    Позиционный инвертированный индекс, хранящийся на диске в виде
+    неизменяемых сегментов (см. segment.py), которые отображаются в
+    память через mmap.
+
+    Все воркеры uvicorn, указывающие на один каталог, разделяют
+    страницы сегментов и после перезапуска сразу готовы к работе.
+    Каждое добавление документа пишет маленький сегмент, удаление -
+    битовую карту, а список актуальных сегментов хранится в
+    manifest.json. Изменения выполняются в отдельных потоках под
+    файловой блокировкой, поэтому не задерживают цикл событий, а
+    другие воркеры видят их при следующем refresh(). Маленькие
+    сегменты сливаются в фоне.
+    """
+
+    path: str
+    merge_factor: int = 10
+    small_segment_size: int = 1000
+    segments: dict[str, Segment] = field(default_factory=dict, init=False)
+    _built: bool = field(default=False, init=False)
+    _generation: int = field(default=-1, init=False)
+    _manifest_stamp: Optional[tuple[int, int]] = field(
+        default=None, init=False
+    )
+    _merge: Optional[asyncio.Future] = field(default=None, init=False)
+    _merge_requested: bool = field(default=False, init=False)
+    _write_lock: asyncio.Lock = field(default_factory=asyncio.Lock, init=False)
+    _all_documents: Optional[set[PydanticObjectId]] = field(
+        default=None, init=False
+    )
+
+    def __post_init__(self):
+        os.makedirs(self.path, exist_ok=True)
+        self.refresh()
+
+    @property
+    def is_built(self) -> bool:
+        return self._built
+
+    def refresh(self) -> None:
+        """
+        Перечитывает manifest.json, если его изменил этот или другой
+        процесс: открывает новые сегменты, закрывает слитые и заново
+        загружает битовые карты удалений. manifest читается без
+        блокировки, и слияние в другом процессе может удалить сегмент
+        до того, как он будет открыт. Слияние удаляет файлы только после
+        записи нового manifest, поэтому его достаточно прочитать заново.
+        """
+        for attempt in range(REFRESH_ATTEMPTS):
+            try:
+                self._refresh()
+                return
+            except FileNotFoundError:
+                self._manifest_stamp = None
+                if attempt == REFRESH_ATTEMPTS - 1:
+                    raise
+
+    def _refresh(self) -> None:
+        manifest_path = os.path.join(self.path, MANIFEST)
+        try:
+            stat = os.stat(manifest_path)
+        except FileNotFoundError:
+            return
+        stamp = (stat.st_ino, stat.st_mtime_ns)
+        if stamp == self._manifest_stamp:
+            return
+        manifest = self._read_manifest()
+        self._manifest_stamp = stamp
+        if manifest["generation"] == self._generation:
+            return
+
+        names = manifest["segments"]
+        for name in set(self.segments) - set(names):
+            self.segments.pop(name).close()
+        for name in names:
+            if name in self.segments:
+                self.segments[name].load_deletions()
+            else:
+                self.segments[name] = Segment(os.path.join(self.path, name))
+        self._built = manifest["built"]
+        self._generation = manifest["generation"]
+        self._all_documents = None
+
+    async def build(
+        self, batches: AsyncIterator[list[TextDocumentContent]]
+    ) -> None:
+        """
+        Записывает документы коллекции, которых еще нет в индексе,
+        по сегменту на пачку. Если индекс уже построил другой воркер,
+        построение прекращается.
+        :param batches: пачки документов коллекции.
+        """
+        async for documents in batches:
+            if not await self._run_locked(self._build_batch, documents):
+                return
+        await self._run_locked(self._mark_built)
+        self._schedule_merge()
+
+    async def add_document(self, document: TextDocument) -> None:
+        await self.add_documents([document])
+
+    async def add_documents(self, documents: list[TextDocument]) -> None:
+        """
+        Записывает документы одним сегментом.
+        :param documents: список документов.
+        """
+        await self._run_locked(self._add_documents, documents)
+
+    async def remove_document(self, document_id: PydanticObjectId) -> None:
+        await self._run_locked(self._remove_document, document_id)
+
+    def merge(self) -> None:
+        """
+        Сливает маленькие сегменты в один, если их накопилось не меньше
+        merge_factor. Работает с собственными копиями сегментов, поэтому
+        может выполняться в отдельном потоке.
+        """
+        with self._locked() as manifest:
+            segments = [
+                Segment(os.path.join(self.path, name))
+                for name in manifest["segments"]
+            ]
+            small = [
+                segment
+                for segment in segments
+                if segment.live_count < self.small_segment_size
+            ]
+            if len(small) < self.merge_factor:
+                for segment in segments:
+                    segment.close()
+                return
+
+            document_ids = []
+            postings = {}
+            for segment in small:
+                document_ids.extend(segment.document_ids())
+                for i in range(segment.term_count):
+                    term = segment.term(i)
+                    documents = segment.postings(term)
+                    if documents:
+                        postings.setdefault(term, {}).update(documents)
+
+            names = {segment.name for segment in small}
+            manifest["segments"] = [
+                name for name in manifest["segments"] if name not in names
+            ]
+            if document_ids:
+                manifest["segments"].append(
+                    self._write_postings(document_ids, postings)
+                )
+            for segment in segments:
+                segment.close()
+        # Файлы удаляются после записи manifest, в котором их уже нет.
+        # Другие процессы могут держать старые сегменты открытыми: после
+        # unlink отображенные страницы остаются доступны им
+        for segment in small:
+            os.unlink(segment.path)
+            if os.path.exists(segment.deletions_path):
+                os.unlink(segment.deletions_path)
+
+    def lookup(self, term: str) -> set[PydanticObjectId]:
+        result = set()
+        for segment in self.segments.values():
+            result.update(segment.postings(term))
+        return result
+
+    def positions(self, term: str, document_id: PydanticObjectId) -> list[int]:
+        for segment in self.segments.values():
+            positions = segment.postings(term).get(document_id)
+            if positions is not None:
+                return positions
+        return []
+
+    def term_frequency(self, term: str, document_id: PydanticObjectId) -> int:
+        return len(self.positions(term, document_id))
+
+    def terms_with_prefix(self, prefix: str) -> list[str]:
+        terms = set()
+        for segment in self.segments.values():
+            terms.update(segment.terms_with_prefix(prefix))
+        return sorted(terms)
+
+    def document_frequency(self, term: str) -> int:
+        return sum(
+            len(segment.postings(term)) for segment in self.segments.values()
+        )
+
+    def all_documents(self) -> set[PydanticObjectId]:
+        if self._all_documents is None:
+            self._all_documents = set()
+            for segment in self.segments.values():
+                self._all_documents.update(segment.document_ids())
+        return set(self._all_documents)
+
+    def document_count(self) -> int:
+        return sum(segment.live_count for segment in self.segments.values())
+
+    async def on_document_created(self, document: TextDocument) -> None:
+        await self.add_document(document)
+        self._schedule_merge()
+
+    async def on_documents_created(
+        self, documents: list[TextDocument]
+    ) -> None:
+        if not documents:
+            return
+        await self.add_documents(documents)
+        self._schedule_merge()
+
+    async def on_document_deleted(self, document: TextDocument) -> None:
+        await self.remove_document(document.id)
+
+    async def _run_locked(self, function: Callable[..., T], *args) -> T:
+        """
+        Выполняет изменение индекса в отдельном потоке: ожидание
+        файловой блокировки, запись сегментов, битовых карт и manifest
+        не занимают цикл событий. Изменения этого процесса выполняются
+        по очереди, в порядке вызова. Сегменты, открытые в цикле
+        событий, перечитываются уже после завершения потока.
+        """
+        async with self._write_lock:
+            result = await asyncio.to_thread(function, *args)
+        self.refresh()
+        return result
+
+    def _schedule_merge(self) -> None:
+        # Если слияние уже идет, оно проверит сегменты еще раз
+        self._merge_requested = True
+        if self._merge is None or self._merge.done():
+            loop = asyncio.get_running_loop()
+            self._merge = loop.run_in_executor(
+                None, self._merge_while_requested
+            )
+            self._merge.add_done_callback(self._merge_done)
+
+    @staticmethod
+    def _merge_done(merge: asyncio.Future) -> None:
+        # Слияние - фоновая оптимизация: ошибка не должна теряться, но
+        # следующее добавление документа запустит слияние снова
+        if merge.cancelled() or merge.exception() is None:
+            return
+        asyncio.get_running_loop().call_exception_handler(
+            {
+                "message": "Search index segment merge failed",
+                "exception": merge.exception(),
+                "future": merge,
+            }
+        )
+
+    def _merge_while_requested(self) -> None:
+        while self._merge_requested:
+            self._merge_requested = False
+            self.merge()
+
+    def _build_batch(self, documents: list[TextDocumentContent]) -> bool:
+        """
+        :return: False, если индекс уже построен.
+        """
+        positions = self._positions(documents)
+        with self._locked() as manifest, self._opened(manifest) as segments:
+            if manifest["built"]:
+                return False
+            positions = [
+                (document_id, document_positions)
+                for document_id, document_positions in positions
+                if not self._contains(segments, document_id)
+            ]
+            if positions:
+                manifest["segments"].append(self._write_positions(positions))
+            return True
+
+    def _mark_built(self) -> None:
+        with self._locked() as manifest:
+            manifest["built"] = True
+
+    def _add_documents(self, documents: list[TextDocument]) -> None:
+        positions = self._positions(documents)
+        with self._locked() as manifest, self._opened(manifest) as segments:
+            for document in documents:
+                self._delete(segments, document.id)
+            manifest["segments"].append(self._write_positions(positions))
+
+    def _remove_document(self, document_id: PydanticObjectId) -> None:
+        with self._locked() as manifest, self._opened(manifest) as segments:
+            if self._delete(segments, document_id):
+                # Изменились только битовые карты: новое поколение
+                # заставит другие процессы перечитать их
+                manifest["generation"] += 1
+
+    @staticmethod
+    def _contains(
+        segments: list[Segment], document_id: PydanticObjectId
+    ) -> bool:
+        for segment in segments:
+            number = segment.document_number(document_id)
+            if number is not None and not segment.is_deleted(number):
+                return True
+        return False
+
+    @staticmethod
+    def _delete(
+        segments: list[Segment], document_id: PydanticObjectId
+    ) -> bool:
+        """
+        :return: True, если документ был в индексе и теперь удален.
+        """
+        deleted = False
+        for segment in segments:
+            number = segment.document_number(document_id)
+            if number is not None and not segment.is_deleted(number):
+                segment.mark_deleted(number)
+                deleted = True
+        return deleted
+
+    @staticmethod
+    def _positions(
+        documents: list[Union[TextDocument, TextDocumentContent]],
+    ) -> list[tuple[PydanticObjectId, dict[str, list[int]]]]:
+        # Токенизация выполняется до захвата файловой блокировки
+        return [
+            (document.id, term_positions(document.text))
+            for document in documents
+        ]
+
+    def _write_positions(
+        self, positions: list[tuple[PydanticObjectId, dict[str, list[int]]]]
+    ) -> str:
+        postings = {}
+        for document_id, document_positions in positions:
+            for term, offsets in document_positions.items():
+                postings.setdefault(term, {})[document_id] = offsets
+        return self._write_postings(
+            [document_id for document_id, _ in positions], postings
+        )
+
+    def _write_postings(
+        self, document_ids: list[PydanticObjectId], postings: Postings
+    ) -> str:
+        name = f"{uuid.uuid4().hex}.seg"
+        write_segment(os.path.join(self.path, name), document_ids, postings)
+        return name
+
+    @contextmanager
+    def _locked(self) -> Iterator[dict]:
+        """
+        Захватывает файловую блокировку каталога индекса и отдает
+        manifest для изменения. Если manifest изменился, после выхода
+        он сохраняется с новым номером поколения: по нему другие
+        процессы перечитывают сегменты, поэтому пустые изменения его не
+        увеличивают. Блокирует поток, поэтому вызывается только вне
+        цикла событий.
+        """
+        with open(os.path.join(self.path, LOCK), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                manifest = self._read_manifest()
+                original = copy.deepcopy(manifest)
+                yield manifest
+                if manifest != original:
+                    manifest["generation"] = original["generation"] + 1
+                    self._write_manifest(manifest)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _opened(self, manifest: dict) -> Iterator[list[Segment]]:
+        """
+        Открывает собственные копии сегментов manifest для потока,
+        изменяющего индекс: сегменты self.segments принадлежат циклу
+        событий.
+        """
+        segments = [
+            Segment(os.path.join(self.path, name))
+            for name in manifest["segments"]
+        ]
+        try:
+            yield segments
+        finally:
+            for segment in segments:
+                segment.close()
+
+    def _read_manifest(self) -> dict:
+        try:
+            with open(os.path.join(self.path, MANIFEST)) as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {"generation": 0, "built": False, "segments": []}
+
+    def _write_manifest(self, manifest: dict) -> None:
+        manifest_path = os.path.join(self.path, MANIFEST)
+        temporary_path = manifest_path + ".tmp"
+        with open(temporary_path, "w") as file:
+            json.dump(manifest, file)
+        os.replace(temporary_path, manifest_path)
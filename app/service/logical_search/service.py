@@ -1,16 +1,73 @@
-import re
-from dataclasses import dataclass
+import asyncio
+import heapq
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Optional, Union
 
+from beanie import PydanticObjectId
+from fastapi import HTTPException
+
+from app.service.calculate_weight_coefficient.service import (
+    WeightCoefficientService,
+)
+from app.service.logical_search.index import InvertedIndex, term_positions
+from app.service.logical_search.pushdown import to_mongo_filter
+from app.service.logical_search.query import (
+    QueryNode,
+    QuerySyntaxError,
+    compile_query,
+    is_boolean_query,
+    normalize_query,
+    positive_terms,
+)
+from app.service.logical_search.segmented_index import SegmentedIndex
+from app.service.logical_search.translation_cache import QueryTranslationCache
 from app.service.open_ai_service import OpenAIService
-from app.service.text_document import TextDocument, TextDocumentService
+from app.service.text_document import (
+    TextDocument,
+    TextDocumentName,
+    TextDocumentService,
+)
+from app.util.cache import LRUCache
 
 
 @dataclass
 class LogicalSearchService:
     text_document_service: TextDocumentService
     open_ai_service: OpenAIService
+    search_index: Union[InvertedIndex, SegmentedIndex]
+    translation_cache: QueryTranslationCache
+    plan_cache_size: int = 1024
+    fetch_batch_size: int = 100
+    index_batch_size: int = 500
+    _index_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    _index_build: Optional[asyncio.Task] = None
+    _query_plans: LRUCache[str, QueryNode] = field(init=False)
+
+    def __post_init__(self):
+        self._query_plans = LRUCache(maxsize=self.plan_cache_size)
 
     async def _prepare_query(self, query: str) -> str:
+        """
+        Переводит запрос на естественном языке в логическое выражение.
+        Корректные логические выражения используются как есть, а
+        переводы кэшируются по нормализованному запросу.
+        :param query: запрос пользователя
+        :return: строка с логическими AND, OR, NOT
+        """
+        if is_boolean_query(query):
+            return query
+
+        key = normalize_query(query)
+        expression = await self.translation_cache.get(key)
+        if expression is not None:
+            return expression
+
+        expression = await self._translate_query(query)
+        if is_boolean_query(expression):
+            await self.translation_cache.set(key, expression)
+        return expression
+
+    async def _translate_query(self, query: str) -> str:
         query = await self.open_ai_service.getting_response_from_open_ai(
             f"i will give u a query in natural "
             f"language like 'I want to see "
@@ -24,115 +81,205 @@ class LogicalSearchService:
         )
         return query
 
-    async def search(self, query: str) -> list[TextDocument]:
+    async def search(
+        self,
+        query: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        names_only: bool = False,
+        ranked: bool = False,
+    ) -> list[Union[TextDocument, TextDocumentName]]:
         """
         Производит поиск документов, удовлетворяюших условию
         :param query: Строка с логическими AND, OR, NOT
+        :param offset: Сколько подходящих документов пропустить
+        :param limit: Максимальное число документов в ответе
+        :param names_only: Возвращать только id и имена документов
+        :param ranked: Упорядочить документы по убыванию TF-IDF
         :return: Список документов
         """
-        query = await self._prepare_query(query)
-        documents = await self._load_documents()
-        tokens = await self._tokenize(query)
-        parsed_expression = await self._parse_expression(tokens)
-
+        document_ids = await self.find_document_ids(
+            query, offset, limit, ranked
+        )
         return [
-            doc
-            for doc in documents
-            if await self._evaluate_expression(parsed_expression, doc.text)
-            is True
+            document
+            async for document in self.iter_documents(document_ids, names_only)
         ]
 
-    async def _load_documents(self) -> list[TextDocument]:
+    async def find_document_ids(
+        self,
+        query: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        ranked: bool = False,
+    ) -> list[PydanticObjectId]:
         """
-        Загрузка документов из MongoDB.
-        :return: список документов.
+        Вычисляет запрос и возвращает id документов запрошенной
+        страницы в порядке их создания или, если ranked, в порядке
+        убывания релевантности.
+        :param query: Строка с логическими AND, OR, NOT
+        :param offset: Сколько подходящих документов пропустить
+        :param limit: Максимальное число документов в ответе
+        :param ranked: Упорядочить документы по убыванию TF-IDF (пока
+                индекс строится, документы идут в порядке создания)
+        :return: Список id документов
         """
-        documents = await self.text_document_service.get_all_documents()
-        return documents
+        query = await self._prepare_query(query)
+        plan = self._compile(query)
+        self.search_index.refresh()
+        if not self.search_index.is_built:
+            # Пока индекс строится в фоне, фильтрация выполняется
+            # на стороне MongoDB. Частот термов для ранжирования еще
+            # нет, поэтому документы идут в порядке создания
+            self._schedule_index_build()
+            return await self._find_document_ids_in_mongo(plan, offset, limit)
+        if ranked:
+            return self._rank(plan, offset, limit)
 
-    async def _tokenize(self, query: str) -> list[str]:
+        document_ids = plan.evaluate(self.search_index)
+        if limit is None:
+            return sorted(document_ids)[offset:]
+        # Полная сортировка не нужна: достаточно offset + limit
+        # наименьших id
+        return heapq.nsmallest(offset + limit, document_ids)[offset:]
+
+    def _rank(
+        self, plan: QueryNode, offset: int, limit: Optional[int]
+    ) -> list[PydanticObjectId]:
         """
-        Разбивает строку с логическими AND, OR, NOT на токены
-        :param query: строка с логическими AND, OR, NOT
-        :return: список токенов
-        """
-        tokens = re.findall(r"\(|\)|\w+|AND|OR|NOT", query.lower())
-        return tokens
-
-    async def _parse_expression(
-        self, tokens: list[str]
-    ) -> tuple[str | tuple[str]]:
-        """
-        Разбирает список токенов и создает дерево выражений
-        с логическими операторами `AND`, `OR`, и `NOT`.
-
-        Пример:
-            tokens =
-            ['not','football','and','(','basketball','or','volleyball',')']
-
-            Результат:
-            ('and', ('not', 'football'), ('or', 'basketball', 'volleyball'))
-        :param tokens: Список токенов, содержащий логическое
-                выражение в виде строк.
-        :return: Дерево логического выражения, где каждый оператор
-         и операнд представлен как строка или вложенный список.
-        """
-
-        async def parse_primary():
-            token = tokens.pop(0)
-            if token == "(":
-                # Рекурсивно разбираем подвыражение в скобках
-                expr = await self._parse_expression(tokens)
-                tokens.pop(0)  # Убираем закрывающую скобку ')'
-                return expr
-            elif token == "not":
-                # NOT - унарный оператор, который
-                # применяется к следующему выражению
-                return "not", await parse_primary()
-            else:
-                # Обычное слово
-                return token
-
-        async def parse_and_or():
-            left = await parse_primary()
-            while tokens and tokens[0] in ("and", "or"):
-                operator = tokens.pop(0)
-                right = await parse_primary()
-                left = (operator, left, right)
-            return left
-
-        return await parse_and_or()
-
-    async def _evaluate_expression(self, expr, document_content: str) -> bool:
-        """
-        Рекурсивно оценивает логическое выражение для документа.
-        :param expr: Дерево логического выражения, результат
-                    self._parse_expression
-        :param document_content: Текст, к которому будет
-                    применяться логическое выражение
-        :return: True, если документ подходит под логическое выражение,
-                    иначе False
-        """
-        if isinstance(expr, str):
-            # Проверяем, есть ли слово в документе
-            return expr.lower() in document_content.lower()
-
-        if isinstance(expr, tuple):
-            operator = expr[0]
-            if operator == "not":
-                # NOT применяем к следующему выражению
-                return not await self._evaluate_expression(
-                    expr[1], document_content
-                )
-            elif operator == "and":
-                # AND применяется к двум выражениям
-                return await self._evaluate_expression(
-                    expr[1], document_content
-                ) and await self._evaluate_expression(
-                    expr[2], document_content
+        Ранжирует документы, подходящие под запрос, по сумме TF-IDF
+        термов запроса, не стоящих под отрицанием. При заданном limit
+        выбираются только offset + limit лучших документов кучей
+        ограниченного размера.
+        :param plan: план запроса
+        :param offset: Сколько подходящих документов пропустить
+        :param limit: Максимальное число документов в ответе
+        :return: Список id документов
+        """
+        document_ids = plan.evaluate(self.search_index)
+        total_docs_count = self.search_index.document_count()
+        weights = {
+            term: WeightCoefficientService.idf(
+                total_docs_count, self.search_index.document_frequency(term)
+            )
+            for term in positive_terms(plan, self.search_index)
+            if self.search_index.document_frequency(term)
+        }
+
+        def score(document_id: PydanticObjectId) -> float:
+            return sum(
+                self.search_index.term_frequency(term, document_id) * idf
+                for term, idf in weights.items()
+            )
+
+        if limit is None:
+            return sorted(document_ids, key=score, reverse=True)[offset:]
+        return heapq.nlargest(offset + limit, document_ids, key=score)[offset:]
+
+    async def _find_document_ids_in_mongo(
+        self, plan: QueryNode, offset: int, limit: Optional[int]
+    ) -> list[PydanticObjectId]:
+        """
+        Вычисляет запрос фильтром MongoDB. Если план выражается
+        фильтром не полностью, документы, прошедшие более широкий
+        фильтр, дополнительно проверяются планом в памяти.
+        :param plan: план запроса
+        :param offset: Сколько подходящих документов пропустить
+        :param limit: Максимальное число документов в ответе
+        :return: Список id документов
+        """
+        query, exact = to_mongo_filter(plan)
+        query = query or {}
+        if exact:
+            return await self.text_document_service.find_document_ids(
+                query, skip=offset, limit=limit
+            )
+
+        document_ids = []
+        skipped = 0
+        async for document in self.text_document_service.iterate_documents(
+            query
+        ):
+            if not plan.matches(term_positions(document.text)):
+                continue
+            if skipped < offset:
+                skipped += 1
+                continue
+            document_ids.append(document.id)
+            if limit is not None and len(document_ids) >= limit:
+                break
+        return document_ids
+
+    async def iter_documents(
+        self, document_ids: list[PydanticObjectId], names_only: bool = False
+    ) -> AsyncIterator[Union[TextDocument, TextDocumentName]]:
+        """
+        Загружает документы из MongoDB пачками по fetch_batch_size,
+        не держа в памяти всю выдачу целиком.
+        :param document_ids: id документов в порядке выдачи
+        :param names_only: Загружать только id и имена документов
+        :return: Асинхронный итератор документов
+        """
+        projection = TextDocumentName if names_only else None
+        for start in range(0, len(document_ids), self.fetch_batch_size):
+            end = start + self.fetch_batch_size
+            batch = document_ids[start:end]
+            documents = await self.text_document_service.get_documents_by_ids(
+                batch, projection=projection
+            )
+            # MongoDB возвращает документы в порядке id, а выдача
+            # может быть упорядочена по релевантности
+            documents_by_id = {document.id: document for document in documents}
+            for document_id in batch:
+                if document_id in documents_by_id:
+                    yield documents_by_id[document_id]
+
+    def _schedule_index_build(self) -> None:
+        """
+        Запускает построение индекса фоновой задачей, если оно еще не
+        идет. Построение читает коллекцию пачками и считает в отдельном
+        потоке, поэтому запросы продолжают обслуживаться через MongoDB.
+        Упавшее построение перезапускается следующим запросом.
+        """
+        if self._index_build is not None and not self._index_build.done():
+            return
+        if self._index_build is not None and not self._index_build.cancelled():
+            # Забираем исключение прошлой попытки, чтобы оно не
+            # считалось необработанным
+            self._index_build.exception()
+        self._index_build = asyncio.create_task(self._ensure_index())
+
+    async def _ensure_index(self) -> None:
+        """
+        Строит инвертированный индекс при первом обращении, читая
+        коллекцию курсором пачками по index_batch_size документов.
+        Дальнейшие изменения коллекции индекс получает через события
+        TextDocumentService.
+        """
+        if self.search_index.is_built:
+            return
+        async with self._index_lock:
+            if not self.search_index.is_built:
+                await self.search_index.build(
+                    self.text_document_service.iterate_document_batches(
+                        batch_size=self.index_batch_size
+                    )
                 )
-            elif operator == "or":
-                # OR применяется к двум выражениям
-                return await self._evaluate_expression(
-                    expr[1], document_content
-                ) or await self._evaluate_expression(expr[2], document_content)
+
+    def _compile(self, query: str) -> QueryNode:
+        """
+        Возвращает скомпилированный план запроса. Планы кэшируются по
+        нормализованной строке запроса, поэтому повторные запросы не
+        токенизируются и не разбираются заново.
+        :param query: строка с логическими AND, OR, NOT
+        :return: план вычисления запроса
+        """
+        key = normalize_query(query)
+        plan = self._query_plans.get(key)
+        if plan is None:
+            try:
+                plan = compile_query(key)
+            except QuerySyntaxError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            self._query_plans.set(key, plan)
+        return plan
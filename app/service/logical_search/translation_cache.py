@@ -0,0 +1,49 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Optional
+
+from app.service.logical_search.repository import QueryTranslationRepository
+from app.util.cache import LRUCache
+
+
+@dataclass
+class QueryTranslationCache:
+    """
+    Кэш переводов запросов с естественного языка в логические
+    выражения. Записи хранятся в памяти (LRU + TTL) и, если включено
+    persistent, дублируются в MongoDB, чтобы переживать перезапуски.
+    """
+
+    query_translation_repository: QueryTranslationRepository
+    maxsize: int = 10000
+    ttl: int = 86400
+    persistent: bool = False
+    _translations: LRUCache[str, str] = field(init=False)
+
+    def __post_init__(self):
+        self._translations = LRUCache(maxsize=self.maxsize, ttl=self.ttl)
+
+    async def get(self, query: str) -> Optional[str]:
+        """
+        :param query: нормализованный запрос пользователя.
+        :return: логическое выражение или None, если перевода нет.
+        """
+        expression = self._translations.get(query)
+        if expression is not None or not self.persistent:
+            return expression
+
+        translation = await self.query_translation_repository.find_by_query(
+            query
+        )
+        if translation is None or (
+            datetime.utcnow() - translation.created_at
+            > timedelta(seconds=self.ttl)
+        ):
+            return None
+        self._translations.set(query, translation.expression)
+        return translation.expression
+
+    async def set(self, query: str, expression: str) -> None:
+        self._translations.set(query, expression)
+        if self.persistent:
+            await self.query_translation_repository.save(query, expression)
@@ -0,0 +1,28 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from app.service.neural_and_ngramm_method.enums import TrainingStatus
+
+
+class TrainingJob(BaseModel):
+    id: str
+    mode: str
+    # Обучение потоком по курсору с хешированием признаков
+    streaming: bool = False
+    status: TrainingStatus = TrainingStatus.PENDING
+    epoch: int = 0
+    epochs: int
+    loss: Optional[float] = None
+    accuracy: Optional[float] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+    # Длительность в секундах: для незавершенной задачи - на момент
+    # запроса статуса
+    duration: float = 0
+    error: Optional[str] = None
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in (TrainingStatus.PENDING, TrainingStatus.RUNNING)
@@ -0,0 +1,8 @@
+from app.util.enums import StrEnum
+
+
+class TrainingStatus(StrEnum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
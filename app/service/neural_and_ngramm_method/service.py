@@ -1,20 +1,52 @@
+import asyncio
 import copy
+import multiprocessing
 import os
-from dataclasses import dataclass
+import queue
+import re
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, NamedTuple, Optional
 
 import joblib
 import numpy as np
-from fastapi import File, HTTPException
-from keras.api.layers import Dense
-from keras.api.models import Sequential, load_model
-from sklearn.feature_extraction.text import CountVectorizer
+from fastapi import File, HTTPException, UploadFile
+from keras.api.models import load_model
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer
 
-from app.service.html_processing import HtmlProcessingService
+from app.service.html_processing import HtmlProcessingService, align_results
+from app.service.neural_and_ngramm_method.dto import TrainingJob
+from app.service.neural_and_ngramm_method.enums import TrainingStatus
+from app.service.neural_and_ngramm_method.sparse import predict_sparse
+from app.service.neural_and_ngramm_method.training import (
+    train_model,
+    train_model_streaming,
+)
+from app.service.neural_and_ngramm_method.vectorization import fit_transform
 from app.service.report_generation.service import ReportGenerationService
 from app.service.s3_service import S3Service
-from app.service.text_document import TextDocument, TextDocumentService
+from app.service.text_document import (
+    TextDocument,
+    TextDocumentSample,
+    TextDocumentService,
+)
 from app.service.text_document.enums import Language
+from app.util.cache import LRUCache
+from app.util.early_exit import EarlyExitResult, detect_early_exit
 from app.util.enums import Mode
+from app.util.micro_batcher import MicroBatcher
+from app.util.process_pool import ProcessPool
+
+# Метки языков, которые различает сеть
+LANGUAGE_LABELS = {Language.RUSSIAN: 0, Language.GERMAN: 1}
+
+
+class ModelArtifacts(NamedTuple):
+    model: Any
+    vectorizer: CountVectorizer
+    # mtime файлов модели и векторизатора, из которых они загружены
+    version: Optional[tuple[int, int]]
 
 
 @dataclass
@@ -29,7 +61,42 @@ class NgrammAndNeuralMethodService:
     text_document_service: TextDocumentService
     s3_service: S3Service
     report_generation_service: ReportGenerationService
+    process_pool: ProcessPool
+    # Потоковое определение: размер куска в символах и порог отрыва
+    early_exit_chunk_size: int = 4096
+    early_exit_margin: float = 0.8
+    # Объединение одиночных предсказаний: размер пакета и сколько
+    # миллисекунд первый запрос может ждать остальных
+    batch_max_size: int = 32
+    batch_max_latency_ms: float = 5
+    training_epochs: int = 10
+    # Потоковое обучение: размер пакета курсора (он же порция model.fit),
+    # число хешированных признаков и размер буфера перемешивания
+    streaming_batch_size: int = 500
+    hashing_features: int = 2**18
+    shuffle_buffer_size: int = 10000
     vectorizer: CountVectorizer = None  # Инициализируем векторизатор как None
+    # Загруженные модель и векторизатор, общие для всех запросов процесса
+    _artifacts: Optional[ModelArtifacts] = field(default=None, init=False)
+    _artifacts_lock: asyncio.Lock = field(
+        default_factory=asyncio.Lock, init=False
+    )
+    _batcher: MicroBatcher[str, str] = field(init=False)
+    # Задачи обучения этого режима; одновременно активна только одна
+    _training_jobs: LRUCache[str, TrainingJob] = field(
+        default_factory=lambda: LRUCache(maxsize=100), init=False
+    )
+    _active_training_job: Optional[TrainingJob] = field(
+        default=None, init=False
+    )
+    _training_tasks: set[asyncio.Task] = field(default_factory=set, init=False)
+
+    def __post_init__(self):
+        self._batcher = MicroBatcher(
+            self._predict_texts,
+            max_batch_size=self.batch_max_size,
+            max_latency=self.batch_max_latency_ms / 1000,
+        )
 
     @property
     def model_path(self):
@@ -39,6 +106,10 @@ class NgrammAndNeuralMethodService:
         )
         return model_path
 
+    @property
+    def vectorizer_path(self):
+        return self.mode + "_vectorizer.joblib"
+
     async def _create_language_labels(self):
         """Creates labels for languages based on texts from the repository."""
         corpus_russian = (
@@ -65,47 +136,249 @@ class NgrammAndNeuralMethodService:
 
     async def _creating_vectors(self):
         """Creates vectors for texts using the fitted vectorizer."""
-        if self.vectorizer is None:
-            # Инициализируем векторизатор только один раз
-            self.vectorizer = (
-                CountVectorizer(analyzer="char", ngram_range=(3, 3))
-                if self.mode == Mode.NGRAMM
-                else CountVectorizer(analyzer="word")
+        # Каждое обучение получает новый векторизатор: прежний может
+        # использоваться загруженной моделью в текущих запросах
+        self.vectorizer = (
+            CountVectorizer(analyzer="char", ngram_range=(3, 3))
+            if self.mode == Mode.NGRAMM
+            else CountVectorizer(analyzer="word")
+        )
+        self.X = await fit_transform(
+            self.vectorizer, self.corpus, self.process_pool
+        )  # Обучаем векторизатор в пуле процессов
+
+    async def create_model(self, streaming: bool = False) -> TrainingJob:
+        """Starts training a neural network for language classification
+        as a background job and returns the job to poll. In streaming
+        mode the corpus is read from the cursor and never held in
+        memory. Only one job runs at a time per process: the active job
+        lives in this worker's memory, not in MongoDB."""
+        active_job = self._active_training_job
+        if active_job is not None and active_job.is_active:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Training job {active_job.id} is already running",
+            )
+        job = TrainingJob(
+            id=uuid.uuid4().hex,
+            mode=self.mode,
+            streaming=streaming,
+            epochs=self.training_epochs,
+        )
+        self._active_training_job = job
+        self._training_jobs.set(job.id, job)
+        # Ссылка на задачу хранится, пока она не завершится
+        task = asyncio.create_task(self._run_training(job))
+        self._training_tasks.add(task)
+        task.add_done_callback(self._training_tasks.discard)
+        return job
+
+    def get_training_job(self, job_id: str) -> TrainingJob:
+        job = self._training_jobs.get(job_id)
+        if job is None:
+            raise HTTPException(
+                status_code=404, detail="Training job not found"
             )
-        self.X = self.vectorizer.fit_transform(
-            self.corpus
-        )  # Обучаем векторизатор
-
-    async def create_model(self):
-        """Creates and trains a neural network for language classification."""
-        await self._create_language_labels()
-        await self._creating_vectors()
-
-        model = Sequential()
-        model.add(
-            Dense(64, input_dim=self.X.shape[1], activation="relu")
-        )  # First hidden layer
-        model.add(Dense(32, activation="relu"))  # Second hidden layer
-        model.add(Dense(1, activation="sigmoid"))  # Output layer
-
-        model.compile(
-            loss="binary_crossentropy", optimizer="adam", metrics=["accuracy"]
-        )  # Compiling the model
-
-        y = np.array(self.labels)  # Converting labels to numpy array
-        model.fit(
-            self.X.toarray(), y, epochs=10, batch_size=32
-        )  # Training the model
-        model.save(self.model_path)  # Saving the trained model
-        joblib.dump(
-            self.vectorizer, (self.mode + "_vectorizer.joblib")
-        )  # Saving the vectorizer
+        if job.is_active:
+            job.duration = (datetime.utcnow() - job.created_at).total_seconds()
+        return job
+
+    async def _run_training(self, job: TrainingJob) -> None:
+        """
+        Готовит корпус и признаки в этом процессе (векторизация идет в
+        пуле процессов), а саму сеть обучает в отдельном процессе, не
+        занимая цикл событий. После обучения новая модель подменяет
+        загруженную.
+        """
+        try:
+            if job.streaming:
+                job.status = TrainingStatus.RUNNING
+                await self._train_streaming_in_process(job)
+            else:
+                await self._create_language_labels()
+                await self._creating_vectors()
+                job.status = TrainingStatus.RUNNING
+                await self._train_in_process(job)
+            await self._get_artifacts()
+        except Exception as e:
+            job.status = TrainingStatus.FAILED
+            job.error = str(getattr(e, "detail", e))
+        else:
+            job.status = TrainingStatus.SUCCEEDED
+        finally:
+            job.finished_at = datetime.utcnow()
+            job.duration = (job.finished_at - job.created_at).total_seconds()
+
+    async def _train_in_process(self, job: TrainingJob) -> None:
+        context = multiprocessing.get_context("spawn")
+        progress = context.Queue()
+        process = context.Process(
+            target=train_model,
+            args=(
+                self.X,
+                np.array(self.labels),  # Converting labels to numpy array
+                job.epochs,
+                self.model_path,
+                self.vectorizer,
+                self.vectorizer_path,
+                progress,
+            ),
+            daemon=True,
+        )
+        process.start()
+        try:
+            await self._watch_training(job, process, progress)
+        finally:
+            await asyncio.to_thread(process.join)
+
+    def _hashing_vectorizer(self) -> HashingVectorizer:
+        """
+        Векторизатор без словаря с теми же признаками, что и
+        CountVectorizer режима: частоты без нормировки и знаков.
+        """
+        return HashingVectorizer(
+            analyzer="char" if self.mode == Mode.NGRAMM else "word",
+            ngram_range=(3, 3) if self.mode == Mode.NGRAMM else (1, 1),
+            n_features=self.hashing_features,
+            alternate_sign=False,
+            norm=None,
+            dtype=np.float32,
+        )
+
+    async def _train_streaming_in_process(self, job: TrainingJob) -> None:
+        context = multiprocessing.get_context("spawn")
+        # Очередь ограничена: курсор читается не быстрее, чем идет
+        # обучение
+        samples = context.Queue(maxsize=4)
+        progress = context.Queue()
+        process = context.Process(
+            target=train_model_streaming,
+            args=(
+                self._hashing_vectorizer(),
+                job.epochs,
+                self.streaming_batch_size,
+                self.shuffle_buffer_size,
+                self.model_path,
+                self.vectorizer_path,
+                samples,
+                progress,
+            ),
+            daemon=True,
+        )
+        process.start()
+        feeder = asyncio.create_task(self._feed_samples(job, process, samples))
+        try:
+            await self._watch_training(job, process, progress)
+        except Exception:
+            # Если упало чтение корпуса, процесс обучения остановлен им,
+            # и настоящая причина - в задаче чтения
+            if feeder.done() and not feeder.cancelled():
+                feeder.result()
+            raise
+        finally:
+            feeder.cancel()
+            await asyncio.to_thread(process.join)
+
+    async def _feed_samples(
+        self, job: TrainingJob, process: multiprocessing.Process, samples
+    ) -> None:
+        """
+        Каждую эпоху заново проходит корпус курсором и передает примеры
+        процессу обучения пакетами; None отмечает конец эпохи.
+        """
+        try:
+            for _ in range(job.epochs):
+                async for (
+                    batch
+                ) in self.text_document_service.iterate_document_batches(
+                    batch_size=self.streaming_batch_size,
+                    projection=TextDocumentSample,
+                ):
+                    labeled = [
+                        (LANGUAGE_LABELS[document.language], document.text)
+                        for document in batch
+                        if document.language in LANGUAGE_LABELS
+                    ]
+                    if labeled:
+                        await self._put_samples(process, samples, labeled)
+                await self._put_samples(process, samples, None)
+        except Exception:
+            process.terminate()
+            raise
+
+    @staticmethod
+    async def _put_samples(
+        process: multiprocessing.Process, samples, batch
+    ) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(samples.put, batch, True, 1)
+            except queue.Full:
+                if not process.is_alive():
+                    raise RuntimeError("Training process is not running")
+            else:
+                return
+
+    @staticmethod
+    async def _watch_training(
+        job: TrainingJob, process: multiprocessing.Process, progress
+    ) -> None:
+        """
+        Переносит ход обучения из очереди progress в задачу, пока
+        процесс не сообщит о завершении.
+        """
+        while True:
+            try:
+                message = await asyncio.to_thread(progress.get, True, 1)
+            except queue.Empty:
+                if not process.is_alive():
+                    raise RuntimeError(
+                        "Training process exited with code "
+                        f"{process.exitcode}"
+                    )
+                continue
+            if message["event"] == "epoch":
+                job.epoch = message["epoch"]
+                job.loss = message["loss"]
+                job.accuracy = message["accuracy"]
+            elif message["event"] == "failed":
+                raise RuntimeError(message["error"])
+            else:
+                return
+
+    def _artifacts_version(self) -> Optional[tuple[int, int]]:
+        try:
+            return (
+                os.stat(self.model_path).st_mtime_ns,
+                os.stat(self.vectorizer_path).st_mtime_ns,
+            )
+        except FileNotFoundError:
+            return None
+
+    async def _get_artifacts(self) -> ModelArtifacts:
+        """
+        Модель и векторизатор, загруженные один раз на процесс. Если
+        файлы на диске изменились (модель переобучена другим процессом),
+        они загружаются заново и подменяют прежние одним присваиванием:
+        запросы, уже получившие прежнюю пару, дорабатывают с ней.
+        """
+        version = self._artifacts_version()
+        artifacts = self._artifacts
+        if artifacts is not None and version in (None, artifacts.version):
+            return artifacts
+        async with self._artifacts_lock:
+            artifacts = self._artifacts
+            if artifacts is None or version not in (None, artifacts.version):
+                model = await self._load_model(self.model_path)
+                vectorizer = await self._load_vectorizer(self.vectorizer_path)
+                self._artifacts = ModelArtifacts(model, vectorizer, version)
+            return self._artifacts
 
     @staticmethod
     async def _load_model(path: str):
         """Loads a model from the specified path."""
         try:
-            model = load_model(path)
+            model = await asyncio.to_thread(load_model, path)
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
         else:
@@ -115,30 +388,80 @@ class NgrammAndNeuralMethodService:
     async def _load_vectorizer(path: str):
         """Loads a vectorizer from the specified path."""
         try:
-            vectorizer = joblib.load(path)
+            vectorizer = await asyncio.to_thread(joblib.load, path)
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
         else:
             return vectorizer
 
-    async def predict(self, file: File):
+    def _detect_early_exit(
+        self, model, vectorizer: CountVectorizer, text: str
+    ) -> EarlyExitResult:
+        """
+        Определяет язык по префиксу текста: счетчики признаков кусков
+        складываются, и модель оценивает накопленный вектор, пока
+        отрыв вероятностей языков |2p - 1| не достигнет порога.
+        """
+        overlap = 0
+        if vectorizer.analyzer == "char":
+            # Анализатор символов все равно схлопывает пробелы; сделав
+            # это заранее и повторяя n - 1 символ на границе кусков,
+            # получаем ровно n-граммы всего текста
+            text = re.sub(r"\s\s+", " ", text)
+            overlap = vectorizer.ngram_range[1] - 1
+        counts = None
+
+        def update(chunk: str) -> tuple[str, float]:
+            nonlocal counts
+            x_chunk = vectorizer.transform([chunk])
+            counts = x_chunk if counts is None else counts + x_chunk
+            pred = float(predict_sparse(model, counts)[0][0])
+            return ("de" if pred >= 0.5 else "ru"), abs(2 * pred - 1)
+
+        return detect_early_exit(
+            text,
+            update,
+            chunk_size=self.early_exit_chunk_size,
+            margin=self.early_exit_margin,
+            overlap=overlap,
+        )
+
+    def _predict_texts(self, texts: list[str]) -> list[str]:
+        """
+        Предсказывает языки пакета текстов одним вызовом модели.
+        Вызывается в потоке после _get_artifacts, поэтому берет
+        загруженную пару модель-векторизатор один раз на весь пакет.
+        """
+        model, vectorizer, _ = self._artifacts
+        x_new = vectorizer.transform(texts)  # Transforming all texts
+        predictions = predict_sparse(model, x_new)  # One model call
+        return [
+            "de" if pred >= 0.5 else "ru" for pred in predictions
+        ]  # Interpreting predictions
+
+    async def predict(self, file: File, early_exit: bool = False):
         """Predicts the language of the given texts."""
         file_url = await self.s3_service.upload_file(copy.deepcopy(file))
         texts = [await self.html_processing_service.process_file(file)]
-        model = await self._load_model(self.model_path)
-        vectorizer = await self._load_vectorizer(
-            self.mode + "_vectorizer.joblib"
-        )
+        model, vectorizer, _ = await self._get_artifacts()
+        if early_exit:
+            result = await asyncio.to_thread(
+                self._detect_early_exit, model, vectorizer, texts[0]
+            )
+            await self.text_document_service.create_document(
+                TextDocument(text=texts[0], language=result.language)
+            )
+            return await self.report_generation_service.generate_csv_report(
+                file_url=file_url,
+                result=result.language,
+                bytes_examined=result.bytes_examined,
+                bytes_total=result.bytes_total,
+            )
+
         languages = []
         if model and vectorizer:
-            x_new = vectorizer.transform(texts)  # Transforming the input text
-            predictions = model.predict(x_new.toarray())  # Making predictions
-
-            for pred in predictions:
-                language = (
-                    "de" if pred >= 0.5 else "ru"
-                )  # Interpreting predictions
-                languages.append(language)
+            # Конкурентные запросы объединяются в один вызов модели
+            languages.append(await self._batcher.submit(texts[0]))
             await self.text_document_service.create_document(
                 TextDocument(text=texts[0], language=languages[0])
             )
@@ -146,3 +469,30 @@ class NgrammAndNeuralMethodService:
         return await self.report_generation_service.generate_csv_report(
             file_url=file_url, result=languages[0]
         )
+
+    async def predict_batch(self, files: list[UploadFile]):
+        """Predicts the language of every uploaded file or zip archive
+        entry with a single model call and returns a single report."""
+        uploads, batch = await self.html_processing_service.read_batch(files)
+        file_urls = await self.s3_service.upload_files(
+            [(file.filename, content) for file, content in zip(files, uploads)]
+        )
+        texts = await self.html_processing_service.process_batch(batch)
+        parsed = [text for text in texts if text is not None]
+        model, vectorizer, _ = await self._get_artifacts()
+        languages = []
+        if model and vectorizer and parsed:
+            languages = await asyncio.to_thread(self._predict_texts, parsed)
+            await self.text_document_service.create_documents(
+                [
+                    TextDocument(text=text, language=language)
+                    for text, language in zip(parsed, languages)
+                ]
+            )
+
+        return await self.report_generation_service.generate_batch_csv_report(
+            file_urls=[file_urls[file.source] for file in batch],
+            file_names=[file.name for file in batch],
+            results=align_results(texts, languages),
+            errors=[file.error for file in batch],
+        )
@@ -0,0 +1,73 @@
+import math
+from typing import Optional
+
+import numpy as np
+from keras.api.layers import Dense, Input
+from keras.api.models import Sequential
+from keras.api.utils import PyDataset
+from scipy.sparse import csr_matrix
+
+
+class SparseBatches(PyDataset):
+    """
+    Пакеты строк CSR матрицы для Keras без перевода в плотный вид.
+    Keras превращает каждый пакет scipy.sparse в разреженный тензор
+    бэкенда, поэтому память растет с числом ненулевых элементов пакета,
+    а не с размером словаря.
+    """
+
+    def __init__(
+        self,
+        x: csr_matrix,
+        y: Optional[np.ndarray] = None,
+        batch_size: int = 32,
+        shuffle: bool = False,
+        seed: Optional[int] = None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.x = x
+        self.y = y
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self._random = np.random.default_rng(seed)
+        self._order = np.arange(x.shape[0])
+        if shuffle:
+            self._random.shuffle(self._order)
+
+    def __len__(self) -> int:
+        return math.ceil(self.x.shape[0] / self.batch_size)
+
+    def __getitem__(self, index: int):
+        start = index * self.batch_size
+        end = start + self.batch_size
+        rows = self._order[start:end]
+        x = self.x[rows]
+        x.sort_indices()
+        if self.y is None:
+            return x
+        return x, self.y[rows]
+
+    def on_epoch_end(self) -> None:
+        if self.shuffle:
+            self._random.shuffle(self._order)
+
+
+def build_model(input_dim: int) -> Sequential:
+    """
+    Сеть классификации языка. Вход разреженный: первый слой умножает
+    разреженный вектор признаков на плотную матрицу весов.
+    """
+    model = Sequential()
+    model.add(Input(shape=(input_dim,), sparse=True))
+    model.add(Dense(64, activation="relu"))  # First hidden layer
+    model.add(Dense(32, activation="relu"))  # Second hidden layer
+    model.add(Dense(1, activation="sigmoid"))  # Output layer
+    return model
+
+
+def predict_sparse(model, x: csr_matrix, batch_size: int = 256) -> np.ndarray:
+    """
+    model.predict для CSR матрицы без перевода ее в плотный вид.
+    """
+    return model.predict(SparseBatches(x, batch_size=batch_size), verbose=0)
@@ -0,0 +1,189 @@
+import os
+from multiprocessing.queues import Queue
+from typing import Iterable, Iterator, Optional, TypeVar
+
+import joblib
+import numpy as np
+from keras.api.callbacks import Callback
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer
+
+from app.service.neural_and_ngramm_method.sparse import (
+    SparseBatches,
+    build_model,
+)
+
+T = TypeVar("T")
+
+# Пример для обучения: (метка языка, текст)
+Sample = tuple[int, str]
+
+
+class ProgressCallback(Callback):
+    """
+    Отправляет номер эпохи и метрики в очередь родительского процесса.
+    """
+
+    def __init__(self, progress: Queue):
+        super().__init__()
+        self.progress = progress
+
+    def on_epoch_end(self, epoch, logs=None):
+        logs = logs or {}
+        self.progress.put(
+            {
+                "event": "epoch",
+                "epoch": epoch + 1,
+                "loss": logs.get("loss"),
+                "accuracy": logs.get("accuracy"),
+            }
+        )
+
+
+def save_artifacts(
+    model, model_path: str, vectorizer: CountVectorizer, vectorizer_path: str
+) -> None:
+    """
+    Файлы пишутся во временные и заменяются атомарно, чтобы другие
+    процессы не прочитали наполовину записанную модель.
+    """
+    directory, name = os.path.split(model_path)
+    model_tmp_path = os.path.join(directory, ".tmp_" + name)
+    model.save(model_tmp_path)  # Saving the trained model
+    os.replace(model_tmp_path, model_path)
+    vectorizer_tmp_path = vectorizer_path + ".tmp"
+    joblib.dump(vectorizer, vectorizer_tmp_path)  # Saving the vectorizer
+    os.replace(vectorizer_tmp_path, vectorizer_path)
+
+
+def train_model(
+    x: csr_matrix,
+    y: np.ndarray,
+    epochs: int,
+    model_path: str,
+    vectorizer: CountVectorizer,
+    vectorizer_path: str,
+    progress: Queue,
+) -> None:
+    """
+    Обучает сеть и сохраняет ее вместе с векторизатором. Выполняется в
+    отдельном процессе; о ходе обучения и его результате сообщает через
+    очередь progress.
+    """
+    try:
+        model = build_model(x.shape[1])
+        model.compile(
+            loss="binary_crossentropy", optimizer="adam", metrics=["accuracy"]
+        )  # Compiling the model
+        # Обучаем на разреженных пакетах: плотная матрица документ-признак
+        # не создается
+        model.fit(
+            SparseBatches(x, y, batch_size=32, shuffle=True),
+            epochs=epochs,
+            verbose=0,
+            callbacks=[ProgressCallback(progress)],
+        )  # Training the model
+        save_artifacts(model, model_path, vectorizer, vectorizer_path)
+    except Exception as e:
+        progress.put({"event": "failed", "error": repr(e)})
+    else:
+        progress.put({"event": "succeeded"})
+
+
+def shuffle_buffer(
+    items: Iterable[T], size: int, random: np.random.Generator
+) -> Iterator[T]:
+    """
+    Перемешивает поток через буфер из size элементов: каждый новый
+    элемент замещает случайный элемент буфера, который и выдается.
+    Память ограничена размером буфера, а не длиной потока. При size
+    не больше 1 поток не перемешивается.
+    """
+    if size <= 1:
+        yield from items
+        return
+    buffer = []
+    for item in items:
+        if len(buffer) < size:
+            buffer.append(item)
+            continue
+        i = int(random.integers(size))
+        yield buffer[i]
+        buffer[i] = item
+    random.shuffle(buffer)
+    yield from buffer
+
+
+def _receive(samples: Queue) -> Iterator[Sample]:
+    """
+    Примеры одной эпохи из очереди; None в очереди - конец эпохи.
+    """
+    while True:
+        batch: Optional[list[Sample]] = samples.get()
+        if batch is None:
+            return
+        yield from batch
+
+
+def _chunks(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def train_model_streaming(
+    vectorizer: HashingVectorizer,
+    epochs: int,
+    chunk_size: int,
+    shuffle_buffer_size: int,
+    model_path: str,
+    vectorizer_path: str,
+    samples: Queue,
+    progress: Queue,
+) -> None:
+    """
+    Обучает сеть на потоке примеров, не держа корпус в памяти. Примеры
+    каждой эпохи приходят через очередь samples пакетами курсора,
+    перемешиваются буфером и по chunk_size штук хешируются и подаются
+    в model.fit. Векторизатору без состояния не нужен проход по словарю.
+    Выполняется в отдельном процессе.
+    """
+    try:
+        random = np.random.default_rng()
+        model = build_model(vectorizer.n_features)
+        model.compile(
+            loss="binary_crossentropy", optimizer="adam", metrics=["accuracy"]
+        )  # Compiling the model
+        for epoch in range(1, epochs + 1):
+            loss = accuracy = 0.0
+            count = 0
+            for chunk in _chunks(
+                shuffle_buffer(_receive(samples), shuffle_buffer_size, random),
+                chunk_size,
+            ):
+                y = np.array([label for label, _ in chunk])
+                x = vectorizer.transform([text for _, text in chunk])
+                history = model.fit(
+                    SparseBatches(x, y, batch_size=32), epochs=1, verbose=0
+                )  # Incremental training on the chunk
+                loss += history.history["loss"][-1] * len(chunk)
+                accuracy += history.history["accuracy"][-1] * len(chunk)
+                count += len(chunk)
+            progress.put(
+                {
+                    "event": "epoch",
+                    "epoch": epoch,
+                    "loss": loss / count if count else None,
+                    "accuracy": accuracy / count if count else None,
+                }
+            )
+        save_artifacts(model, model_path, vectorizer, vectorizer_path)
+    except Exception as e:
+        progress.put({"event": "failed", "error": repr(e)})
+    else:
+        progress.put({"event": "succeeded"})
@@ -0,0 +1,69 @@
+import asyncio
+from collections import Counter
+from functools import partial
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import CountVectorizer
+
+from app.util.process_pool import ProcessPool
+
+
+def count_features(
+    vectorizer: CountVectorizer, texts: list[str]
+) -> list[Counter]:
+    """
+    Считает признаки (слова или n-граммы) каждого текста анализатором
+    векторизатора. Выполняется в процессах ProcessPool.
+    :param vectorizer: необученный векторизатор.
+    :param texts: тексты шарда.
+    :return: счетчики признаков в порядке texts.
+    """
+    analyze = vectorizer.build_analyzer()
+    return [Counter(analyze(text)) for text in texts]
+
+
+def _merge_counts(
+    vectorizer: CountVectorizer, counts: list[Counter]
+) -> csr_matrix:
+    vocabulary = sorted(set().union(*counts))
+    columns = {feature: i for i, feature in enumerate(vocabulary)}
+    indptr = np.zeros(len(counts) + 1, dtype=np.int64)
+    indices, data = [], []
+    for row, feature_counts in enumerate(counts):
+        indices.extend(columns[feature] for feature in feature_counts)
+        data.extend(feature_counts.values())
+        indptr[row + 1] = len(indices)
+    matrix = csr_matrix(
+        (
+            np.asarray(data, dtype=vectorizer.dtype),
+            np.asarray(indices, dtype=np.int64),
+            indptr,
+        ),
+        shape=(len(counts), len(vocabulary)),
+    )
+    matrix.sort_indices()
+    # Словарь отсортирован, как после CountVectorizer.fit, поэтому
+    # transform дает те же столбцы
+    vectorizer.vocabulary_ = columns
+    vectorizer.fixed_vocabulary_ = False
+    return matrix
+
+
+async def fit_transform(
+    vectorizer: CountVectorizer, corpus: list[str], process_pool: ProcessPool
+) -> csr_matrix:
+    """
+    Аналог CountVectorizer.fit_transform: корпус анализируется шардами
+    в пуле процессов, затем словарь и матрица собираются из частичных
+    счетчиков в отдельном потоке.
+    :param vectorizer: векторизатор без ограничений словаря (min_df,
+            max_df, max_features).
+    :param corpus: тексты корпуса.
+    :param process_pool: пул процессов.
+    :return: разреженная матрица документ-признак.
+    """
+    counts = await process_pool.map_shards(
+        partial(count_features, vectorizer), corpus
+    )
+    return await asyncio.to_thread(_merge_counts, vectorizer, counts)
@@ -0,0 +1 @@
+from app.service.ngramm_profile_method.service import NgramProfileMethodService
@@ -0,0 +1,9 @@
+from app.service.language_profile import LanguageProfile
+
+
+class NgramProfile(LanguageProfile):
+    # Хеши n-грамм в порядке рангов
+    hashes: list[int]
+
+    class Settings:
+        name = "ngram-profile"
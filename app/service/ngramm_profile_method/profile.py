@@ -0,0 +1,203 @@
+import re
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+# Длины n-грамм профиля, как у Cavnar и Trenkle
+MAX_NGRAM_LENGTH = 5
+
+# Все, что не буква, считается разделителем слов
+_NON_LETTERS = re.compile(r"[\W\d_]+")
+
+_SPACE = ord(" ")
+_BASE = np.uint64(1_000_003)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def ngram_hashes(text: str) -> np.ndarray:
+    """
+    32-битные хеши символьных n-грамм текста длиной от 1 до
+    MAX_NGRAM_LENGTH. Слова дополняются пробелами с обеих сторон, и
+    n-граммы не переходят через пробел, поэтому в профиль попадают
+    начала и концы слов ("_ab", "yz_"). Хеши считаются полиномиально
+    сразу по всему тексту, без цикла по символам.
+    :param text: текст.
+    :return: хеши всех n-грамм (с повторами).
+    """
+    words = _NON_LETTERS.sub(" ", text.lower()).split()
+    text = " " + " ".join(words) + " "
+    codepoints = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    codepoints = codepoints.astype(np.uint64)
+    spaces = codepoints == _SPACE
+    # spaces_before[i] - число пробелов в text[:i]
+    spaces_before = np.concatenate(([0], np.cumsum(spaces)))
+
+    hashes = []
+    rolling = np.zeros(len(codepoints), dtype=np.uint64)
+    for n in range(1, MAX_NGRAM_LENGTH + 1):
+        count = len(codepoints) - n + 1
+        if count <= 0:
+            break
+        last = n - 1
+        rolling = rolling[:count] * _BASE + codepoints[last:]
+        if n == 1:
+            valid = ~spaces
+        elif n == 2:
+            valid = ~(spaces[:-1] & spaces[1:])
+        else:
+            # Пробел допустим только на краях n-граммы
+            starts = np.arange(count)
+            interior = spaces_before[starts + last] - spaces_before[starts + 1]
+            valid = interior == 0
+        hashes.append((rolling[valid] + np.uint64(n)) * _MIX >> np.uint64(32))
+    return np.concatenate(hashes).astype(np.uint32)
+
+
+def rank_ngrams(
+    hashes: np.ndarray, counts: np.ndarray, size: int
+) -> np.ndarray:
+    """
+    :param hashes: различные хеши n-грамм.
+    :param counts: их частоты.
+    :param size: размер профиля.
+    :return: size самых частых хешей по убыванию частоты (при равенстве -
+            по возрастанию хеша).
+    """
+    order = np.lexsort((hashes, -counts.astype(np.int64)))[:size]
+    return hashes[order]
+
+
+def document_profile(text: str, size: int) -> np.ndarray:
+    """
+    :return: хеши size самых частых n-грамм текста в порядке рангов.
+    """
+    hashes, counts = np.unique(ngram_hashes(text), return_counts=True)
+    return rank_ngrams(hashes, counts, size)
+
+
+@dataclass
+class NgramStatistics:
+    """
+    Частоты n-грамм одного языка: различные хеши и их частоты.
+    """
+
+    hashes: np.ndarray = field(
+        default_factory=lambda: np.zeros(0, dtype=np.uint32)
+    )
+    counts: np.ndarray = field(
+        default_factory=lambda: np.zeros(0, dtype=np.int64)
+    )
+    document_count: int = 0
+
+    def update(self, other: "NgramStatistics") -> None:
+        hashes, inverse = np.unique(
+            np.concatenate((self.hashes, other.hashes)), return_inverse=True
+        )
+        self.counts = np.bincount(
+            inverse, weights=np.concatenate((self.counts, other.counts))
+        ).astype(np.int64)
+        self.hashes = hashes
+        self.document_count += other.document_count
+
+    def profile(self, size: int) -> list[int]:
+        return rank_ngrams(self.hashes, self.counts, size).tolist()
+
+
+def count_ngrams(
+    samples: list[tuple[Optional[str], str]],
+) -> list[dict[str, NgramStatistics]]:
+    """
+    Собирает частоты n-грамм по языкам для шарда корпуса. Выполняется в
+    процессах ProcessPool, поэтому объявлена на уровне модуля.
+    :param samples: [(язык, текст)]
+    :return: список из одного словаря {язык: статистика}.
+    """
+    texts = {}
+    for language, text in samples:
+        if language:
+            texts.setdefault(language, []).append(text)
+    statistics = {}
+    for language, language_texts in texts.items():
+        hashes, counts = np.unique(
+            np.concatenate([ngram_hashes(text) for text in language_texts]),
+            return_counts=True,
+        )
+        statistics[language] = NgramStatistics(
+            hashes=hashes,
+            counts=counts.astype(np.int64),
+            document_count=len(language_texts),
+        )
+    return [statistics]
+
+
+@dataclass
+class NgramProfiles:
+    """
+    Ранжированные профили n-грамм языков (Cavnar, Trenkle, 1994),
+    скомпилированные в общую отсортированную таблицу хешей и матрицу
+    рангов хеш x язык. Расстояние "out-of-place" текста до всех языков
+    считается одним бинарным поиском профиля текста по таблице.
+    """
+
+    profiles: dict[str, list[int]]
+    size: int
+    languages: list[str] = field(init=False)
+
+    def __post_init__(self):
+        self.languages = list(self.profiles)
+        self._hashes = np.unique(
+            np.concatenate(
+                [np.zeros(0, dtype=np.uint32)]
+                + [
+                    np.asarray(hashes, dtype=np.uint32)
+                    for hashes in self.profiles.values()
+                ]
+            )
+        )
+        # Ранг n-граммы в профиле языка; size - n-граммы нет в профиле
+        self._ranks = np.full(
+            (len(self._hashes), len(self.languages)), self.size, np.int64
+        )
+        for column, language in enumerate(self.languages):
+            hashes = np.asarray(
+                self.profiles[language][: self.size], dtype=np.uint32
+            )
+            rows = np.searchsorted(self._hashes, hashes)
+            self._ranks[rows, column] = np.arange(len(hashes))
+
+    def distances(self, text: str) -> np.ndarray:
+        """
+        Расстояние out-of-place: сумма по n-граммам профиля текста
+        разностей их рангов в профиле текста и в профиле языка. За
+        n-грамму, отсутствующую в профиле языка, начисляется size.
+        :return: расстояния до профилей self.languages.
+        """
+        return self._distances(document_profile(text, self.size))
+
+    def _distances(self, hashes: np.ndarray) -> np.ndarray:
+        if not len(self._hashes):
+            return np.full(len(self.languages), len(hashes) * self.size)
+        rows = np.searchsorted(self._hashes, hashes)
+        rows[rows == len(self._hashes)] = 0
+        found = self._hashes[rows] == hashes
+        ranks = np.where(found[:, None], self._ranks[rows], self.size)
+        text_ranks = np.arange(len(hashes))[:, None]
+        return np.where(
+            ranks == self.size, self.size, np.abs(ranks - text_ranks)
+        ).sum(axis=0)
+
+    def predict(self, texts: list[str]) -> list[Optional[str]]:
+        """
+        :return: язык с наименьшим расстоянием для каждого текста или
+                None, если в тексте нет букв и профиль текста пуст.
+        """
+        languages = []
+        for text in texts:
+            hashes = document_profile(text, self.size)
+            if not len(hashes) or not self.languages:
+                languages.append(None)
+                continue
+            distances = self._distances(hashes)
+            languages.append(self.languages[int(distances.argmin())])
+        return languages
@@ -0,0 +1,155 @@
+import copy
+from dataclasses import dataclass, field
+
+from fastapi import File, HTTPException, UploadFile
+
+from app.service.html_processing import HtmlProcessingService, align_results
+from app.service.language_profile import (
+    LanguageProfileRepository,
+    ProfileReloader,
+)
+from app.service.ngramm_profile_method.dto import NgramProfile
+from app.service.ngramm_profile_method.profile import (
+    NgramProfiles,
+    NgramStatistics,
+    count_ngrams,
+)
+from app.service.report_generation.service import ReportGenerationService
+from app.service.s3_service import S3Service
+from app.service.text_document import (
+    TextDocument,
+    TextDocumentSample,
+    TextDocumentService,
+)
+from app.util.process_pool import ProcessPool
+
+
+@dataclass
+class NgramProfileMethodService:
+    """
+    Service for predicting language by ranked character
+    n-gram profiles (Cavnar-Trenkle) without a neural network.
+    """
+
+    text_document_service: TextDocumentService
+    html_processing_service: HtmlProcessingService
+    report_generation_service: ReportGenerationService
+    s3_service: S3Service
+    process_pool: ProcessPool
+    ngram_profile_repository: LanguageProfileRepository[NgramProfile]
+    # Число n-грамм в профилях языков и текста
+    profile_size: int = 300
+    batch_size: int = 500
+    # Как часто (в секундах) проверять, не обновились ли профили в базе
+    reload_interval: float = 30
+    _profiles: ProfileReloader[NgramProfile, NgramProfiles] = field(init=False)
+
+    def __post_init__(self):
+        self._profiles = ProfileReloader(
+            repository=self.ngram_profile_repository,
+            compile_profiles=self._compile_profiles,
+            reload_interval=self.reload_interval,
+        )
+
+    async def create_model(self) -> dict[str, int]:
+        """
+        Строит профили n-грамм по всем документам корпуса с известным
+        языком за один проход курсором, сохраняет их вместо прежних и
+        сразу загружает. Профили языков, которых больше нет в корпусе,
+        удаляются.
+        :return: {язык: число документов в профиле}
+        """
+        statistics = {}
+        async for batch in self.text_document_service.iterate_document_batches(
+            batch_size=self.batch_size, projection=TextDocumentSample
+        ):
+            shards = await self.process_pool.map_shards(
+                count_ngrams,
+                [(document.language, document.text) for document in batch],
+            )
+            for shard in shards:
+                for language, language_statistics in shard.items():
+                    statistics.setdefault(language, NgramStatistics()).update(
+                        language_statistics
+                    )
+
+        await self.ngram_profile_repository.replace_all(
+            [
+                NgramProfile(
+                    language=language,
+                    hashes=language_statistics.profile(self.profile_size),
+                    document_count=language_statistics.document_count,
+                )
+                for language, language_statistics in statistics.items()
+            ]
+        )
+        await self._profiles.get(force=True)
+        return {
+            language: language_statistics.document_count
+            for language, language_statistics in statistics.items()
+        }
+
+    def _compile_profiles(self, trained: list[NgramProfile]) -> NgramProfiles:
+        return NgramProfiles(
+            {profile.language: profile.hashes for profile in trained},
+            self.profile_size,
+        )
+
+    async def _ensure_profiles(self) -> NgramProfiles:
+        """
+        :return: актуальные профили.
+        """
+        profiles = await self._profiles.get()
+        if profiles is None or not profiles.languages:
+            raise HTTPException(
+                status_code=400,
+                detail="N-gram profiles are not trained, call create-model",
+            )
+        return profiles
+
+    async def predict(self, file: File):
+        """Predicts the language of the given
+        text by its n-gram profile."""
+        file_url = await self.s3_service.upload_file(copy.deepcopy(file))
+        text = await self.html_processing_service.process_file(file)
+
+        profiles = await self._ensure_profiles()
+        predicted_language = profiles.predict([text])[0]
+        if predicted_language is None:
+            raise HTTPException(
+                status_code=400,
+                detail="The file contains no letters to detect language by",
+            )
+        await self.text_document_service.create_document(
+            TextDocument(text=text, language=predicted_language)
+        )
+        return await self.report_generation_service.generate_csv_report(
+            file_url, predicted_language
+        )
+
+    async def predict_batch(self, files: list[UploadFile]):
+        """Predicts the language of every uploaded file or zip archive
+        entry and returns a single report."""
+        uploads, batch = await self.html_processing_service.read_batch(files)
+        file_urls = await self.s3_service.upload_files(
+            [(file.filename, content) for file, content in zip(files, uploads)]
+        )
+        texts = await self.html_processing_service.process_batch(batch)
+        parsed = [text for text in texts if text is not None]
+
+        profiles = await self._ensure_profiles()
+        predicted_languages = profiles.predict(parsed)
+        # Тексты без букв остаются в отчете с пустым результатом
+        await self.text_document_service.create_documents(
+            [
+                TextDocument(text=text, language=language)
+                for text, language in zip(parsed, predicted_languages)
+                if language is not None
+            ]
+        )
+        return await self.report_generation_service.generate_batch_csv_report(
+            file_urls=[file_urls[file.source] for file in batch],
+            file_names=[file.name for file in batch],
+            results=align_results(texts, predicted_languages),
+            errors=[file.error for file in batch],
+        )
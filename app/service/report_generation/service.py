@@ -1,5 +1,6 @@
 import io
 from dataclasses import dataclass
+from typing import Optional
 
 import pandas as pd
 from starlette.responses import StreamingResponse
@@ -23,26 +24,74 @@ class ReportGenerationService:
         )
         return response
 
-    async def generate_csv_report(self, file_url: str, result: str):
-        """Создание CSV-файла с результатами."""
-        german_documents = (
-            await self.text_document_service.get_documents_by_language(
+    async def _count_documents(self) -> tuple[int, int]:
+        german_documents_count = (
+            await self.text_document_service.count_documents_by_language(
                 language=Language.GERMAN
             )
         )
-        russian_documents = (
-            await self.text_document_service.get_documents_by_language(
+        russian_documents_count = (
+            await self.text_document_service.count_documents_by_language(
                 language=Language.RUSSIAN
             )
         )
+        return german_documents_count, russian_documents_count
+
+    async def generate_csv_report(
+        self,
+        file_url: str,
+        result: str,
+        bytes_examined: Optional[int] = None,
+        bytes_total: Optional[int] = None,
+    ):
+        """
+        Создание CSV-файла с результатами. При потоковом определении
+        языка в отчет добавляется число просмотренных байт текста.
+        """
+        german_documents_count, russian_documents_count = (
+            await self._count_documents()
+        )
         data = {
             "file_url": [file_url],
-            "german_documents_count": [len(german_documents)],
-            "russian_documents_count": [len(russian_documents)],
+            "german_documents_count": [german_documents_count],
+            "russian_documents_count": [russian_documents_count],
             "result": [result],
         }
+        if bytes_examined is not None:
+            data["bytes_examined"] = [bytes_examined]
+            data["bytes_total"] = [bytes_total]
+        df = pd.DataFrame(data)
+        return await self._to_csv_response(df)
+
+    async def generate_batch_csv_report(
+        self,
+        file_urls: list[str],
+        file_names: list[str],
+        results: list[Optional[str]],
+        errors: Optional[list[Optional[str]]] = None,
+    ):
+        """
+        Создание CSV-файла с результатами пакета, по строке на файл.
+        Для файлов, которые не удалось обработать, result пуст, а
+        причина записана в столбце error.
+        """
+        german_documents_count, russian_documents_count = (
+            await self._count_documents()
+        )
+        data = {
+            "file_url": file_urls,
+            "file_name": file_names,
+            "german_documents_count": [german_documents_count] * len(results),
+            "russian_documents_count": [russian_documents_count]
+            * len(results),
+            "result": results,
+        }
+        if errors is not None:
+            data["error"] = errors
         df = pd.DataFrame(data)
+        return await self._to_csv_response(df)
 
+    async def _to_csv_response(self, df: pd.DataFrame):
         # Создаем CSV-файл в памяти
         output = io.StringIO()
         df.to_csv(output, index=False)
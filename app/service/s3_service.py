@@ -1,3 +1,6 @@
+import asyncio
+import io
+import os
 import random
 import string
 from datetime import datetime
@@ -35,3 +38,36 @@ class S3Service:
             )
         file_url = f"{self.s3_endpoint}/{self.s3_bucket}/{file_name}"
         return file_url
+
+    async def upload_files(
+        self, files: list[tuple[str, bytes]], concurrency: int = 16
+    ) -> list[str]:
+        """
+        Загружает несколько файлов параллельно через один клиент.
+        :param files: [(исходное имя, содержимое)]
+        :param concurrency: максимальное число одновременных загрузок.
+        :return: ссылки на файлы в порядке files.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def upload(s3_client, name: str, content: bytes) -> str:
+            extension = os.path.splitext(name or "")[1].lstrip(".")
+            file_name = self._generate_unique_filename(extension or "html")
+            async with semaphore:
+                await s3_client.upload_fileobj(
+                    io.BytesIO(content),
+                    Bucket=self.s3_bucket,
+                    Key=file_name,
+                    ExtraArgs={"ACL": "public-read"},
+                )
+            return f"{self.s3_endpoint}/{self.s3_bucket}/{file_name}"
+
+        async with self.s3_client_factory() as s3_client:
+            return list(
+                await asyncio.gather(
+                    *(
+                        upload(s3_client, name, content)
+                        for name, content in files
+                    )
+                )
+            )
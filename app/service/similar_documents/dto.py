@@ -0,0 +1,13 @@
+from typing import Optional
+
+from beanie import PydanticObjectId
+from pydantic import BaseModel, Field
+
+
+class SimilarDocument(BaseModel):
+    id: PydanticObjectId = Field(alias="_id")
+    name: Optional[str]
+    score: float
+
+    class Config:
+        allow_population_by_field_name = True
@@ -0,0 +1,234 @@
+import math
+import zlib
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+from beanie import PydanticObjectId
+
+from app.service.calculate_weight_coefficient.statistics import (
+    CorpusStatistics,
+)
+from app.service.text_document import TextDocument
+
+# Число строк матрицы гиперплоскостей. Признаки сворачиваются в него по
+# модулю: для выбора кандидатов коллизии допустимы, а переранжирование
+# использует полную размерность
+HYPERPLANE_ROWS = 2**16
+
+# Разреженный вектор: номера признаков и веса
+SparseVector = tuple[np.ndarray, np.ndarray]
+
+
+@dataclass
+class LSHIndex:
+    """
+    Индекс приближенного поиска ближайших соседей по косинусной
+    близости TF-IDF векторов (random-hyperplane LSH).
+
+    Термы хешируются в пространство фиксированной размерности
+    dimension, поэтому словарь не нужен и индекс не перестраивается при
+    появлении новых термов. Сигнатура документа - знаки проекций вектора
+    на tables * bits случайных гиперплоскостей, разбитые на tables ключей
+    по bits бит. Кандидаты - документы, совпавшие с запросом хотя бы в
+    одной таблице; они переранжируются косинусом хешированных векторов.
+
+    Векторы строятся из счетчиков CorpusStatistics, поэтому в списке
+    подписчиков индекс должен стоять после них. IDF фиксируется в
+    момент добавления документа; когда корпус вырастает вдвое с
+    последнего построения, индекс перестраивается.
+    """
+
+    corpus_statistics: CorpusStatistics
+    dimension: int = 2**20
+    tables: int = 32
+    bits: int = 10
+    seed: int = 0
+    vectors: dict[PydanticObjectId, SparseVector] = field(
+        default_factory=dict, init=False
+    )
+    signatures: dict[PydanticObjectId, tuple[int, ...]] = field(
+        default_factory=dict, init=False
+    )
+    buckets: list[dict[int, set[PydanticObjectId]]] = field(
+        default_factory=list, init=False
+    )
+    is_built: bool = field(default=False, init=False)
+    _built_document_count: int = field(default=0, init=False)
+
+    def __post_init__(self):
+        random = np.random.default_rng(self.seed)
+        # Компоненты гиперплоскостей равны +-1: для знака проекции этого
+        # достаточно, а матрица в int8 занимает
+        # HYPERPLANE_ROWS * tables * bits байт
+        self._hyperplanes = random.choice(
+            np.array([-1, 1], dtype=np.int8),
+            size=(
+                min(self.dimension, HYPERPLANE_ROWS),
+                self.tables * self.bits,
+            ),
+        )
+        self._powers = 1 << np.arange(self.bits, dtype=np.int64)
+        self.buckets = [{} for _ in range(self.tables)]
+
+    @property
+    def needs_rebuild(self) -> bool:
+        return (
+            not self.is_built
+            or self.corpus_statistics.document_count
+            > 2 * max(self._built_document_count, 1)
+        )
+
+    def build(self) -> None:
+        """
+        Заполняет индекс всеми документами из CorpusStatistics.
+        """
+        self.vectors.clear()
+        self.signatures.clear()
+        self.buckets = [{} for _ in range(self.tables)]
+        for document_id in list(self.corpus_statistics.term_counts):
+            self.add_document(document_id)
+        self._built_document_count = len(self.vectors)
+        self.is_built = True
+
+    def add_document(self, document_id: PydanticObjectId) -> None:
+        if document_id in self.vectors:
+            self.remove_document(document_id)
+        vector = self.vectorize(document_id)
+        if vector is None:
+            return
+        signature = self._signature(vector)
+        self.vectors[document_id] = vector
+        self.signatures[document_id] = signature
+        for table, key in zip(self.buckets, signature):
+            table.setdefault(key, set()).add(document_id)
+
+    def remove_document(self, document_id: PydanticObjectId) -> None:
+        self.vectors.pop(document_id, None)
+        signature = self.signatures.pop(document_id, None)
+        if signature is None:
+            return
+        for table, key in zip(self.buckets, signature):
+            bucket = table.get(key)
+            if bucket is None:
+                continue
+            bucket.discard(document_id)
+            if not bucket:
+                del table[key]
+
+    def vectorize(
+        self, document_id: PydanticObjectId
+    ) -> Optional[SparseVector]:
+        """
+        Хешированный TF-IDF вектор документа единичной длины.
+        :param document_id: id документа.
+        :return: (номера признаков, веса) или None, если у документа нет
+                ненулевых весов.
+        """
+        statistics = self.corpus_statistics
+        term_counts = statistics.term_counts.get(document_id)
+        if not term_counts:
+            return None
+        total = statistics.document_count
+        indices = np.fromiter(
+            (
+                zlib.crc32(term.encode("utf-8")) % self.dimension
+                for term in term_counts
+            ),
+            dtype=np.int64,
+            count=len(term_counts),
+        )
+        weights = np.fromiter(
+            (
+                count * math.log(total / statistics.document_frequency[term])
+                for term, count in term_counts.items()
+            ),
+            dtype=np.float32,
+            count=len(term_counts),
+        )
+        # Складываем веса термов, попавших в один признак
+        indices, inverse = np.unique(indices, return_inverse=True)
+        weights = np.bincount(inverse, weights=weights).astype(np.float32)
+        norm = np.linalg.norm(weights)
+        if norm == 0:
+            return None
+        return indices, weights / norm
+
+    def candidates(
+        self, document_id: PydanticObjectId
+    ) -> set[PydanticObjectId]:
+        """
+        Документы, попавшие в одну корзину с данным хотя бы в одной
+        таблице.
+        """
+        signature = self.signatures.get(document_id)
+        if signature is None:
+            return set()
+        candidates = set()
+        for table, key in zip(self.buckets, signature):
+            candidates.update(table.get(key, ()))
+        candidates.discard(document_id)
+        return candidates
+
+    def query(
+        self, document_id: PydanticObjectId, k: int
+    ) -> list[tuple[PydanticObjectId, float]]:
+        """
+        Ищет k документов, наиболее похожих на данный.
+        :param document_id: id документа из индекса.
+        :param k: число соседей.
+        :return: [(id документа, косинусная близость)] по убыванию.
+        """
+        candidates = list(self.candidates(document_id))
+        if not candidates:
+            return []
+        indices, weights = self.vectors[document_id]
+        vectors = [self.vectors[candidate] for candidate in candidates]
+        lengths = np.fromiter(
+            (len(vector[0]) for vector in vectors),
+            dtype=np.int64,
+            count=len(vectors),
+        )
+        candidate_indices = np.concatenate([vector[0] for vector in vectors])
+        candidate_weights = np.concatenate([vector[1] for vector in vectors])
+        # Номера признаков запроса отсортированы: общие признаки всех
+        # кандидатов находим одним бинарным поиском, а скалярные
+        # произведения - суммой по отрезкам кандидатов
+        positions = np.searchsorted(indices, candidate_indices)
+        positions[positions == len(indices)] = 0
+        products = np.where(
+            indices[positions] == candidate_indices,
+            weights[positions] * candidate_weights,
+            0,
+        )
+        scores = np.add.reduceat(products, np.cumsum(lengths) - lengths)
+        # Документы без общих признаков похожими не считаются
+        top = np.flatnonzero(scores > 0)
+        if len(top) > k:
+            top = top[np.argpartition(-scores[top], k - 1)[:k]]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(candidates[i], float(scores[i])) for i in top.tolist()]
+
+    def _signature(self, vector: SparseVector) -> tuple[int, ...]:
+        indices, weights = vector
+        rows = indices % len(self._hyperplanes)
+        projections = weights @ self._hyperplanes[rows]
+        bits = (projections > 0).reshape(self.tables, self.bits)
+        return tuple((bits @ self._powers).tolist())
+
+    async def on_document_created(self, document: TextDocument) -> None:
+        async with self.corpus_statistics.lock:
+            if self.is_built:
+                self.add_document(document.id)
+
+    async def on_documents_created(
+        self, documents: list[TextDocument]
+    ) -> None:
+        async with self.corpus_statistics.lock:
+            if self.is_built:
+                for document in documents:
+                    self.add_document(document.id)
+
+    async def on_document_deleted(self, document: TextDocument) -> None:
+        async with self.corpus_statistics.lock:
+            self.remove_document(document.id)
@@ -0,0 +1,63 @@
+import asyncio
+from dataclasses import dataclass
+
+from fastapi import HTTPException
+
+from app.service.calculate_weight_coefficient.service import (
+    WeightCoefficientService,
+)
+from app.service.similar_documents.dto import SimilarDocument
+from app.service.similar_documents.index import LSHIndex
+from app.service.text_document import TextDocumentService
+
+
+@dataclass
+class SimilarDocumentsService:
+    text_document_service: TextDocumentService
+    weight_coefficient_service: WeightCoefficientService
+    similarity_index: LSHIndex
+
+    async def find_similar(
+        self, document_name: str, k: int = 10
+    ) -> list[SimilarDocument]:
+        """
+        Ищет документы, похожие на данный, по косинусной близости
+        TF-IDF векторов.
+        :param document_name: имя документа.
+        :param k: число похожих документов.
+        :return: список похожих документов по убыванию близости.
+        """
+        document = await self.text_document_service.get_document(
+            document_name=document_name
+        )
+        if document is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Document '{document_name}' not found",
+            )
+        await self._ensure_index()
+        names = self.similarity_index.corpus_statistics.document_names
+        if document.id not in names:
+            # Счетчики живут в памяти воркера: документ, добавленный
+            # через другой воркер, здесь еще неизвестен
+            raise HTTPException(
+                status_code=409,
+                detail=f"Document '{document_name}' is not indexed "
+                "by this worker yet",
+            )
+        return [
+            SimilarDocument(
+                id=document_id, name=names.get(document_id), score=score
+            )
+            for document_id, score in self.similarity_index.query(
+                document.id, k
+            )
+        ]
+
+    async def _ensure_index(self) -> None:
+        await self.weight_coefficient_service.ensure_statistics()
+        statistics = self.similarity_index.corpus_statistics
+        if self.similarity_index.needs_rebuild:
+            async with statistics.lock:
+                if self.similarity_index.needs_rebuild:
+                    await asyncio.to_thread(self.similarity_index.build)
@@ -1,3 +1,8 @@
-from app.service.text_document.dto import TextDocument
+from app.service.text_document.dto import (
+    TextDocument,
+    TextDocumentContent,
+    TextDocumentName,
+    TextDocumentSample,
+)
 from app.service.text_document.repository import TextDocumentRepository
 from app.service.text_document.service import TextDocumentService
@@ -1,7 +1,7 @@
 from typing import Optional
 
-from beanie import Document
-from pydantic import Field
+from beanie import Document, PydanticObjectId
+from pydantic import BaseModel, Field
 
 
 class TextDocument(Document):
@@ -11,3 +11,20 @@ class TextDocument(Document):
 
     class Settings:
         name = "text-document"
+
+
+class TextDocumentName(BaseModel):
+    id: PydanticObjectId = Field(alias="_id")
+    name: Optional[str]
+
+
+class TextDocumentContent(BaseModel):
+    id: PydanticObjectId = Field(alias="_id")
+    name: Optional[str]
+    text: str
+
+
+class TextDocumentSample(BaseModel):
+    id: PydanticObjectId = Field(alias="_id")
+    text: str
+    language: Optional[str]
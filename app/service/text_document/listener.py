@@ -0,0 +1,19 @@
+from typing import Protocol
+
+from app.service.text_document.dto import TextDocument
+
+
+class TextDocumentListener(Protocol):
+    """
+    Подписчик на изменения коллекции документов. Используется для
+    поддержания производных структур (индексов, статистик) в актуальном
+    состоянии без полного пересчета.
+    """
+
+    async def on_document_created(self, document: TextDocument) -> None: ...
+
+    async def on_documents_created(
+        self, documents: list[TextDocument]
+    ) -> None: ...
+
+    async def on_document_deleted(self, document: TextDocument) -> None: ...
@@ -1,7 +1,15 @@
 from dataclasses import dataclass
-from typing import Optional
+from typing import AsyncIterator, Optional, Type, Union
 
-from app.service.text_document.dto import TextDocument
+from beanie import PydanticObjectId
+from beanie.operators import In
+
+from app.service.text_document.dto import (
+    TextDocument,
+    TextDocumentContent,
+    TextDocumentName,
+    TextDocumentSample,
+)
 from app.service.text_document.enums import Language
 
 
@@ -13,6 +21,60 @@ class TextDocumentRepository:
         document = await TextDocument.find_one(TextDocument.name == name)
         return document
 
+    @staticmethod
+    async def find_by_ids(
+        ids: list[PydanticObjectId],
+        projection: Optional[Type[TextDocumentName]] = None,
+    ) -> list[Union[TextDocument, TextDocumentName]]:
+        documents = (
+            await TextDocument.find(In(TextDocument.id, ids))
+            .sort(+TextDocument.id)
+            .project(projection)
+            .to_list()
+        )
+        return documents
+
+    @staticmethod
+    async def find_ids(
+        query: dict, skip: int = 0, limit: Optional[int] = None
+    ) -> list[PydanticObjectId]:
+        documents = (
+            await TextDocument.find(query)
+            .sort(+TextDocument.id)
+            .skip(skip)
+            .limit(limit)
+            .project(TextDocumentName)
+            .to_list()
+        )
+        return [document.id for document in documents]
+
+    @staticmethod
+    def iterate(query: dict) -> AsyncIterator[TextDocument]:
+        return TextDocument.find(query).sort(+TextDocument.id)
+
+    @staticmethod
+    async def iterate_batches(
+        batch_size: int,
+        projection: Type[
+            Union[TextDocumentContent, TextDocumentSample]
+        ] = TextDocumentContent,
+    ) -> AsyncIterator[list[Union[TextDocumentContent, TextDocumentSample]]]:
+        """
+        Читает коллекцию курсором, пачками по batch_size документов, с
+        проекцией только на нужные поля (по умолчанию имя и текст).
+        """
+        batch = []
+        cursor = TextDocument.find_all(
+            projection_model=projection, batch_size=batch_size
+        )
+        async for document in cursor:
+            batch.append(document)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
     @staticmethod
     async def get_all() -> list[TextDocument]:
         documents = await TextDocument.find_all().to_list()
@@ -23,10 +85,29 @@ class TextDocumentRepository:
         document = await TextDocument.insert_one(data)
         return document
 
+    @staticmethod
+    async def create_documents(
+        documents: list[TextDocument],
+    ) -> list[TextDocument]:
+        # insert_many не проставляет id в объекты, поэтому задаем их
+        # заранее: подписчикам нужны id новых документов
+        for document in documents:
+            document.id = PydanticObjectId()
+        if documents:
+            await TextDocument.insert_many(documents)
+        return documents
+
     @staticmethod
     async def delete_document(name: str) -> None:
         await TextDocument.find_one(TextDocument.name == name).delete()
 
+    @staticmethod
+    async def count_by_language(language: Language) -> int:
+        count = await TextDocument.find(
+            TextDocument.language == language
+        ).count()
+        return count
+
     @staticmethod
     async def get_document_by_language(
         language: Language,
@@ -1,29 +1,96 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Optional, Type, Union
 
-from app.service.text_document import TextDocument
+from beanie import PydanticObjectId
+
+from app.service.text_document import (
+    TextDocument,
+    TextDocumentContent,
+    TextDocumentName,
+    TextDocumentSample,
+)
 from app.service.text_document.enums import Language
+from app.service.text_document.listener import TextDocumentListener
 from app.service.text_document.repository import TextDocumentRepository
 
 
 @dataclass
 class TextDocumentService:
     text_document_repository: TextDocumentRepository
+    listeners: list[TextDocumentListener] = field(default_factory=list)
 
     async def get_all_documents(self) -> list[TextDocument]:
         return await self.text_document_repository.get_all()
 
+    def iterate_document_batches(
+        self,
+        batch_size: int,
+        projection: Type[
+            Union[TextDocumentContent, TextDocumentSample]
+        ] = TextDocumentContent,
+    ) -> AsyncIterator[list[Union[TextDocumentContent, TextDocumentSample]]]:
+        return self.text_document_repository.iterate_batches(
+            batch_size=batch_size, projection=projection
+        )
+
+    async def get_documents_by_ids(
+        self,
+        document_ids: list[PydanticObjectId],
+        projection: Optional[Type[TextDocumentName]] = None,
+    ) -> list[Union[TextDocument, TextDocumentName]]:
+        return await self.text_document_repository.find_by_ids(
+            ids=document_ids, projection=projection
+        )
+
+    async def find_document_ids(
+        self, query: dict, skip: int = 0, limit: Optional[int] = None
+    ) -> list[PydanticObjectId]:
+        return await self.text_document_repository.find_ids(
+            query=query, skip=skip, limit=limit
+        )
+
+    def iterate_documents(self, query: dict) -> AsyncIterator[TextDocument]:
+        return self.text_document_repository.iterate(query=query)
+
     async def get_document(self, document_name: str) -> TextDocument:
         return await self.text_document_repository.find_by_name(
             name=document_name
         )
 
     async def create_document(self, data: TextDocument) -> TextDocument:
-        return await self.text_document_repository.create_document(data=data)
+        document = await self.text_document_repository.create_document(
+            data=data
+        )
+        for listener in self.listeners:
+            await listener.on_document_created(document)
+        return document
+
+    async def create_documents(
+        self, documents: list[TextDocument]
+    ) -> list[TextDocument]:
+        if not documents:
+            # Пустой пакет не меняет коллекцию: подписчики не вызываются
+            return []
+        documents = await self.text_document_repository.create_documents(
+            documents=documents
+        )
+        for listener in self.listeners:
+            await listener.on_documents_created(documents)
+        return documents
 
     async def delete_document(self, document_name: str) -> None:
-        return await self.text_document_repository.delete_document(
+        document = await self.text_document_repository.find_by_name(
             name=document_name
         )
+        await self.text_document_repository.delete_document(name=document_name)
+        if document is not None:
+            for listener in self.listeners:
+                await listener.on_document_deleted(document)
+
+    async def count_documents_by_language(self, language: Language) -> int:
+        return await self.text_document_repository.count_by_language(
+            language=language
+        )
 
     async def get_documents_by_language(self, language: Language) -> list[str]:
         documents = (
@@ -12,6 +12,9 @@ class ConfigEnvWrapper:
     def set_int(self, path: str, env: str, **kwargs):
         self._path(path).override(self._env.int(env, **kwargs))
 
+    def set_float(self, path: str, env: str, **kwargs):
+        self._path(path).override(self._env.float(env, **kwargs))
+
     def set_str(self, path: str, env: str, **kwargs):
         self._path(path).override(self._env.str(env, **kwargs))
 
@@ -0,0 +1,74 @@
+from dataclasses import dataclass
+from typing import Callable, Iterator
+
+
+@dataclass
+class EarlyExitResult:
+    language: str
+    # Отрыв лучшего языка от второго в момент остановки, от 0 до 1
+    margin: float
+    bytes_examined: int
+    bytes_total: int
+
+
+def iterate_chunks(
+    text: str, chunk_size: int, overlap: int = 0
+) -> Iterator[tuple[str, int]]:
+    """
+    Делит текст на куски примерно по chunk_size символов. Кусок
+    обрывается на последнем пробеле, чтобы не резать слова; если пробела
+    нет, режется ровно по chunk_size.
+    :param text: текст.
+    :param chunk_size: размер куска в символах.
+    :param overlap: сколько последних символов предыдущего куска
+            повторить в начале следующего (для n-грамм, пересекающих
+            границу).
+    :return: пары (кусок, число новых символов в нем).
+    """
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        if end < len(text):
+            space = text.rfind(" ", start + 1, end)
+            if space != -1:
+                end = space
+        begin = max(start - overlap, 0)
+        yield text[begin:end], end - start
+        start = end
+
+
+def detect_early_exit(
+    text: str,
+    update: Callable[[str], tuple[str, float]],
+    chunk_size: int,
+    margin: float,
+    overlap: int = 0,
+) -> EarlyExitResult:
+    """
+    Потоковое определение языка: текст подается детектору кусками, и
+    чтение прекращается, как только отрыв лучшего языка от второго
+    достигает margin.
+    :param text: текст.
+    :param update: добавляет кусок к накопленной статистике детектора и
+            возвращает (текущий язык, отрыв).
+    :param chunk_size: размер куска в символах.
+    :param margin: порог отрыва для досрочной остановки.
+    :param overlap: см. iterate_chunks.
+    :return: язык, отрыв и число просмотренных байт текста в UTF-8.
+    """
+    language, current_margin, examined = None, 0.0, 0
+    for chunk, new_characters in iterate_chunks(text, chunk_size, overlap):
+        examined += len(chunk[-new_characters:].encode("utf-8"))
+        language, current_margin = update(chunk)
+        if current_margin >= margin:
+            break
+    if language is None:
+        # Пустой текст: оцениваем как есть, чтобы ответ был тем же, что
+        # и без досрочной остановки
+        language, current_margin = update(text)
+    return EarlyExitResult(
+        language=language,
+        margin=current_margin,
+        bytes_examined=examined,
+        bytes_total=len(text.encode("utf-8")),
+    )
@@ -0,0 +1,28 @@
+import hashlib
+import json
+from typing import Optional
+
+
+def make_etag(*parts) -> str:
+    """
+    Строит сильный ETag из значений, однозначно определяющих ответ.
+    :param parts: значения, сериализуемые в JSON.
+    :return: ETag в кавычках.
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return '"' + hashlib.sha1(payload.encode("utf-8")).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Проверяет заголовок If-None-Match (слабое сравнение, RFC 7232).
+    :param if_none_match: значение заголовка или None.
+    :param etag: текущий ETag ответа.
+    :return: True, если клиент уже имеет актуальный ответ.
+    """
+    if if_none_match is None:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or any(
+        candidate.removeprefix("W/") == etag for candidate in candidates
+    )
@@ -0,0 +1,77 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass
+class MicroBatcher(Generic[T, R]):
+    """
+    Собирает одиночные запросы конкурентных клиентов в пакеты и
+    обрабатывает каждый пакет одним вызовом function в отдельном потоке.
+    Пакет отправляется, когда в нем max_batch_size элементов или когда
+    первый элемент ждет max_latency секунд. Одновременно выполняется не
+    больше одного пакета: пока он считается, копится следующий.
+    """
+
+    function: Callable[[list[T]], list[R]]
+    max_batch_size: int = 32
+    max_latency: float = 0.005
+    _pending: list[tuple[T, asyncio.Future]] = field(
+        default_factory=list, init=False
+    )
+    _timer: Optional[asyncio.TimerHandle] = field(default=None, init=False)
+    _running: set[asyncio.Task] = field(default_factory=set, init=False)
+    _lock: asyncio.Lock = field(default_factory=asyncio.Lock, init=False)
+
+    async def submit(self, item: T) -> R:
+        """
+        :param item: элемент пакета.
+        :return: результат function для этого элемента.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_latency, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            # Ссылка на задачу хранится, пока она не завершится
+            task = asyncio.create_task(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: list[tuple[T, asyncio.Future]]) -> None:
+        try:
+            async with self._lock:
+                results = await asyncio.to_thread(
+                    self.function, [item for item, _ in batch]
+                )
+            if len(results) != len(batch):
+                raise RuntimeError(
+                    f"Batch function returned {len(results)} results "
+                    f"for {len(batch)} items"
+                )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            # Если задачу пакета отменили, ожидающие не должны зависнуть
+            for _, future in batch:
+                if not future.done():
+                    future.cancel()
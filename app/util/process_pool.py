@@ -0,0 +1,76 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass
+class ProcessPool:
+    """
+    Пул процессов для CPU-емких вычислений по корпусу (токенизация,
+    подсчет термов и n-грамм). Вычисления не блокируют цикл событий.
+    При workers == 0 пул не создается, и функция выполняется в потоке
+    по умолчанию - тоже вне цикла событий. Процессы запускаются через
+    spawn: fork копировал бы потоки, блокировки и соединения Motor
+    работающего приложения.
+    """
+
+    workers: int = 0
+    _executor: Optional[ProcessPoolExecutor] = field(default=None, init=False)
+
+    async def run(self, function: Callable[..., R], *args) -> R:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(), function, *args
+        )
+
+    async def map_shards(
+        self, function: Callable[[list[T]], list[R]], items: Sequence[T]
+    ) -> list[R]:
+        """
+        Делит items на непрерывные шарды по числу процессов, применяет
+        к ним function параллельно и склеивает результаты в исходном
+        порядке.
+        :param function: функция шарда, возвращающая по результату на
+                элемент. Должна сериализоваться pickle.
+        :param items: элементы для обработки.
+        :return: результаты в порядке items.
+        """
+        shards = await asyncio.gather(
+            *(self.run(function, shard) for shard in self._split(items))
+        )
+        return [result for shard in shards for result in shard]
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers > 0 and self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def _split(self, items: Sequence[T]) -> list[list[T]]:
+        count = max(1, min(self.workers, len(items)))
+        size, remainder = divmod(len(items), count)
+        shards = []
+        start = 0
+        for i in range(count):
+            end = start + size + (1 if i < remainder else 0)
+            shards.append(list(items[start:end]))
+            start = end
+        return shards
+
+
+def init_process_pool(workers: int) -> Iterator[ProcessPool]:
+    process_pool = ProcessPool(workers=workers)
+    yield process_pool
+    process_pool.shutdown()
@@ -8,7 +8,9 @@ from . import (
     machine_translator,
     neural_method,
     ngramm_method,
+    ngramm_profile_method,
     open_ai,
+    similar_documents,
     text_documents,
 )
 
@@ -18,9 +20,11 @@ def build_v1_router():
     router.include_router(text_documents.router)
     router.include_router(logical_search.router)
     router.include_router(calculate_weight_coefficient.router)
+    router.include_router(similar_documents.router)
     router.include_router(open_ai.router)
     router.include_router(neural_method.router)
     router.include_router(ngramm_method.router)
+    router.include_router(ngramm_profile_method.router)
     router.include_router(alphabet_method.router)
     router.include_router(html_processing.router)
     router.include_router(machine_translator.router)
@@ -1,5 +1,5 @@
 from dependency_injector.wiring import inject
-from fastapi import APIRouter, File, UploadFile
+from fastapi import APIRouter, File, Query, UploadFile
 
 from app.container import get_dependency
 from app.service.alphabet_method import AlphabetMethodService
@@ -11,8 +11,30 @@ router = APIRouter(prefix="/alphabet-method", tags=["alphabet-method"])
 @inject
 async def predict_language(
     file: UploadFile = File(...),
+    early_exit: bool = Query(False),
     alphabet_method_service: AlphabetMethodService = get_dependency(
         "alphabet_method_service"
     ),
 ):
-    return await alphabet_method_service.predict(file)
+    return await alphabet_method_service.predict(file, early_exit=early_exit)
+
+
+@router.post("/predict-batch")
+@inject
+async def predict_language_batch(
+    files: list[UploadFile] = File(...),
+    alphabet_method_service: AlphabetMethodService = get_dependency(
+        "alphabet_method_service"
+    ),
+):
+    return await alphabet_method_service.predict_batch(files)
+
+
+@router.post("/train-profiles")
+@inject
+async def train_profiles(
+    alphabet_method_service: AlphabetMethodService = get_dependency(
+        "alphabet_method_service"
+    ),
+):
+    return await alphabet_method_service.train_profiles()
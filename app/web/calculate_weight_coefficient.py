@@ -1,10 +1,13 @@
+from typing import Optional
+
 from dependency_injector.wiring import inject
-from fastapi import APIRouter
+from fastapi import APIRouter, Header, Query, Response
 
 from app.container import get_dependency
 from app.service.calculate_weight_coefficient.service import (
     WeightCoefficientService,
 )
+from app.util.etag import etag_matches
 
 router = APIRouter(
     prefix="/calculate-weight-coefficient",
@@ -12,11 +15,29 @@ router = APIRouter(
 )
 
 
-@router.get("/", response_model=dict[str, dict[str, float]])
+@router.get(
+    "/",
+    response_model=dict[str, dict[str, float]],
+    responses={304: {"description": "Not Modified"}},
+)
 @inject
 async def calculate_weight_coefficient(
+    response: Response,
+    top_n: Optional[int] = Query(default=None, ge=1),
+    document: Optional[str] = None,
+    min_score: Optional[float] = None,
+    if_none_match: Optional[str] = Header(default=None),
     weight_coefficient_service: WeightCoefficientService = get_dependency(
         "weight_coefficient_service"
     ),
 ):
-    return await weight_coefficient_service.calculate_tfidf()
+    version = await weight_coefficient_service.get_materialized_version()
+    etag = weight_coefficient_service.tfidf_etag(
+        version, top_n=top_n, min_score=min_score, document=document
+    )
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return await weight_coefficient_service.read_materialized_tfidf(
+        version, top_n=top_n, min_score=min_score, document=document
+    )
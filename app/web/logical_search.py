@@ -1,19 +1,46 @@
+from typing import Optional, Union
+
 from dependency_injector.wiring import inject
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
+from starlette.responses import StreamingResponse
 
 from app.container import get_dependency
 from app.service.logical_search.service import LogicalSearchService
-from app.service.text_document import TextDocument
+from app.service.text_document import TextDocument, TextDocumentName
 
 router = APIRouter(prefix="/logical-search", tags=["logical-search"])
 
 
-@router.get("/", response_model=list[TextDocument])
+@router.get("/", response_model=list[Union[TextDocument, TextDocumentName]])
 @inject
 async def logical_search(
     expression: str,
+    offset: int = Query(default=0, ge=0),
+    limit: Optional[int] = Query(default=None, ge=1),
+    names_only: bool = False,
+    ranked: bool = False,
+    stream: bool = False,
     logical_search_service: LogicalSearchService = get_dependency(
         "logical_search_service"
     ),
 ):
-    return await logical_search_service.search(expression)
+    if not stream:
+        return await logical_search_service.search(
+            expression,
+            offset=offset,
+            limit=limit,
+            names_only=names_only,
+            ranked=ranked,
+        )
+
+    # NDJSON: документы отдаются клиенту по мере загрузки из MongoDB
+    document_ids = await logical_search_service.find_document_ids(
+        expression, offset=offset, limit=limit, ranked=ranked
+    )
+    documents = logical_search_service.iter_documents(
+        document_ids, names_only=names_only
+    )
+    return StreamingResponse(
+        (document.json(by_alias=True) + "\n" async for document in documents),
+        media_type="application/x-ndjson",
+    )
@@ -1,5 +1,5 @@
 from dependency_injector.wiring import inject
-from fastapi import APIRouter, File, UploadFile
+from fastapi import APIRouter, File, Query, UploadFile
 
 from app.container import get_dependency
 from app.service.neural_and_ngramm_method import NgrammAndNeuralMethodService
@@ -7,22 +7,53 @@ from app.service.neural_and_ngramm_method import NgrammAndNeuralMethodService
 router = APIRouter(prefix="/ngramm-method", tags=["ngramm-method"])
 
 
-@router.post("/create-model")
+@router.post("/create-model", status_code=202)
 @inject
 async def create_model(
+    streaming: bool = Query(False),
     ngramm_method_service: NgrammAndNeuralMethodService = get_dependency(
         "ngramm_method_service"
     ),
 ):
-    await ngramm_method_service.create_model()
+    """
+    Запускает обучение фоновой задачей и возвращает ее для опроса через
+    /training-jobs/{job_id}. Задачи и проверка "одно обучение за раз"
+    (409) хранятся в памяти воркера: при нескольких воркерах uvicorn
+    каждый запускает свое обучение, а статус задачи доступен только на
+    воркере, который ее принял. Запускайте обучение на одном воркере.
+    """
+    return await ngramm_method_service.create_model(streaming=streaming)
+
+
+@router.get("/training-jobs/{job_id}")
+@inject
+async def get_training_job(
+    job_id: str,
+    ngramm_method_service: NgrammAndNeuralMethodService = get_dependency(
+        "ngramm_method_service"
+    ),
+):
+    return ngramm_method_service.get_training_job(job_id)
 
 
 @router.post("/predict")
 @inject
 async def predict_language(
     file: UploadFile = File(...),
+    early_exit: bool = Query(False),
+    ngramm_method_service: NgrammAndNeuralMethodService = get_dependency(
+        "ngramm_method_service"
+    ),
+):
+    return await ngramm_method_service.predict(file, early_exit=early_exit)
+
+
+@router.post("/predict-batch")
+@inject
+async def predict_language_batch(
+    files: list[UploadFile] = File(...),
     ngramm_method_service: NgrammAndNeuralMethodService = get_dependency(
         "ngramm_method_service"
     ),
 ):
-    return await ngramm_method_service.predict(file)
+    return await ngramm_method_service.predict_batch(files)
@@ -0,0 +1,41 @@
+from dependency_injector.wiring import inject
+from fastapi import APIRouter, File, UploadFile
+
+from app.container import get_dependency
+from app.service.ngramm_profile_method import NgramProfileMethodService
+
+router = APIRouter(
+    prefix="/ngramm-profile-method", tags=["ngramm-profile-method"]
+)
+
+
+@router.post("/create-model")
+@inject
+async def create_model(
+    ngramm_profile_method_service: NgramProfileMethodService = get_dependency(
+        "ngramm_profile_method_service"
+    ),
+):
+    return await ngramm_profile_method_service.create_model()
+
+
+@router.post("/predict")
+@inject
+async def predict_language(
+    file: UploadFile = File(...),
+    ngramm_profile_method_service: NgramProfileMethodService = get_dependency(
+        "ngramm_profile_method_service"
+    ),
+):
+    return await ngramm_profile_method_service.predict(file)
+
+
+@router.post("/predict-batch")
+@inject
+async def predict_language_batch(
+    files: list[UploadFile] = File(...),
+    ngramm_profile_method_service: NgramProfileMethodService = get_dependency(
+        "ngramm_profile_method_service"
+    ),
+):
+    return await ngramm_profile_method_service.predict_batch(files)
@@ -0,0 +1,22 @@
+from dependency_injector.wiring import inject
+from fastapi import APIRouter, Query
+
+from app.container import get_dependency
+from app.service.similar_documents.dto import SimilarDocument
+from app.service.similar_documents.service import SimilarDocumentsService
+
+router = APIRouter(prefix="/similar-documents", tags=["similar-documents"])
+
+
+@router.get("/{document_name}", response_model=list[SimilarDocument])
+@inject
+async def get_similar_documents(
+    document_name: str,
+    k: int = Query(default=10, ge=1),
+    similar_documents_service: SimilarDocumentsService = get_dependency(
+        "similar_documents_service"
+    ),
+):
+    return await similar_documents_service.find_similar(
+        document_name=document_name, k=k
+    )
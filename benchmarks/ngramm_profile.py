@@ -0,0 +1,164 @@
+"""
+Сравнение NgramProfiles (профили n-грамм Cavnar-Trenkle) с моделью
+Mode.NGRAMM (CountVectorizer по символьным триграммам и полносвязная
+сеть Keras той же архитектуры, что в NgrammAndNeuralMethodService).
+
+Документы ru и de читаются из MongoDB и делятся на обучающую и
+тестовую части. Для каждого способа считаются точность на тестовой
+части, задержка на один документ и пропускная способность пакетом.
+
+    python -m benchmarks.ngramm_profile --mongo-url mongodb://localhost/db
+    python -m benchmarks.ngramm_profile --engines profile
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from typing import Callable
+
+import numpy as np
+from beanie import init_beanie
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.service.ngramm_profile_method.profile import (
+    NgramProfiles,
+    NgramStatistics,
+    count_ngrams,
+)
+from app.service.text_document import (
+    TextDocument,
+    TextDocumentRepository,
+    TextDocumentSample,
+)
+from app.service.text_document.enums import Language
+
+LANGUAGES = [Language.RUSSIAN, Language.GERMAN]
+
+Sample = tuple[str, str]
+
+
+async def load_corpus(mongo_url: str) -> list[Sample]:
+    client = AsyncIOMotorClient(mongo_url)
+    await init_beanie(
+        database=client.get_default_database(), document_models=[TextDocument]
+    )
+    samples = []
+    async for batch in TextDocumentRepository.iterate_batches(
+        batch_size=500, projection=TextDocumentSample
+    ):
+        samples.extend(
+            (document.language, document.text)
+            for document in batch
+            if document.language in LANGUAGES
+        )
+    return samples
+
+
+def train_profile(train: list[Sample], size: int) -> Callable:
+    statistics = {}
+    for language, language_statistics in count_ngrams(train)[0].items():
+        statistics.setdefault(language, NgramStatistics()).update(
+            language_statistics
+        )
+    profiles = NgramProfiles(
+        {
+            language: language_statistics.profile(size)
+            for language, language_statistics in statistics.items()
+        },
+        size,
+    )
+    return profiles.predict
+
+
+def train_ngramm(train: list[Sample], epochs: int) -> Callable:
+    from sklearn.feature_extraction.text import CountVectorizer
+
+    from app.service.neural_and_ngramm_method.sparse import (
+        SparseBatches,
+        build_model,
+        predict_sparse,
+    )
+
+    vectorizer = CountVectorizer(analyzer="char", ngram_range=(3, 3))
+    x = vectorizer.fit_transform([text for _, text in train])
+    y = np.array([int(language == Language.GERMAN) for language, _ in train])
+
+    model = build_model(x.shape[1])
+    model.compile(
+        loss="binary_crossentropy", optimizer="adam", metrics=["accuracy"]
+    )
+    model.fit(
+        SparseBatches(x, y, batch_size=32, shuffle=True),
+        epochs=epochs,
+        verbose=0,
+    )
+
+    def predict(texts: list[str]) -> list[str]:
+        predictions = predict_sparse(model, vectorizer.transform(texts))
+        return ["de" if pred >= 0.5 else "ru" for pred in predictions]
+
+    return predict
+
+
+def evaluate(name: str, predict: Callable, test: list[Sample]) -> None:
+    texts = [text for _, text in test]
+    expected = [str(language) for language, _ in test]
+
+    started = time.perf_counter()
+    predicted = predict(texts)
+    batch_time = time.perf_counter() - started
+
+    single = texts[: min(len(texts), 200)]
+    started = time.perf_counter()
+    for text in single:
+        predict([text])
+    single_time = time.perf_counter() - started
+
+    accuracy = np.mean(
+        [str(p) == e for p, e in zip(predicted, expected)]
+    ).item()
+    print(
+        f"{name:8} accuracy {accuracy:.3f}   "
+        f"latency {1000 * single_time / len(single):.3f} ms/doc   "
+        f"batch {len(texts) / batch_time:.0f} docs/s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--mongo-url",
+        default=os.environ.get(
+            "MONGO_URL", "mongodb://localhost:27017/test_mongo"
+        ),
+    )
+    parser.add_argument("--engines", default="profile,ngramm")
+    parser.add_argument("--test-share", type=float, default=0.2)
+    parser.add_argument("--profile-size", type=int, default=300)
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+
+    samples = asyncio.run(load_corpus(arguments.mongo_url))
+    order = np.random.default_rng(arguments.seed).permutation(len(samples))
+    test_size = max(1, int(len(samples) * arguments.test_share))
+    test = [samples[i] for i in order[:test_size].tolist()]
+    train = [samples[i] for i in order[test_size:].tolist()]
+    print(f"documents: train {len(train)}, test {len(test)}")
+
+    engines = arguments.engines.split(",")
+    if "profile" in engines:
+        started = time.perf_counter()
+        predict = train_profile(train, arguments.profile_size)
+        print(f"profile  trained in {time.perf_counter() - started:.2f} s")
+        evaluate("profile", predict, test)
+    if "ngramm" in engines:
+        started = time.perf_counter()
+        predict = train_ngramm(train, arguments.epochs)
+        print(f"ngramm   trained in {time.perf_counter() - started:.2f} s")
+        evaluate("ngramm", predict, test)
+
+
+if __name__ == "__main__":
+    main()
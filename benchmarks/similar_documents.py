@@ -0,0 +1,141 @@
+"""
+Сравнение LSHIndex с точным перебором по косинусной близости TF-IDF.
+
+Корпус генерируется синтетически: каждый документ на 80% состоит из
+слов основной темы и на 20% - из слов второй, слова темы распределены
+по закону Ципфа. Для случайных запросов
+считаются recall@k относительно точного поиска и задержка обоих
+способов.
+
+    python -m benchmarks.similar_documents --documents 20000 --k 10
+"""
+
+import argparse
+import time
+from collections import Counter
+
+import numpy as np
+from beanie import PydanticObjectId
+
+from app.service.calculate_weight_coefficient.engine import TfidfMatrix
+from app.service.calculate_weight_coefficient.statistics import (
+    CorpusStatistics,
+)
+from app.service.similar_documents.index import LSHIndex
+from app.service.text_document import TextDocumentContent
+
+
+def generate_corpus(
+    documents: int, vocabulary: int, topics: int, seed: int
+) -> CorpusStatistics:
+    random = np.random.default_rng(seed)
+    topic_words = [
+        random.choice(vocabulary, size=vocabulary // 10, replace=False)
+        for _ in range(topics)
+    ]
+    zipf = 1 / np.arange(1, vocabulary // 10 + 1)
+    zipf /= zipf.sum()
+
+    statistics = CorpusStatistics()
+    for i in range(documents):
+        length = int(random.integers(50, 300))
+        main_topic, secondary_topic = random.choice(
+            topics, size=2, replace=False
+        )
+        main_length = int(length * 0.8)
+        words = np.concatenate(
+            [
+                topic_words[topic][random.choice(len(zipf), size=size, p=zipf)]
+                for topic, size in (
+                    (main_topic, main_length),
+                    (secondary_topic, length - main_length),
+                )
+            ]
+        )
+        document = TextDocumentContent(
+            _id=PydanticObjectId(), name=f"document-{i}", text=""
+        )
+        statistics.add_counts(
+            document, Counter(f"w{word}" for word in words.tolist())
+        )
+    statistics.is_built = True
+    return statistics
+
+
+def exact_neighbours(matrix, row: int, k: int) -> list[int]:
+    scores = (matrix @ matrix[row].T).toarray().ravel()
+    scores[row] = -np.inf
+    top = np.argpartition(-scores, k)[:k]
+    return top[np.argsort(-scores[top])].tolist()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=20000)
+    parser.add_argument("--vocabulary", type=int, default=50000)
+    parser.add_argument("--topics", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--tables", type=int, default=32)
+    parser.add_argument("--bits", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+
+    statistics = generate_corpus(
+        arguments.documents,
+        arguments.vocabulary,
+        arguments.topics,
+        arguments.seed,
+    )
+
+    started = time.perf_counter()
+    tfidf = TfidfMatrix.from_statistics(statistics)
+    norms = np.sqrt(tfidf.matrix.multiply(tfidf.matrix).sum(axis=1)).A1
+    norms[norms == 0] = 1
+    matrix = tfidf.matrix.multiply(1 / norms[:, None]).tocsr()
+    exact_build = time.perf_counter() - started
+
+    index = LSHIndex(statistics, tables=arguments.tables, bits=arguments.bits)
+    started = time.perf_counter()
+    index.build()
+    lsh_build = time.perf_counter() - started
+
+    random = np.random.default_rng(arguments.seed)
+    rows = random.choice(
+        len(tfidf.document_ids), size=arguments.queries, replace=False
+    )
+    exact_time = lsh_time = 0.0
+    recall = []
+    candidates = []
+    for row in rows.tolist():
+        document_id = tfidf.document_ids[row]
+
+        started = time.perf_counter()
+        exact = exact_neighbours(matrix, row, arguments.k)
+        exact_time += time.perf_counter() - started
+
+        started = time.perf_counter()
+        approximate = index.query(document_id, arguments.k)
+        lsh_time += time.perf_counter() - started
+
+        expected = {tfidf.document_ids[i] for i in exact}
+        found = {neighbour for neighbour, _ in approximate}
+        recall.append(len(expected & found) / arguments.k)
+        candidates.append(len(index.candidates(document_id)))
+
+    queries = arguments.queries
+    print(
+        f"documents: {arguments.documents}, k: {arguments.k}, "
+        f"tables: {arguments.tables}, bits: {arguments.bits}"
+    )
+    print(f"build, s:     exact {exact_build:.2f}   lsh {lsh_build:.2f}")
+    print(
+        f"query, ms:    exact {1000 * exact_time / queries:.2f}   "
+        f"lsh {1000 * lsh_time / queries:.2f}"
+    )
+    print(f"recall@{arguments.k}:    {np.mean(recall):.3f}")
+    print(f"candidates:   {np.mean(candidates):.0f} per query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import numpy as np
+import pytest
+
+from app.service.alphabet_method.profile import (
+    AlphabetProfiles,
+    LetterStatistics,
+    count_letters,
+)
+
+SAMPLES = [
+    ("en", "The quick brown fox jumps over the lazy dog"),
+    ("en", "Pack my box with five dozen liquor jugs"),
+    ("ru", "Съешь же ещё этих мягких французских булок, да выпей чаю"),
+    ("de", "Zwölf Boxkämpfer jagen Viktor quer über den großen Sylter Deich"),
+    (None, "unlabeled text is skipped"),
+]
+
+TEXTS = [
+    "hello world",
+    "привет, мир",
+    "grüße aus köln",
+    "12345 !!!",
+    "",
+    "ｆｕｌｌｗｉｄｔｈ ☃ 𝔘𝔫𝔦𝔠𝔬𝔡𝔢",
+]
+
+
+@pytest.fixture
+def profiles() -> AlphabetProfiles:
+    (statistics,) = count_letters(SAMPLES)
+    return AlphabetProfiles(
+        {
+            language: language_statistics.frequencies()
+            for language, language_statistics in statistics.items()
+        }
+    )
+
+
+def naive_errors(
+    frequencies: dict[str, dict[str, float]], text: str
+) -> list[float]:
+    length = max(len(text), 1)
+    return [
+        sum(
+            (text.count(letter) / length - expected) ** 2
+            for letter, expected in profile.items()
+        )
+        for profile in frequencies.values()
+    ]
+
+
+def test_count_letters_groups_by_language():
+    (statistics,) = count_letters(SAMPLES)
+
+    assert set(statistics) == {"en", "ru", "de"}
+    assert statistics["en"].document_count == 2
+    assert statistics["en"].text_length == len(SAMPLES[0][1]) + len(
+        SAMPLES[1][1]
+    )
+    assert statistics["en"].letter_counts["t"] == 3
+    assert statistics["ru"].letter_counts["ё"] == 1
+    assert " " not in statistics["ru"].letter_counts
+    assert "," not in statistics["ru"].letter_counts
+
+
+def test_letter_statistics_merge_shards():
+    (first,) = count_letters(SAMPLES[:2])
+    (second,) = count_letters(SAMPLES[2:])
+    (whole,) = count_letters(SAMPLES)
+
+    merged = {}
+    for shard in (first, second):
+        for language, statistics in shard.items():
+            merged.setdefault(language, LetterStatistics()).update(statistics)
+
+    assert merged == whole
+
+
+def test_frequencies_drop_rare_letters():
+    statistics = LetterStatistics(
+        letter_counts={"a": 9999, "b": 1}, text_length=20000
+    )
+    assert statistics.frequencies() == {"a": 9999 / 20000}
+    assert LetterStatistics().frequencies() == {}
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_errors_match_naive_formula(profiles, text):
+    np.testing.assert_allclose(
+        profiles.errors([text])[0],
+        naive_errors(profiles.frequencies, text),
+        atol=1e-12,
+    )
+
+
+def test_batched_errors_match_single_texts(profiles):
+    batched = profiles.errors(TEXTS)
+    for row, text in zip(batched, TEXTS):
+        np.testing.assert_allclose(row, profiles.errors([text])[0])
+
+
+def test_predict_picks_smallest_error(profiles):
+    assert profiles.predict([]) == []
+    assert profiles.predict(
+        [
+            "the lazy dog jumps over the quick brown fox",
+            "съешь ещё этих мягких булок",
+        ]
+    ) == ["en", "ru"]
+
+
+def test_rank_returns_best_language_and_margin(profiles):
+    text = "съешь ещё этих мягких булок"
+    counts = profiles.letter_counts([text])[0]
+    language, margin = profiles.rank(counts, len(text))
+
+    errors = sorted(naive_errors(profiles.frequencies, text))
+    assert language == "ru"
+    assert margin == pytest.approx((errors[1] - errors[0]) / errors[1])
+    assert 0 <= margin <= 1
+
+
+def test_rank_with_single_language():
+    profiles = AlphabetProfiles({"en": {"a": 0.5}})
+    counts = profiles.letter_counts(["a"])[0]
+    assert profiles.rank(counts, 1) == ("en", 1.0)
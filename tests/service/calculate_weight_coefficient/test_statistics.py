@@ -0,0 +1,99 @@
+import asyncio
+from collections import Counter
+from types import SimpleNamespace
+
+from beanie import PydanticObjectId
+
+from app.service.calculate_weight_coefficient.statistics import (
+    CorpusStatistics,
+)
+from app.service.calculate_weight_coefficient.tokenizer import tokenize
+from app.util.process_pool import ProcessPool
+
+TEXTS = [
+    "Football is played in Madrid and in London",
+    "Real Madrid won the final of the football cup",
+    "Футбол и баскетбол — игры с мячом",
+    "",
+]
+
+
+def make_documents(texts: list[str]) -> list[SimpleNamespace]:
+    return [
+        SimpleNamespace(id=PydanticObjectId(), name=f"{i}.txt", text=text)
+        for i, text in enumerate(texts)
+    ]
+
+
+def expected_document_frequency(texts: list[str]) -> Counter:
+    frequency = Counter()
+    for text in texts:
+        frequency.update(set(tokenize(text)))
+    return frequency
+
+
+def test_add_document_counts_terms():
+    statistics = CorpusStatistics()
+    documents = make_documents(TEXTS)
+    for document in documents:
+        statistics.add_document(document)
+
+    assert statistics.document_count == len(TEXTS)
+    assert statistics.document_frequency == expected_document_frequency(TEXTS)
+    assert statistics.term_counts[documents[0].id]["in"] == 2
+    assert statistics.document_names[documents[1].id] == "1.txt"
+
+
+def test_readding_document_replaces_its_counts():
+    statistics = CorpusStatistics()
+    documents = make_documents(TEXTS)
+    for document in documents:
+        statistics.add_document(document)
+    version = statistics.version
+
+    documents[0].text = "basketball in Moscow"
+    statistics.add_document(documents[0])
+
+    assert statistics.version > version
+    assert statistics.document_count == len(TEXTS)
+    assert statistics.document_frequency == expected_document_frequency(
+        ["basketball in Moscow"] + TEXTS[1:]
+    )
+
+
+def test_remove_document_drops_unused_terms():
+    statistics = CorpusStatistics()
+    documents = make_documents(TEXTS)
+    for document in documents:
+        statistics.add_document(document)
+
+    statistics.remove_document(documents[0].id)
+    version = statistics.version
+    statistics.remove_document(documents[0].id)
+
+    assert statistics.version == version
+    assert documents[0].id not in statistics.document_names
+    assert "london" not in statistics.document_frequency
+    assert statistics.document_frequency == expected_document_frequency(
+        TEXTS[1:]
+    )
+
+
+def test_build_from_batches_matches_incremental_updates():
+    documents = make_documents(TEXTS)
+
+    async def batches():
+        yield documents[:3]
+        yield documents[3:]
+
+    built = CorpusStatistics()
+    asyncio.run(built.build_from_batches(batches(), ProcessPool(workers=0)))
+
+    incremental = CorpusStatistics()
+    for document in documents:
+        incremental.add_document(document)
+
+    assert built.is_built
+    assert built.term_counts == incremental.term_counts
+    assert built.document_frequency == incremental.document_frequency
+    assert built.document_names == incremental.document_names
@@ -0,0 +1,94 @@
+import io
+import struct
+import zipfile
+
+import pytest
+
+from app.service.html_processing.service import (
+    ArchiveLimitExceeded,
+    UnreadableArchive,
+    align_results,
+    parse_html_documents,
+    unpack_batch,
+)
+
+
+def make_archive(files: dict[str, bytes]) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+        archive.writestr("folder/", b"")
+        archive.writestr("__MACOSX/._a.html", b"metadata")
+    return buffer.getvalue()
+
+
+def set_compression_method(archive: bytes, method: int) -> bytes:
+    """
+    Подменяет метод сжатия в локальных заголовках и центральном
+    каталоге архива.
+    """
+    archive = bytearray(archive)
+    for signature, offset in ((b"PK\x03\x04", 8), (b"PK\x01\x02", 10)):
+        position = archive.find(signature)
+        while position != -1:
+            struct.pack_into("<H", archive, position + offset, method)
+            position = archive.find(signature, position + 1)
+    return bytes(archive)
+
+
+def test_unpack_batch_expands_archives():
+    archive = make_archive({"a.html": b"<p>a</p>", "b.html": b"<p>b</p>"})
+    batch = unpack_batch(
+        [("plain.html", b"<p>plain</p>"), ("docs.zip", archive)],
+        max_archive_members=10,
+        max_archive_size=1024,
+    )
+    assert [(file.name, file.content, file.source) for file in batch] == [
+        ("plain.html", b"<p>plain</p>", 0),
+        ("a.html", b"<p>a</p>", 1),
+        ("b.html", b"<p>b</p>", 1),
+    ]
+
+
+@pytest.mark.parametrize(
+    "max_archive_members, max_archive_size", [(1, 1024), (10, 10)]
+)
+def test_unpack_batch_checks_archive_limits(
+    max_archive_members, max_archive_size
+):
+    archive = make_archive({"a.html": b"<p>a</p>", "b.html": b"<p>b</p>"})
+    with pytest.raises(ArchiveLimitExceeded):
+        unpack_batch(
+            [("docs.zip", archive)],
+            max_archive_members=max_archive_members,
+            max_archive_size=max_archive_size,
+        )
+
+
+def test_unpack_batch_rejects_unsupported_compression():
+    archive = set_compression_method(make_archive({"a.html": b"<p>a</p>"}), 99)
+    with pytest.raises(UnreadableArchive):
+        unpack_batch(
+            [("docs.zip", archive)],
+            max_archive_members=10,
+            max_archive_size=1024,
+        )
+
+
+def test_parse_html_documents_reports_errors_per_file():
+    (text, text_error), (failed, error) = parse_html_documents(
+        [b"<p>Hello <b>world</b></p>", b"\xff\xfe"]
+    )
+    assert (text, text_error) == ("Helloworld", None)
+    assert failed is None
+    assert "utf-8" in error
+
+
+def test_align_results_skips_failed_files():
+    assert align_results(["a", None, "b", None], ["A", "B"]) == [
+        "A",
+        None,
+        "B",
+        None,
+    ]
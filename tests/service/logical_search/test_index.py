@@ -0,0 +1,51 @@
+import asyncio
+from types import SimpleNamespace
+
+from beanie import PydanticObjectId
+
+from app.service.logical_search.index import InvertedIndex
+
+
+def make_document(text: str) -> SimpleNamespace:
+    return SimpleNamespace(id=PydanticObjectId(), text=text)
+
+
+def test_build_indexes_all_batches():
+    documents = [make_document(f"football cup {i}") for i in range(5)]
+    index = InvertedIndex()
+
+    async def batches():
+        yield documents[:3]
+        yield documents[3:]
+
+    asyncio.run(index.build(batches()))
+
+    assert index.is_built
+    assert index.lookup("football") == {document.id for document in documents}
+    assert index.positions("cup", documents[0].id) == [1]
+
+
+def test_build_skips_documents_deleted_during_build():
+    deleted, kept = make_document("football"), make_document("football")
+    index = InvertedIndex()
+
+    async def batches():
+        batch = [deleted, kept]
+        # Документ удален после того, как курсор прочитал пачку
+        await index.on_document_deleted(deleted)
+        yield batch
+
+    asyncio.run(index.build(batches()))
+
+    assert index.lookup("football") == {kept.id}
+    assert index.all_documents() == {kept.id}
+
+
+def test_remove_document_drops_empty_postings():
+    document = make_document("football in madrid")
+    index = InvertedIndex(is_built=True)
+    index.add_document(document)
+    index.remove_document(document.id)
+
+    assert index.postings == {}
+    assert list(index.terms_with_prefix("foot")) == []
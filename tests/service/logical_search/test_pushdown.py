@@ -0,0 +1,104 @@
+import re
+
+import pytest
+
+from app.service.logical_search.index import term_positions
+from app.service.logical_search.pushdown import (
+    NON_WORD_CHAR,
+    WORD_CHAR,
+    to_mongo_filter,
+)
+from app.service.logical_search.query import compile_query
+
+TEXTS = [
+    "Football is played in Madrid and in London",
+    "Basketball and volleyball are played indoors",
+    "Real Madrid won the final of the football cup",
+    "The final match: Madrid lost, the cup went to London",
+    "Футбол и баскетбол — игры с мячом",
+    "football_club, footballer; FOOTBALL!",
+    "",
+]
+
+
+def matches_filter(query: dict, text: str) -> bool:
+    """
+    Проверяет текст фильтром MongoDB из to_mongo_filter. Классы
+    символов \\p{...} заменяются их аналогами из модуля re.
+    """
+    if "$and" in query:
+        return all(matches_filter(item, text) for item in query["$and"])
+    if "$or" in query:
+        return any(matches_filter(item, text) for item in query["$or"])
+    if "$nor" in query:
+        return not any(matches_filter(item, text) for item in query["$nor"])
+    pattern = (
+        query["text"]["$regex"]
+        .replace(NON_WORD_CHAR, r"\W")
+        .replace(WORD_CHAR, r"\w")
+    )
+    return re.search(pattern, text, re.IGNORECASE) is not None
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "football",
+        "футбол",
+        "football and madrid",
+        "football or basketball",
+        "not football",
+        "madrid and not (football or cup)",
+        "foot*",
+        "*ball",
+        "*",
+        '"real madrid"',
+        '"final match madrid"',
+        "football_club",
+        "london and (madrid or basketball) and not cup",
+    ],
+)
+def test_exact_filter_matches_plan(query):
+    plan = compile_query(query)
+    condition, exact = to_mongo_filter(plan)
+    assert exact
+    for text in TEXTS:
+        assert matches_filter(condition, text) == plan.matches(
+            term_positions(text)
+        ), text
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "madrid near/2 final",
+        '"real madrid" near/3 final or basketball',
+        "london and madrid near/1 final",
+    ],
+)
+def test_inexact_filter_keeps_all_matches(query):
+    plan = compile_query(query)
+    condition, exact = to_mongo_filter(plan)
+    assert not exact
+    assert condition is not None
+    for text in TEXTS:
+        if plan.matches(term_positions(text)):
+            assert matches_filter(condition, text), text
+
+
+def test_negated_near_is_not_pushed_down():
+    assert to_mongo_filter(compile_query("not (madrid near/2 final)")) == (
+        None,
+        False,
+    )
+    assert to_mongo_filter(
+        compile_query("cup or not (madrid near/2 final)")
+    ) == (None, False)
+
+
+def test_and_keeps_pushable_operands():
+    condition, exact = to_mongo_filter(
+        compile_query("cup and not (madrid near/2 final)")
+    )
+    assert not exact
+    assert condition == {"$and": [to_mongo_filter(compile_query("cup"))[0]]}
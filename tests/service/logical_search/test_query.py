@@ -0,0 +1,144 @@
+from types import SimpleNamespace
+
+import pytest
+from beanie import PydanticObjectId
+
+from app.service.logical_search.index import InvertedIndex, term_positions
+from app.service.logical_search.query import (
+    And,
+    Near,
+    Not,
+    Or,
+    Phrase,
+    QuerySyntaxError,
+    Term,
+    Wildcard,
+    compile_query,
+    is_boolean_query,
+    parse,
+    positive_terms,
+    tokenize,
+)
+
+TEXTS = {
+    "football": "Football is played in Madrid and in London",
+    "basketball": "Basketball and volleyball are played indoors",
+    "real": "Real Madrid won the final of the football cup",
+    "final": "The final match: Madrid lost, the cup went to London",
+    "empty": "",
+}
+
+QUERIES = [
+    "football",
+    "football and madrid",
+    "football or basketball",
+    "not football",
+    "madrid and not football",
+    "not (football or basketball)",
+    "not not football",
+    "foot* or volley*",
+    "*ball* and not played",
+    '"real madrid"',
+    '"madrid won the"',
+    "madrid near/2 final",
+    "madrid near/1 final",
+    '"real madrid" near/3 final',
+    "london and (madrid or basketball) and not cup",
+    "missing",
+    "not missing",
+]
+
+
+@pytest.fixture
+def index() -> tuple[InvertedIndex, dict[str, PydanticObjectId]]:
+    index = InvertedIndex(is_built=True)
+    ids = {}
+    for name, text in TEXTS.items():
+        ids[name] = PydanticObjectId()
+        index.add_document(SimpleNamespace(id=ids[name], text=text))
+    return index, ids
+
+
+def test_parse_builds_expression_tree():
+    assert parse(tokenize("NOT football AND (basketball OR volleyball)")) == (
+        "and",
+        ("not", "football"),
+        ("or", "basketball", "volleyball"),
+    )
+    assert parse(tokenize('"Real Madrid" NEAR/3 final')) == (
+        "near",
+        ("phrase", ("real", "madrid")),
+        "final",
+        3,
+    )
+
+
+def test_compile_flattens_and_removes_double_negation():
+    assert compile_query("a and b and (c and a) and not d") == And(
+        operands=(Term("a"), Term("b"), Term("c")), excluded=(Term("d"),)
+    )
+    assert compile_query("a or (b or c)") == Or(
+        (Term("a"), Term("b"), Term("c"))
+    )
+    assert compile_query("not not a") == Term("a")
+    assert compile_query("not (a or b)") == Not(Or((Term("a"), Term("b"))))
+    assert compile_query("foot*") == Wildcard("foot*")
+    assert compile_query('"a b" near/2 c') == Near(
+        left=Phrase(("a", "b")), right=Term("c"), distance=2
+    )
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["a", "a and not b", "(a or b) and c", '"a b" near/1 c', "a*"],
+)
+def test_is_boolean_query_accepts_expressions(query):
+    assert is_boolean_query(query)
+
+
+@pytest.mark.parametrize(
+    "query", ["", "(a or b", "a b", "a and", "and a", "a near/2 b*", '""']
+)
+def test_is_boolean_query_rejects_malformed_queries(query):
+    assert not is_boolean_query(query)
+
+
+def test_parse_rejects_wildcard_near_operand():
+    with pytest.raises(QuerySyntaxError):
+        parse(tokenize("foot* near/2 cup"))
+
+
+def test_evaluate_finds_expected_documents(index):
+    index, ids = index
+
+    def find(query: str) -> set[str]:
+        found = compile_query(query).evaluate(index)
+        return {
+            name for name, document_id in ids.items() if document_id in found
+        }
+
+    assert find("madrid and not football") == {"final"}
+    assert find("not (football or basketball)") == {"final", "empty"}
+    assert find('"real madrid"') == {"real"}
+    assert find("madrid near/3 final") == {"real", "final"}
+    assert find("madrid near/2 final") == {"final"}
+    assert find("madrid near/1 final") == set()
+    assert find("foot* or volley*") == {"football", "basketball", "real"}
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_evaluate_agrees_with_matches(index, query):
+    index, ids = index
+    plan = compile_query(query)
+    expected = {
+        ids[name]
+        for name, text in TEXTS.items()
+        if plan.matches(term_positions(text))
+    }
+    assert set(plan.evaluate(index)) == expected
+
+
+def test_positive_terms_skip_negated_terms(index):
+    index, _ = index
+    plan = compile_query("(madrid or foot*) and not (cup or not london)")
+    assert positive_terms(plan, index) == {"madrid", "football", "london"}
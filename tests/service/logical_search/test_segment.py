@@ -0,0 +1,101 @@
+import pytest
+from beanie import PydanticObjectId
+
+from app.service.logical_search.index import term_positions
+from app.service.logical_search.segment import (
+    Segment,
+    decode_varint,
+    encode_varint,
+    write_segment,
+)
+
+TEXTS = [
+    "Football is played in Madrid and in London",
+    "Real Madrid won the final of the football cup",
+    "Футбол и баскетбол — игры с мячом",
+    "",
+]
+
+
+@pytest.fixture
+def documents() -> dict[PydanticObjectId, dict[str, list[int]]]:
+    return {PydanticObjectId(): term_positions(text) for text in TEXTS}
+
+
+@pytest.fixture
+def segment(tmp_path, documents):
+    postings = {}
+    for document_id, positions in documents.items():
+        for term, offsets in positions.items():
+            postings.setdefault(term, {})[document_id] = offsets
+    path = str(tmp_path / "segment_1.seg")
+    write_segment(path, documents, postings)
+    segment = Segment(path)
+    yield segment
+    segment.close()
+
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 300, 2**32, 2**63 - 1])
+def test_varint_round_trip(value):
+    out = bytearray(b"\xff")
+    encode_varint(value, out)
+    assert decode_varint(out, 1) == (value, len(out))
+
+
+def test_segment_reads_back_postings(segment, documents):
+    assert segment.document_count == len(documents)
+    assert list(segment.document_ids()) == sorted(documents)
+    terms = {term for positions in documents.values() for term in positions}
+    assert segment.term_count == len(terms)
+    for term in terms:
+        assert segment.postings(term) == {
+            document_id: positions[term]
+            for document_id, positions in documents.items()
+            if term in positions
+        }
+    assert segment.postings("missing") == {}
+    assert segment.find_term("missing") is None
+
+
+def test_document_number_finds_sorted_ids(segment, documents):
+    for number, document_id in enumerate(sorted(documents)):
+        assert segment.document_number(document_id) == number
+        assert segment.document_id(number) == document_id
+    assert segment.document_number(PydanticObjectId()) is None
+
+
+def test_terms_with_prefix(segment):
+    assert list(segment.terms_with_prefix("foot")) == ["football"]
+    assert list(segment.terms_with_prefix("ф")) == ["футбол"]
+    assert list(segment.terms_with_prefix("zzz")) == []
+    assert list(segment.terms_with_prefix("")) == sorted(
+        segment.term(i) for i in range(segment.term_count)
+    )
+
+
+def test_mark_deleted_is_persisted(segment, documents):
+    deleted = max(
+        document_id
+        for document_id, positions in documents.items()
+        if "madrid" in positions
+    )
+    number = segment.document_number(deleted)
+    assert deleted in segment.postings("madrid")
+    segment.mark_deleted(number)
+    segment.mark_deleted(number)
+
+    assert segment.live_count == len(documents) - 1
+    assert deleted not in segment.postings("madrid")
+    assert deleted not in set(segment.document_ids())
+
+    reopened = Segment(segment.path)
+    assert reopened.is_deleted(number)
+    assert reopened.live_count == len(documents) - 1
+    reopened.close()
+
+
+def test_segment_rejects_foreign_file(tmp_path):
+    path = tmp_path / "segment_1.seg"
+    path.write_bytes(b"\0" * 128)
+    with pytest.raises(ValueError):
+        Segment(str(path))
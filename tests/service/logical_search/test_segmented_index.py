@@ -0,0 +1,110 @@
+import asyncio
+import json
+import os
+from types import SimpleNamespace
+
+from beanie import PydanticObjectId
+
+from app.service.logical_search.segmented_index import MANIFEST, SegmentedIndex
+
+
+def make_document(text: str) -> SimpleNamespace:
+    return SimpleNamespace(id=PydanticObjectId(), text=text)
+
+
+def read_manifest(index: SegmentedIndex) -> dict:
+    with open(os.path.join(index.path, MANIFEST)) as file:
+        return json.load(file)
+
+
+def test_unchanged_manifest_keeps_generation(tmp_path):
+    index = SegmentedIndex(str(tmp_path))
+    document = make_document("football in madrid")
+    asyncio.run(index.add_document(document))
+    asyncio.run(index._run_locked(index._mark_built))
+    generation = read_manifest(index)["generation"]
+
+    index.merge()
+    index._mark_built()
+    asyncio.run(index.remove_document(PydanticObjectId()))
+    assert read_manifest(index)["generation"] == generation
+
+    asyncio.run(index.remove_document(document.id))
+    assert read_manifest(index)["generation"] == generation + 1
+    assert index.lookup("football") == set()
+
+    asyncio.run(index.remove_document(document.id))
+    assert read_manifest(index)["generation"] == generation + 1
+
+
+def test_empty_batch_writes_no_segment(tmp_path):
+    index = SegmentedIndex(str(tmp_path))
+    asyncio.run(index.on_documents_created([]))
+    assert not os.path.exists(os.path.join(index.path, MANIFEST))
+    assert index.segments == {}
+
+
+def test_merge_keeps_documents(tmp_path):
+    index = SegmentedIndex(str(tmp_path), merge_factor=3)
+    documents = [make_document(f"football cup {i}") for i in range(4)]
+
+    async def add_and_merge():
+        for document in documents[:3]:
+            await index.add_document(document)
+        await index.remove_document(documents[0].id)
+        await index.add_document(documents[3])
+        await asyncio.to_thread(index.merge)
+        index.refresh()
+
+    asyncio.run(add_and_merge())
+    assert len(index.segments) == 1
+    assert index.lookup("football") == {
+        document.id for document in documents[1:]
+    }
+    assert sorted(os.listdir(index.path)) == sorted(
+        ["lock", MANIFEST, *index.segments]
+    )
+
+
+def test_refresh_rereads_manifest_after_concurrent_merge(tmp_path):
+    writer = SegmentedIndex(str(tmp_path), merge_factor=2)
+    reader = SegmentedIndex(str(tmp_path))
+    documents = [make_document(f"final {i}") for i in range(2)]
+
+    asyncio.run(writer.add_document(documents[0]))
+    asyncio.run(writer.add_document(documents[1]))
+    # reader прочитал manifest до слияния и открывает сегменты после
+    # того, как слияние их удалило
+    manifests = [writer._read_manifest()]
+    writer.merge()
+    read_manifest_from_disk = reader._read_manifest
+    reader._read_manifest = lambda: (
+        manifests.pop() if manifests else read_manifest_from_disk()
+    )
+
+    reader.refresh()
+
+    assert set(reader.segments) == set(writer._read_manifest()["segments"])
+    assert reader.lookup("final") == {document.id for document in documents}
+
+
+def test_failed_merge_is_reported(tmp_path):
+    index = SegmentedIndex(str(tmp_path))
+    errors = []
+
+    def merge():
+        raise OSError("disk full")
+
+    index.merge = merge
+
+    async def schedule_merge():
+        asyncio.get_running_loop().set_exception_handler(
+            lambda loop, context: errors.append(context)
+        )
+        index._schedule_merge()
+        await asyncio.wait([index._merge])
+        await asyncio.sleep(0)
+
+    asyncio.run(schedule_merge())
+    assert len(errors) == 1
+    assert isinstance(errors[0]["exception"], OSError)
@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("keras")
+
+from app.service.neural_and_ngramm_method.training import (  # noqa: E402
+    shuffle_buffer,
+)
+
+
+@pytest.mark.parametrize("size", [-1, 0, 1])
+def test_small_shuffle_buffer_passes_items_through(size):
+    random = np.random.default_rng(0)
+    assert list(shuffle_buffer(range(5), size, random)) == list(range(5))
+
+
+@pytest.mark.parametrize("size", [2, 10, 100])
+def test_shuffle_buffer_keeps_every_item(size):
+    random = np.random.default_rng(0)
+    items = list(shuffle_buffer(range(50), size, random))
+    assert sorted(items) == list(range(50))
+    assert items != list(range(50))
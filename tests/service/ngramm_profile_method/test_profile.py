@@ -0,0 +1,137 @@
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from app.service.ngramm_profile_method.profile import (
+    MAX_NGRAM_LENGTH,
+    NgramProfiles,
+    NgramStatistics,
+    count_ngrams,
+    document_profile,
+    ngram_hashes,
+)
+
+SAMPLES = [
+    ("en", "The quick brown fox jumps over the lazy dog"),
+    ("en", "Pack my box with five dozen liquor jugs"),
+    ("ru", "Съешь же ещё этих мягких французских булок, да выпей чаю"),
+    ("de", "Zwölf Boxkämpfer jagen Viktor quer über den großen Sylter Deich"),
+    (None, "unlabeled text is skipped"),
+]
+
+SIZE = 50
+
+
+@pytest.fixture
+def profiles() -> NgramProfiles:
+    (statistics,) = count_ngrams(SAMPLES)
+    return NgramProfiles(
+        {
+            language: language_statistics.profile(SIZE)
+            for language, language_statistics in statistics.items()
+        },
+        size=SIZE,
+    )
+
+
+def ngram_count(text: str) -> int:
+    """
+    Число n-грамм текста: одиночные буквы и n-граммы длиной от 2 до
+    MAX_NGRAM_LENGTH каждого слова, дополненного пробелами.
+    """
+    count = 0
+    for word in "".join(c if c.isalpha() else " " for c in text).split():
+        count += len(word)
+        for n in range(2, MAX_NGRAM_LENGTH + 1):
+            count += max(0, len(word) + 2 - n + 1)
+    return count
+
+
+def naive_distances(profiles: NgramProfiles, text: str) -> list[int]:
+    hashes = document_profile(text, profiles.size).tolist()
+    distances = []
+    for language in profiles.languages:
+        ranks = {
+            value: rank
+            for rank, value in enumerate(profiles.profiles[language])
+        }
+        distances.append(
+            sum(
+                abs(ranks[value] - rank) if value in ranks else profiles.size
+                for rank, value in enumerate(hashes)
+            )
+        )
+    return distances
+
+
+@pytest.mark.parametrize(
+    "text", ["", "a", "ab", "hello, world!", "Привет мир 2024", "x_y-z"]
+)
+def test_ngram_hashes_cover_padded_words(text):
+    assert len(ngram_hashes(text)) == ngram_count(text)
+
+
+def test_ngram_hashes_do_not_depend_on_context():
+    single = np.unique(ngram_hashes("word"))
+    hashes, counts = np.unique(
+        ngram_hashes("Word, WORD word!"), return_counts=True
+    )
+    np.testing.assert_array_equal(hashes, single)
+    assert (counts == 3).all()
+
+
+def test_document_profile_orders_by_frequency():
+    counts = Counter(ngram_hashes("aaa bb c").tolist())
+    expected = sorted(counts, key=lambda value: (-counts[value], value))
+    assert document_profile("aaa bb c", 5).tolist() == expected[:5]
+    assert document_profile("aaa bb c", 1000).tolist() == expected
+
+
+def test_statistics_merge_shards():
+    (first,) = count_ngrams(SAMPLES[:2])
+    (second,) = count_ngrams(SAMPLES[2:])
+    (whole,) = count_ngrams(SAMPLES)
+
+    merged = {}
+    for shard in (first, second):
+        for language, statistics in shard.items():
+            merged.setdefault(language, NgramStatistics()).update(statistics)
+
+    assert set(merged) == set(whole) == {"en", "ru", "de"}
+    for language, statistics in whole.items():
+        np.testing.assert_array_equal(
+            merged[language].hashes, statistics.hashes
+        )
+        np.testing.assert_array_equal(
+            merged[language].counts, statistics.counts
+        )
+        assert merged[language].document_count == statistics.document_count
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "the lazy dog jumps over the quick brown fox",
+        "съешь ещё этих мягких булок",
+        "zwölf große boxkämpfer",
+        "qwxz",
+    ],
+)
+def test_distances_match_out_of_place_measure(profiles, text):
+    assert profiles.distances(text).tolist() == naive_distances(profiles, text)
+
+
+def test_predict(profiles):
+    assert profiles.predict(
+        [
+            "the lazy dog jumps over the quick brown fox",
+            "съешь ещё этих мягких булок",
+            "12345 !!!",
+        ]
+    ) == ["en", "ru", None]
+
+
+def test_predict_without_languages():
+    profiles = NgramProfiles({}, size=SIZE)
+    assert profiles.predict(["hello"]) == [None]
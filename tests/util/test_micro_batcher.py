@@ -0,0 +1,99 @@
+import asyncio
+import time
+
+import pytest
+
+from app.util.micro_batcher import MicroBatcher
+
+
+def submit_all(batcher_factory, items: list) -> list:
+    async def main():
+        batcher = batcher_factory()
+        return await asyncio.gather(
+            *(batcher.submit(item) for item in items), return_exceptions=True
+        )
+
+    return asyncio.run(main())
+
+
+def test_results_follow_submission_order():
+    batches = []
+
+    def square(items: list[int]) -> list[int]:
+        batches.append(list(items))
+        return [item * item for item in items]
+
+    results = submit_all(
+        lambda: MicroBatcher(square, max_batch_size=2, max_latency=0.01),
+        [1, 2, 3, 4, 5],
+    )
+
+    assert results == [1, 4, 9, 16, 25]
+    assert batches == [[1, 2], [3, 4], [5]]
+
+
+def test_partial_batch_is_flushed_after_latency():
+    results = submit_all(
+        lambda: MicroBatcher(
+            lambda items: [item.upper() for item in items],
+            max_batch_size=100,
+            max_latency=0.01,
+        ),
+        ["a", "b"],
+    )
+    assert results == ["A", "B"]
+
+
+def test_batch_error_is_raised_for_every_item():
+    def fail(items: list[int]) -> list[int]:
+        raise ValueError("broken model")
+
+    results = submit_all(lambda: MicroBatcher(fail), [1, 2, 3])
+
+    assert len(results) == 3
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_result_count_mismatch_fails_the_batch():
+    results = submit_all(
+        lambda: MicroBatcher(lambda items: items[:-1]), [1, 2, 3]
+    )
+
+    assert len(results) == 3
+    for result in results:
+        assert isinstance(result, RuntimeError)
+        assert "2 results for 3 items" in str(result)
+
+
+def test_batches_do_not_run_concurrently():
+    running = 0
+    overlaps = []
+
+    def record(items: list[int]) -> list[int]:
+        nonlocal running
+        running += 1
+        overlaps.append(running)
+        # Пока пакет считается, копится следующий
+        time.sleep(0.01)
+        running -= 1
+        return items
+
+    results = submit_all(
+        lambda: MicroBatcher(record, max_batch_size=1), list(range(5))
+    )
+
+    assert results == list(range(5))
+    assert max(overlaps) == 1
+
+
+@pytest.mark.parametrize("max_batch_size", [1, 3, 32])
+def test_every_item_gets_a_result(max_batch_size):
+    items = list(range(10))
+    results = submit_all(
+        lambda: MicroBatcher(
+            lambda batch: [item + 1 for item in batch],
+            max_batch_size=max_batch_size,
+        ),
+        items,
+    )
+    assert results == [item + 1 for item in items]
@@ -0,0 +1,55 @@
+import asyncio
+import sys
+
+import pytest
+
+from app.service.calculate_weight_coefficient.tokenizer import count_terms
+from app.util.process_pool import ProcessPool
+
+TEXTS = [
+    "Football is played in Madrid and in London",
+    "Real Madrid won the final of the football cup",
+    "Футбол и баскетбол — игры с мячом",
+    "",
+    "one more text",
+]
+
+
+def loaded_application_modules() -> list[str]:
+    return [
+        name for name in ("app.main", "app.container") if name in sys.modules
+    ]
+
+
+def run(workers: int, call):
+    async def main():
+        process_pool = ProcessPool(workers=workers)
+        try:
+            return await call(process_pool)
+        finally:
+            process_pool.shutdown()
+
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_map_shards_keeps_item_order(workers):
+    results = run(
+        workers,
+        lambda process_pool: process_pool.map_shards(count_terms, TEXTS),
+    )
+    assert results == count_terms(TEXTS)
+
+
+def test_split_covers_items():
+    process_pool = ProcessPool(workers=3)
+    assert process_pool._split([1, 2, 3, 4, 5]) == [[1, 2], [3, 4], [5]]
+    assert process_pool._split([1]) == [[1]]
+    assert ProcessPool(workers=0)._split([]) == [[]]
+
+
+def test_workers_do_not_import_application():
+    loaded = run(
+        2, lambda process_pool: process_pool.run(loaded_application_modules)
+    )
+    assert loaded == []